@@ -1,518 +1,39 @@
 import streamlit as st
 import pandas as pd
-import json
+import hashlib
+import os
+import time
+from dataclasses import replace
 from io import BytesIO
 
-def generate_pms_visualization(file_path=None, dataframe=None):
-    """
-    Generate an interactive HTML visualization from Excel data with bucket-based organization.
-
-    Args:
-        file_path: Path to the Excel file (optional if dataframe is provided)
-        dataframe: Pre-loaded pandas DataFrame (optional if file_path is provided)
-
-    Returns:
-        HTML string of the visualization
-    """
-    # Load data
-    if dataframe is not None:
-        df = dataframe
-    elif file_path is not None:
-        df = pd.read_excel(file_path, engine='openpyxl')
-    else:
-        raise ValueError("Either file_path or dataframe must be provided")
-
-    # Clean and process data
-    df.columns = df.columns.str.strip()
-    if 'Current Availability' in df.columns:
-        df['Current Availability'] = df['Current Availability'].apply(
-            lambda x: int(float(str(x).replace('%', ''))) if pd.notnull(x) else 0
-        )
-        df = df[df['Current Availability'] > 0]
-
-    if df.empty:
-        return """
-        <!DOCTYPE html>
-        <html lang="en">
-        <head>
-            <meta charset="UTF-8">
-            <title>PMS Resource Visualization</title>
-            <style>
-                body { font-family: 'Segoe UI', sans-serif; margin: 20px; }
-                .empty-message {
-                    text-align: center;
-                    padding: 50px;
-                    background: #f8f9fa;
-                    border-radius: 8px;
-                    color: #5f6368;
-                    font-size: 18px;
-                }
-            </style>
-        </head>
-        <body>
-            <div class="empty-message">No resources with availability greater than 0% found in the data.</div>
-        </body>
-        </html>
-        """
-
-    # Calculate total statistics
-    total_associates = len(df)
-    total_avg_availability = round(df['Current Availability'].mean(), 1)
-
-    # Role mapping for standardization
-    def map_role_name(role):
-        role_str = str(role).upper().strip()
-        if 'SCRUM' in role_str:
-            return 'SCRUM'
-        elif 'TPDL' in role_str:
-            return 'TPDL'
-        elif 'PGM' in role_str:
-            return 'PGM'
-        elif 'PM' in role_str:
-            return 'PM'
-        else:
-            return str(role).strip()
-
-    df['Mapped_Role'] = df['Current Role'].apply(map_role_name)
-
-    # Get unique regions and roles
-    all_regions = sorted(df['Region'].unique())
-    all_roles = sorted(df['Mapped_Role'].unique())
-
-    # Ensure standard roles are in a specific order
-    standard_roles = ['Total', 'PGM', 'PM', 'SCRUM', 'TPDL']
-    ordered_roles = [role for role in standard_roles if role in all_roles or role == 'Total']
-    ordered_roles += [role for role in all_roles if role not in standard_roles]
-    all_roles = ordered_roles
-
-    # Create a 'Total' role category combining all data
-    df_with_total = df.copy()
-
-    # Define availability buckets
-    all_buckets = ['76-100%', '51-75%', '26-50%', '0-25%']
-
-    # Function to determine bucket
-    def get_bucket(availability):
-        if availability >= 76:
-            return '76-100%'
-        elif availability >= 51:
-            return '51-75%'
-        elif availability >= 26:
-            return '26-50%'
-        else:
-            return '0-25%'
-
-    df['Bucket'] = df['Current Availability'].apply(get_bucket)
-
-    # Create data structure for the visualization
-    dashboard_data = {
-        'Total': {
-            'count': total_associates,
-            'avg_availability': total_avg_availability
-        },
-        'Regions': {},
-        'Roles': {}
-    }
-
-    # Overall role statistics
-    for role in all_roles:
-        if role == 'Total':
-            role_data = df
-        else:
-            role_data = df[df['Mapped_Role'] == role]
-
-        if not role_data.empty:
-            count = len(role_data)
-            avg_avail = round(role_data['Current Availability'].mean(), 1)
-
-            dashboard_data['Roles'][role] = {
-                'count': count,
-                'avg_availability': avg_avail,
-                'buckets': {}
-            }
-
-            # Calculate bucket statistics for this role
-            for bucket in all_buckets:
-                bucket_data = role_data[role_data['Bucket'] == bucket]
-                if not bucket_data.empty:
-                    dashboard_data['Roles'][role]['buckets'][bucket] = {
-                        'count': len(bucket_data),
-                        'avg_availability': round(bucket_data['Current Availability'].mean(), 1),
-                        'associates': bucket_data[['Associate ID', 'Associate Name', 'Current Availability', 'Region', 'Mapped_Role']].to_dict('records')
-                    }
-                else:
-                    dashboard_data['Roles'][role]['buckets'][bucket] = {
-                        'count': 0,
-                        'avg_availability': 0,
-                        'associates': []
-                    }
-        else:
-            dashboard_data['Roles'][role] = {
-                'count': 0,
-                'avg_availability': 0,
-                'buckets': {bucket: {'count': 0, 'avg_availability': 0, 'associates': []} for bucket in all_buckets}
-            }
-
-    # Region statistics
-    for region in all_regions:
-        region_data = df[df['Region'] == region]
-
-        if not region_data.empty:
-            count = len(region_data)
-            avg_avail = round(region_data['Current Availability'].mean(), 1)
-
-            dashboard_data['Regions'][region] = {
-                'count': count,
-                'avg_availability': avg_avail,
-                'roles': {}
-            }
-
-            # Calculate role statistics for this region
-            for role in all_roles:
-                if role == 'Total':
-                    role_region_data = region_data
-                else:
-                    role_region_data = region_data[region_data['Mapped_Role'] == role]
-
-                if not role_region_data.empty:
-                    dashboard_data['Regions'][region]['roles'][role] = {
-                        'count': len(role_region_data),
-                        'avg_availability': round(role_region_data['Current Availability'].mean(), 1),
-                        'buckets': {}
-                    }
-
-                    # Calculate bucket statistics for this role in this region
-                    for bucket in all_buckets:
-                        bucket_data = role_region_data[role_region_data['Bucket'] == bucket]
-                        if not bucket_data.empty:
-                            dashboard_data['Regions'][region]['roles'][role]['buckets'][bucket] = {
-                                'count': len(bucket_data),
-                                'avg_availability': round(bucket_data['Current Availability'].mean(), 1),
-                                'associates': bucket_data[['Associate ID', 'Associate Name', 'Current Availability', 'Mapped_Role']].to_dict('records')
-                            }
-                        else:
-                            dashboard_data['Regions'][region]['roles'][role]['buckets'][bucket] = {
-                                'count': 0,
-                                'avg_availability': 0,
-                                'associates': []
-                            }
-                else:
-                    dashboard_data['Regions'][region]['roles'][role] = {
-                        'count': 0,
-                        'avg_availability': 0,
-                        'buckets': {bucket: {'count': 0, 'avg_availability': 0, 'associates': []} for bucket in all_buckets}
-                    }
-        else:
-            dashboard_data['Regions'][region] = {
-                'count': 0,
-                'avg_availability': 0,
-                'roles': {role: {
-                    'count': 0,
-                    'avg_availability': 0,
-                    'buckets': {bucket: {'count': 0, 'avg_availability': 0, 'associates': []} for bucket in all_buckets}
-                } for role in all_roles}
-            }
-
-    # Generate HTML
-    html = """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>PMS Resource Visualization</title>
-        <style>
-            * { margin: 0; padding: 0; box-sizing: border-box; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; }
-            body { background-color: #f0f2f5; color: #333; }
-            .container { max-width: 1200px; margin: 0 auto; padding: 20px; }
-            .header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 20px; background-color: #fff; padding: 15px 20px; border-radius: 8px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); }
-            .header-title { font-size: 20px; font-weight: 600; color: #333; }
-            .total-box { display: flex; align-items: center; background-color: #e9ecef; border-radius: 6px; padding: 10px 15px; }
-            .total-label { font-size: 14px; font-weight: 500; color: #555; }
-            .total-value { font-size: 16px; font-weight: 600; color: #333; margin-left: 10px; }
-            .tab-container { display: flex; border-bottom: 2px solid #e0e0e0; margin-bottom: 20px; }
-            .tab { padding: 10px 20px; font-size: 15px; font-weight: 500; cursor: pointer; transition: all 0.2s; }
-            .tab.active, .tab:hover { border-bottom: 2px solid #007bff; color: #007bff; }
-            .tab-content { display: none; }
-            .tab-content.active { display: block; }
-            .role-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 20px; }
-            .role-card { background-color: #fff; border-radius: 8px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); padding: 15px; cursor: pointer; transition: all 0.2s; }
-            .role-card.active { border: 2px solid #007bff; }
-            .role-card.no-data { background-color: #f8f9fa; cursor: not-allowed; }
-            .role-close { font-size: 12px; font-weight: 500; color: #aaa; cursor: pointer; }
-            .role-name { font-size: 16px; font-weight: 500; margin-bottom: 5px; }
-            .role-stats { display: flex; justify-content: space-between; }
-            .stat-label { font-size: 12px; color: #777; }
-            .stat-number, .stat-percentage { font-size: 18px; font-weight: 600; color: #333; }
-            .bucket-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 20px; margin-top: 20px; }
-            .bucket-card { background-color: #fff; border-radius: 8px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); padding: 15px; cursor: pointer; transition: all 0.2s; }
-            .bucket-card.bucket-76-100 { background-color: #ea4335; color: white; }
-            .bucket-card.bucket-51-75 { background-color: #fbbc05; color: white; }
-            .bucket-card.bucket-26-50 { background-color: #34a853; color: white; }
-            .bucket-card.bucket-0-25 { background-color: #808080; color: white; }
-            .bucket-name { font-size: 16px; font-weight: 500; margin-bottom: 5px; }
-            .bucket-count, .bucket-avg { font-size: 14px; font-weight: 500; color: #fff; }
-            .bucket-label { font-size: 12px; color: #ddd; }
-            .no-data { text-align: center; color: #888; font-style: italic; margin: 20px 0; }
-            .associates-modal { display: none; position: fixed; top: 50%; left: 50%; transform: translate(-50%, -50%); width: 80%; max-width: 1000px; background-color: #fff; border-radius: 8px; box-shadow: 0 5px 15px rgba(0,0,0,0.3); z-index: 1000; }
-            .modal-header { display: flex; justify-content: space-between; align-items: center; padding: 15px 20px; border-bottom: 1px solid #e0e0e0; background-color: #f8f9fa; }
-            .modal-title { font-size: 18px; font-weight: 600; color: #333; }
-            .modal-subtitle { font-size: 14px; color: #777; margin-top: 5px; }
-            .modal-close { font-size: 20px; font-weight: 500; cursor: pointer; }
-            .modal-content { max-height: 70vh; overflow-y: auto; padding: 20px; }
-            .associates-table { width: 100%; border-collapse: collapse; margin-top: 15px; }
-            .associates-table th { background-color: #f1f3f4; color: #5f6368; text-align: left; padding: 12px 15px; font-weight: 500; border-bottom: 1px solid #e0e0e0; }
-            .associates-table td { padding: 10px 15px; border-bottom: 1px solid #f0f0f0; }
-            .associates-table tr:last-child td { border-bottom: none; }
-            .associates-table tr:nth-child(even) { background-color: #f9f9f9; }
-            .associates-table tr:hover { background-color: #f0f0f0; }
-            .avail-indicator { display: inline-block; width: 12px; height: 12px; border-radius: 50%; margin-right: 5px; }
-            .avail-76-100 { background-color: #ea4335; }
-            .avail-51-75 { background-color: #fbbc05; }
-            .avail-26-50 { background-color: #34a853; }
-            .avail-0-25 { background-color: #808080; }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <div class="header-title">PMS Resource Dashboard</div>
-                <div class="total-box">
-                    <div class="total-label">Total:</div>
-                    <div class="total-value">""" + f"{total_associates} Associates, {total_avg_availability}% Avg Availability" + """</div>
-                </div>
-            </div>
-            <div class="tab-container">
-                <div class="tab active" data-tab="overall">Overall</div>
-                """ + ''.join([f'<div class="tab" data-tab="{region}">{region}</div>' for region in all_regions]) + """
-            </div>
-            <div id="overall-content" class="tab-content active">
-                <div class="role-grid">
-                    """ + ''.join([f"""
-                    <div class="role-card {'no-data' if dashboard_data['Roles'][role]['count'] == 0 else ''}" data-role="{role}" onclick="showRoleBuckets('overall', '{role}')">
-                        <div class="role-name">{role}</div>
-                        <div class="role-stats">
-                            <div>
-                                <div class="stat-number">{dashboard_data['Roles'][role]['count']}</div>
-                                <div class="stat-label">Associates</div>
-                            </div>
-                            <div>
-                                <div class="stat-percentage">{dashboard_data['Roles'][role]['avg_availability']}%</div>
-                                <div class="stat-label">Avg Availability</div>
-                            </div>
-                        </div>
-                    </div>
-                    """ for role in all_roles]) + """
-                </div>
-                <div id="bucket-container-overall"></div>
-            </div>
-            """ + ''.join([f"""
-            <div id="{region}-content" class="tab-content">
-                <div class="role-grid">
-                    """ + ''.join([f"""
-                    <div class="role-card {'no-data' if dashboard_data['Regions'][region]['roles'][role]['count'] == 0 else ''}" data-role="{role}" onclick="showRoleBuckets('{region}', '{role}')">
-                        <div class="role-name">{role}</div>
-                        <div class="role-stats">
-                            <div>
-                                <div class="stat-number">{dashboard_data['Regions'][region]['roles'][role]['count']}</div>
-                                <div class="stat-label">Associates</div>
-                            </div>
-                            <div>
-                                <div class="stat-percentage">{dashboard_data['Regions'][region]['roles'][role]['avg_availability']}%</div>
-                                <div class="stat-label">Avg Availability</div>
-                            </div>
-                        </div>
-                    </div>
-                    """ for role in all_roles]) + """
-                </div>
-                <div id="bucket-container-""" + region + """"></div>
-            </div>
-            """ for region in all_regions]) + """
-            <div id="associatesModal" class="associates-modal">
-                <div class="modal-header">
-                    <div class="modal-title" id="modalTitle"></div>
-                    <div class="modal-subtitle" id="modalSubtitle"></div>
-                    <div class="modal-close" onclick="closeModal()">&times;</div>
-                </div>
-                <div class="modal-content" id="modalBody"></div>
-            </div>
-        </div>
-        <script>
-            // Store the dashboard data
-            const dashboardData = """ + json.dumps(dashboard_data) + """;
-
-            // Tab switching functionality
-            document.querySelectorAll('.tab').forEach(tab => {
-                tab.addEventListener('click', function() {
-                    document.querySelectorAll('.tab').forEach(t => t.classList.remove('active'));
-                    this.classList.add('active');
-                    document.querySelectorAll('.tab-content').forEach(content => {
-                        content.classList.remove('active');
-                        content.style.display = 'none';
-                    });
-                    const tabName = this.getAttribute('data-tab');
-                    const contentElement = document.getElementById(tabName + '-content');
-                    contentElement.classList.add('active');
-                    contentElement.style.display = 'block';
-                    document.getElementById('bucket-container-' + tabName).innerHTML = '';
-                });
-            });
-
-            // Role card click to show buckets
-            function showRoleBuckets(region, role) {
-                document.querySelectorAll('.role-card').forEach(card => card.classList.remove('active'));
-                const roleCards = document.querySelectorAll(`#${region}-content .role-card[data-role="${role}"]`);
-                roleCards.forEach(card => card.classList.add('active'));
-
-                let roleData;
-                if (region === 'overall') {
-                    roleData = dashboardData.Roles[role];
-                } else {
-                    roleData = dashboardData.Regions[region]?.roles[role];
-                }
-
-                if (!roleData || roleData.count === 0) {
-                    document.getElementById(`bucket-container-${region}`).innerHTML =
-                        '<div class="no-data">No data available for this selection</div>';
-                    return;
-                }
-
-                let bucketsHTML = '<div class="bucket-grid">';
-                const bucketOrder = ['76-100%', '51-75%', '26-50%', '0-25%'];
-
-                for (const bucketName of bucketOrder) {
-                    const bucketData = roleData.buckets[bucketName];
-                    if (bucketData && bucketData.count > 0) {
-                        let bucketClass = '';
-                        if (bucketName === '76-100%') bucketClass = 'bucket-76-100';
-                        else if (bucketName === '51-75%') bucketClass = 'bucket-51-75';
-                        else if (bucketName === '26-50%') bucketClass = 'bucket-26-50';
-                        else if (bucketName === '0-25%') bucketClass = 'bucket-0-25';
-
-                        bucketsHTML += `
-                            <div class="bucket-card ${bucketClass}" onclick="showAssociates('${region}', '${role}', '${bucketName}')">
-                                <div class="bucket-name">${bucketName}</div>
-                                <div class="bucket-count">${bucketData.count}</div>
-                                <div class="bucket-label">Associates</div>
-                                <div class="bucket-avg">${bucketData.avg_availability}%</div>
-                                <div class="bucket-label">Avg Availability</div>
-                            </div>
-                        `;
-                    }
-                }
-
-                bucketsHTML += '</div>';
-                document.getElementById(`bucket-container-${region}`).innerHTML = bucketsHTML;
-            }
-
-            // Show associates in modal
-            function showAssociates(region, role, bucket) {
-                const modal = document.getElementById('associatesModal');
-                const modalTitle = document.getElementById('modalTitle');
-                const modalSubtitle = document.getElementById('modalSubtitle');
-                const modalBody = document.getElementById('modalBody');
-
-                let associates = [];
-                let bucketData;
-
-                if (region === 'overall') {
-                    bucketData = dashboardData.Roles[role]?.buckets[bucket];
-                } else {
-                    bucketData = dashboardData.Regions[region]?.roles[role]?.buckets[bucket];
-                }
-
-                associates = bucketData?.associates || [];
-
-                modalTitle.textContent = `${region === 'overall' ? 'Overall' : region} - ${role} - ${bucket}`;
-                modalSubtitle.textContent = `${associates.length} associates, ${bucketData?.avg_availability || 0}% avg availability`;
-
-                if (associates.length === 0) {
-                    modalBody.innerHTML = '<div class="no-data">No associates found</div>';
-                } else {
-                    let tableHTML = `
-                        <table class="associates-table">
-                            <thead>
-                                <tr>
-                                    <th>Associate ID</th>
-                                    <th>Associate Name</th>
-                                    <th>Availability</th>`;
-
-                    if (region === 'overall') {
-                        tableHTML += '<th>Region</th>';
-                    }
-
-                    if (role === 'Total') {
-                        tableHTML += '<th>Role</th>';
-                    }
-
-                    tableHTML += `
-                                </tr>
-                            </thead>
-                            <tbody>`;
-
-                    associates.sort((a, b) => b['Current Availability'] - a['Current Availability']);
-
-                    associates.forEach(associate => {
-                        const availability = associate['Current Availability'];
-                        let availClass = '';
-
-                        if (availability >= 76) availClass = 'avail-76-100';
-                        else if (availability >= 51) availClass = 'avail-51-75';
-                        else if (availability >= 26) availClass = 'avail-26-50';
-                        else availClass = 'avail-0-25';
-
-                        tableHTML += `
-                            <tr>
-                                <td>${associate['Associate ID'] || 'N/A'}</td>
-                                <td>${associate['Associate Name'] || 'N/A'}</td>
-                                <td>
-                                    <span class="avail-indicator ${availClass}"></span>
-                                    ${availability}%
-                                </td>`;
-
-                        if (region === 'overall') {
-                            tableHTML += `<td>${associate['Region'] || 'N/A'}</td>`;
-                        }
-
-                        if (role === 'Total') {
-                            tableHTML += `<td>${associate['Mapped_Role'] || 'N/A'}</td>`;
-                        }
-
-                        tableHTML += '</tr>';
-                    });
-
-                    tableHTML += '</tbody></table>';
-                    modalBody.innerHTML = tableHTML;
-                }
-
-                modal.style.display = 'block';
-            }
-
-            // Close modal
-            function closeModal() {
-                document.getElementById('associatesModal').style.display = 'none';
-            }
-
-            // Close modal when clicking outside
-            window.onclick = function(event) {
-                const modal = document.getElementById('associatesModal');
-                if (event.target === modal) {
-                    modal.style.display = 'none';
-                }
-            };
-
-            // Initialize
-            document.addEventListener('DOMContentLoaded', function() {
-                const overallTab = document.querySelector('.tab[data-tab="overall"]');
-                overallTab.click();
-                showRoleBuckets('overall', 'Total');
-            });
-        </script>
-    </body>
-    </html>
-    """
-
-    return html
+from pms_core import (BUCKETS, DEFAULT_HIERARCHY, SOURCE_COLUMN, approximate_summary, combine_rosters,
+                      dimension_columns, drill_down_table, find_missing_columns, prepare_dataset, read_excel_chunked,
+                      read_excel_header, read_workbooks, render)
+from pms_compare import CHANGE_TYPES, compare_snapshots
+from pms_export import EXPORT_FORMATS, export_associates, export_file_name
+from pms_jobs import RenderJob
+from pms_metrics import DATASET_CACHE, STAGE_SECONDS, UPLOAD_BYTES, UPLOAD_ROWS, UPLOADS, start_exporter
+from pms_query import ANY, AvailabilityIndex, StaffingDemand, results_frame
+from pms_store import dataset_key, open_dataset, publish_dataset
+# generate_pms_visualization is kept importable from app for existing callers
+from pms_tabbed import format_bytes, generate_pms_visualization, plan_dashboard, plan_message
+
+# Processes used to aggregate very large uploads (unset or 0 keeps it serial)
+AGGREGATION_WORKERS = int(os.environ.get('PMS_AGGREGATION_WORKERS', '0')) or None
+
+# Sidebar labels for the split-allocation policies (None reports repeated IDs as duplicates)
+SPLIT_ALLOCATION_OPTIONS = {
+    'Merge: primary row': 'primary',
+    'Merge: sum availability': 'sum',
+    'Merge: max availability': 'max',
+    'Report as duplicates': None,
+}
+
+# Dashboard detail options -> renderer
+DASHBOARD_MODES = {
+    'Full (every associate)': 'tabbed',
+    'Summary (counts only)': 'summary',
+}
 
 def create_sample_data():
     """Create sample data for demonstration"""
@@ -525,6 +46,138 @@ def create_sample_data():
     }
     return pd.DataFrame(sample_data)
 
+def show_approximate_preview(area, sample, total_rows):
+    """Headline metrics estimated from the first rows of a large upload, clearly badged as approximate"""
+    summary = approximate_summary(sample, total_rows)
+    with area.container():
+        scope = f"first {summary['sample_rows']:,} of {total_rows:,} rows" if total_rows else \
+            f"first {summary['sample_rows']:,} rows"
+        st.badge(f"Approximate preview · {scope}", icon="⏳", color="orange")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("≈ Associates Available", f"{summary['total_count']:,}")
+        with col2:
+            st.metric("≈ Avg Availability", f"{summary['avg_availability']:.1f}%")
+        st.caption("Bucket share per region (%)")
+        st.dataframe(summary['bucket_shares'], use_container_width=True)
+
+def read_upload(data, preview_area=None):
+    """
+    Parse an uploaded workbook, driving a progress bar while the rows are read.
+
+    Each progress update is also a point where Streamlit stops this run if the
+    user uploads a different file, so an abandoned upload is not read to the end.
+    With a preview_area, large uploads get an approximate preview from their
+    first rows while the rest is still being read.
+    """
+    progress_bar = st.progress(0.0, text="Reading workbook...")
+
+    def report(rows_read, total_rows):
+        if total_rows:
+            progress_bar.progress(min(rows_read / total_rows, 1.0),
+                                  text=f"Reading workbook... {rows_read:,} of {total_rows:,} rows")
+        else:
+            progress_bar.progress(0.0, text=f"Reading workbook... {rows_read:,} rows")
+
+    def preview(sample, total_rows):
+        show_approximate_preview(preview_area, sample, total_rows)
+
+    df = read_excel_chunked(BytesIO(data), progress=report, preview=preview if preview_area is not None else None)
+    progress_bar.empty()
+    return df
+
+def read_uploads(contents):
+    """Parse several uploaded workbooks concurrently, with a progress bar counting finished files"""
+    progress_bar = st.progress(0.0, text=f"Reading {len(contents)} workbooks in parallel...")
+
+    def report(files_read, total_files):
+        progress_bar.progress(files_read / total_files,
+                              text=f"Reading workbooks... {files_read} of {total_files} done")
+
+    frames = read_workbooks(contents, progress=report)
+    progress_bar.empty()
+    return frames
+
+def prepare_upload(contents, names, consolidate, count_lookup=False):
+    """
+    Prepared dataset of one or more uploaded workbooks.
+
+    The upload is reused if another worker or session already published it
+    to the shared dataset store; otherwise the header rows are checked before
+    any workbook is parsed, and the result is published. Several workbooks
+    (e.g. one per regional lead) are read concurrently and combined into one
+    roster, see pms_core.combine_rosters.
+
+    Args:
+        contents: Raw bytes of each uploaded workbook
+        names: File name of each workbook
+        consolidate: Split-allocation policy, or None
+        count_lookup: Count the store lookup as a hit or miss in pms_metrics;
+            only the first run of the app script for an upload should
+
+    Returns:
+        Tuple (prepared, missing_columns); prepared is None when required columns are missing
+    """
+    if len(contents) == 1:
+        store_key = dataset_key(contents[0], consolidate=consolidate)
+    else:
+        digests = b''.join(hashlib.sha256(data).digest() for data in contents)
+        store_key = dataset_key(digests, files=list(names), consolidate=consolidate)
+    prepared = open_dataset(store_key)
+    if count_lookup:
+        DATASET_CACHE.inc(result='miss' if prepared is None else 'hit')
+    if prepared is not None:
+        return prepared, []
+
+    missing_columns = []
+    for data, name in zip(contents, names):
+        missing = find_missing_columns(read_excel_header(BytesIO(data)))
+        missing_columns += missing if len(contents) == 1 else [f"{column} ({name})" for column in missing]
+    if missing_columns:
+        return None, missing_columns
+
+    # Validate rows in bulk, then parse and clean the valid ones once; the
+    # approximate preview stays up until the full dataset replaces it
+    preview_area = st.empty()
+    start = time.perf_counter()
+    if len(contents) == 1:
+        df = read_upload(contents[0], preview_area=preview_area)
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage='parse')
+        prepared = prepare_dataset(dataframe=df, consolidate=consolidate, workers=AGGREGATION_WORKERS)
+    else:
+        # Associates listed by several files count once, unless split allocations are merged
+        df, dropped = combine_rosters(read_uploads(contents), names, dedupe=consolidate is None)
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage='parse')
+        prepared = prepare_dataset(dataframe=df, consolidate=consolidate, workers=AGGREGATION_WORKERS)
+        prepared = replace(prepared, source_rows=prepared.source_rows + dropped, dropped_rows=dropped)
+    publish_dataset(store_key, prepared)
+    preview_area.empty()
+
+    # Keep the memory-mapped copy so this session shares it too (unless another
+    # process evicted it in the meantime)
+    return open_dataset(store_key) or prepared, []
+
+def cancel_dashboard_job(state_key='pms_job'):
+    """Cancel and forget this session's dashboard (or, by state key, org tree) job, if any"""
+    if state_key in st.session_state:
+        st.session_state.pop(state_key)[1].cancel()
+
+@st.fragment(run_every=0.5)
+def show_job_progress(job, state_key='pms_job'):
+    """Poll a running render job; rerun the page once it has finished"""
+    if job.finished:
+        st.rerun()
+    if job.cancel_requested:
+        st.progress(job.progress, text="Cancelling after the current step...")
+        return
+    text = f"🔄 {job.stage_label}... {job.progress:.0%}"
+    if len(job.views) > 1:
+        text += f" (step {min(job.completed + 1, len(job.views))} of {len(job.views)})"
+    st.progress(job.progress, text=text)
+    if st.button("✖️ Cancel", key=f"{state_key}_cancel"):
+        job.cancel()
+        st.rerun(scope="fragment")
+
 def main():
     st.set_page_config(
         page_title="PMS Resource Analytics",
@@ -532,6 +185,9 @@ def main():
         layout="wide"
     )
 
+    # Serve or write the service metrics if PMS_METRICS_PORT / PMS_METRICS_FILE are set
+    start_exporter()
+
     # Custom CSS for better styling
     st.markdown("""
     <style>
@@ -577,66 +233,341 @@ def main():
         help="Select how you want to provide the data"
     )
 
-    uploaded_file = None
+    uploaded_files = []
     df = None
 
     if data_source == "Upload Excel File":
-        uploaded_file = st.sidebar.file_uploader(
-            "Choose an Excel file",
+        uploaded_files = st.sidebar.file_uploader(
+            "Choose Excel files",
             type=['xlsx', 'xls'],
-            help="Upload your PMS data file with required columns"
+            accept_multiple_files=True,
+            help="Upload your PMS data file with required columns, or one file per region to combine them"
         )
     else:
         if st.sidebar.button("🎯 Generate Sample Data", type="primary"):
             df = create_sample_data()
             st.sidebar.success("✅ Sample data generated!")
 
+    # How to count associates that appear on several allocation rows
+    split_allocations = st.sidebar.selectbox(
+        "Split allocations:",
+        list(SPLIT_ALLOCATION_OPTIONS),
+        help="Associates split across projects appear on several rows. Merge them into one "
+             "associate, or report the repeated rows as duplicates."
+    )
+
+    # Render jobs belong to one upload; a new upload (or none) supersedes them
+    if uploaded_files:
+        source_id = (tuple(f.file_id for f in uploaded_files), split_allocations)
+    else:
+        source_id = ('sample', split_allocations) if df is not None else None
+    for state_key in ('pms_job', 'pms_tree_job'):
+        if st.session_state.get(state_key, (source_id,))[0] != source_id:
+            cancel_dashboard_job(state_key)
+    # Upload metrics are recorded once per upload, not on every rerun of the script
+    new_source = source_id is not None and st.session_state.get('pms_metrics_source') != source_id
+
     # Main content area
-    if uploaded_file is not None or df is not None:
+    if uploaded_files or df is not None:
         try:
-            # Read the Excel file if uploaded
-            if uploaded_file is not None:
-                df = pd.read_excel(uploaded_file, engine='openpyxl')
-                st.success("✅ File uploaded successfully!")
+            consolidate = SPLIT_ALLOCATION_OPTIONS[split_allocations]
 
-            # Data validation
-            required_columns = ['Current Role', 'Region', 'Associate ID', 'Associate Name', 'Current Availability']
-            missing_columns = [col for col in required_columns if col not in df.columns]
+            if uploaded_files:
+                prepared, missing_columns = prepare_upload(
+                    [f.getvalue() for f in uploaded_files], [f.name for f in uploaded_files], consolidate,
+                    count_lookup=new_source
+                )
+            else:
+                prepared, missing_columns = None, find_missing_columns(df)
 
+            # Data validation
             if missing_columns:
                 st.error(f"❌ Missing required columns: {', '.join(missing_columns)}")
                 st.info("Please ensure your Excel file contains all required columns.")
                 return
 
+            if len(uploaded_files) > 1:
+                st.success(f"✅ {len(uploaded_files)} files uploaded and combined!")
+            elif uploaded_files:
+                st.success("✅ File uploaded successfully!")
+            else:
+                # Validate rows in bulk, then parse and clean the valid ones once
+                prepared = prepare_dataset(dataframe=df, consolidate=consolidate, workers=AGGREGATION_WORKERS)
+
+            if new_source:
+                UPLOADS.inc()
+                UPLOAD_ROWS.observe(prepared.source_rows)
+                if uploaded_files:
+                    UPLOAD_BYTES.observe(sum(f.size for f in uploaded_files))
+                st.session_state['pms_metrics_source'] = source_id
+
+            if not prepared.errors.empty:
+                skipped_rows = len(prepared.errors.drop_duplicates(
+                    [column for column in (SOURCE_COLUMN, 'Row') if column in prepared.errors.columns]
+                ))
+                st.warning(f"⚠️ {skipped_rows} rows failed validation and were skipped.")
+                with st.expander("Click to view validation errors"):
+                    st.dataframe(prepared.errors, use_container_width=True, hide_index=True)
+                    st.download_button(
+                        "⬇️ Download Validation Errors",
+                        prepared.errors.to_csv(index=False),
+                        file_name="pms_validation_errors.csv",
+                        mime="text/csv"
+                    )
+
             # Display data preview
             st.subheader("📋 Data Preview")
             with st.expander("Click to view data preview", expanded=True):
-                st.dataframe(df.head(10), use_container_width=True)
+                st.dataframe(prepared.frame.head(10), use_container_width=True)
 
             # Show data statistics
             col1, col2, col3, col4 = st.columns(4)
             with col1:
-                st.metric("📊 Total Records", len(df))
+                st.metric("📊 Total Records", prepared.source_rows)
             with col2:
-                st.metric("👥 Unique Roles", df['Current Role'].nunique())
+                st.metric("👥 Unique Roles", len(prepared.raw_roles))
             with col3:
-                st.metric("🌍 Regions", df['Region'].nunique())
+                st.metric("🌍 Regions", len(prepared.regions))
             with col4:
-                if 'Current Availability' in df.columns:
-                    avg_availability = df['Current Availability'].apply(
-                        lambda x: float(str(x).replace('%', '')) if pd.notnull(x) else 0
-                    ).mean()
-                    st.metric("📈 Avg Availability", f"{avg_availability:.1f}%")
+                st.metric("📈 Avg Availability", f"{prepared.total_avg_availability:.1f}%")
+
+            if prepared.merged_rows:
+                st.info(f"🔗 {prepared.merged_rows} split-allocation rows were merged into "
+                        f"their associate ({split_allocations.lower()}).")
+            if prepared.dropped_rows:
+                st.info(f"🧹 {prepared.dropped_rows} rows were dropped because an earlier file "
+                        f"already listed the same Associate ID.")
 
             # Generate visualization
             col1, col2, col3 = st.columns([1, 2, 1])
             with col2:
+                # Summary pages carry counts (and a few top associates) only, so they
+                # stay small for any headcount; the org tree file has the full drill-down
+                dashboard_mode = st.radio("Dashboard detail", list(DASHBOARD_MODES), horizontal=True)
+                top_n = 0
+                if DASHBOARD_MODES[dashboard_mode] == 'summary':
+                    top_n = st.number_input("Top associates per cell", min_value=0, max_value=50, value=5)
+
                 if st.button("🎯 Generate Interactive Dashboard", type="primary", use_container_width=True):
-                    with st.spinner("🔄 Generating interactive visualization..."):
-                        # Generate the HTML visualization
-                        html_content = generate_pms_visualization(dataframe=df)
+                    # Render in the background; a session runs at most one dashboard job,
+                    # so a new request replaces the old one
+                    cancel_dashboard_job()
+                    # Pages over the byte budget break the embedded view, so degrade them up front
+                    plan = plan_dashboard(prepared, None if DASHBOARD_MODES[dashboard_mode] == 'tabbed' else int(top_n))
+                    job = RenderJob(prepared, (plan.view,), options={'summary': {'top_n': plan.top_n}})
+                    st.session_state['pms_job'] = (source_id, job.start(), plan)
+
+                # The org tree page embeds every associate (megabytes for a large roster),
+                # so it is only rendered, and kept in the session, once it is asked for
+                tree_job = st.session_state.get('pms_tree_job', (None, None))[1]
+                if tree_job is None or tree_job.status in ('cancelled', 'failed'):
+                    if tree_job is not None and tree_job.status == 'failed':
+                        st.error(f"❌ Error: {tree_job.error}")
+                    if st.button("🌳 Prepare Org Tree View" if DASHBOARD_MODES[dashboard_mode] == 'tabbed' else
+                                 "🌳 Prepare Full Drill-down (Org Tree View)", use_container_width=True):
+                        tree_job = RenderJob(prepared, ('tree',)).start()
+                        st.session_state['pms_tree_job'] = (source_id, tree_job)
+                if tree_job is not None and not tree_job.finished:
+                    show_job_progress(tree_job, 'pms_tree_job')
+                elif tree_job is not None and tree_job.status == 'done':
+                    st.download_button(
+                        "🌳 Download Org Tree View",
+                        tree_job.results['tree'],
+                        file_name="pms_org_tree.html",
+                        mime="text/html",
+                        use_container_width=True
+                    )
+
+            if 'pms_job' in st.session_state:
+                _, job, plan = st.session_state['pms_job']
+                message = plan_message(plan)
+                if message:
+                    st.warning(f"⚠️ {message}")
+                if not job.finished:
+                    show_job_progress(job)
+                elif job.status == 'done':
+                    page = job.results[job.views[0]]
+                    st.caption(f"Dashboard page: {format_bytes(len(page.encode('utf-8')))} "
+                               f"(estimated {format_bytes(plan.estimated_bytes)}, budget {format_bytes(plan.budget)})")
+                    if plan.embed:
                         # Render the HTML in Streamlit
-                        st.components.v1.html(html_content, height=800, scrolling=True)
+                        st.components.v1.html(page, height=800, scrolling=True)
+                    else:
+                        st.download_button(
+                            "⬇️ Download Dashboard (counts only)",
+                            page,
+                            file_name="pms_dashboard.html",
+                            mime="text/html"
+                        )
+                elif job.status == 'failed':
+                    st.error(f"❌ Error: {job.error}")
+                else:
+                    st.info("Dashboard generation was cancelled.")
+
+            # Export the associates behind any bucket card, or the whole breakdown
+            with st.expander("📤 Export Associates"):
+                exp_col1, exp_col2, exp_col3, exp_col4 = st.columns(4)
+                with exp_col1:
+                    export_region = st.selectbox("Region", ['All Regions'] + list(prepared.regions))
+                with exp_col2:
+                    export_role = st.selectbox("Role", list(prepared.roles))
+                with exp_col3:
+                    export_bucket = st.selectbox("Bucket", ['All Buckets'] + BUCKETS)
+                with exp_col4:
+                    export_fmt = st.radio("Format", EXPORT_FORMATS, horizontal=True)
+
+                export_region = None if export_region == 'All Regions' else export_region
+                export_bucket = None if export_bucket == 'All Buckets' else export_bucket
+
+                if st.button("📦 Prepare Export File"):
+                    buffer = BytesIO()
+                    count = export_associates(prepared, buffer, fmt=export_fmt, region=export_region,
+                                              role=export_role, bucket=export_bucket)
+                    st.session_state['pms_export'] = (
+                        export_file_name(export_region, export_role, export_bucket, export_fmt),
+                        buffer.getvalue(),
+                        count
+                    )
+
+                if 'pms_export' in st.session_state:
+                    file_name, data, count = st.session_state['pms_export']
+                    st.download_button(
+                        f"⬇️ Download {file_name} ({count} associates)",
+                        data,
+                        file_name=file_name,
+                        mime="text/csv" if file_name.endswith('.csv') else
+                        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    )
+
+            # Drill-down over any columns of the file, in the order they are picked
+            with st.expander("🧭 Custom Drill-down"):
+                dimensions = st.multiselect(
+                    "Drill-down levels (in order)",
+                    dimension_columns(prepared.frame),
+                    default=DEFAULT_HIERARCHY,
+                    help="Pick columns such as Practice, Location or Grade; only non-empty combinations are listed."
+                )
+                if dimensions:
+                    # Computed once per dataset and level order, not on every rerun of the page
+                    drill_key = (source_id, tuple(dimensions))
+                    if st.session_state.get('pms_drilldown', (None,))[0] != drill_key:
+                        table = drill_down_table(prepared.frame, dimensions).drop(columns='sum').reset_index()
+                        st.session_state['pms_drilldown'] = (drill_key, table, None)
+                    _, table, drill_json = st.session_state['pms_drilldown']
+                    st.dataframe(table, use_container_width=True, hide_index=True)
+
+                    if drill_json is None and st.button("📦 Prepare Drill-down JSON"):
+                        drill_json = render(prepared, 'drilldown', dimensions=dimensions, indent=2)
+                        st.session_state['pms_drilldown'] = (drill_key, table, drill_json)
+                    if drill_json is not None:
+                        st.download_button(
+                            "⬇️ Download Drill-down JSON",
+                            drill_json,
+                            file_name="pms_drilldown.json",
+                            mime="application/json"
+                        )
+
+            # "12 PMs in APAC with at least 60% availability", several requests at once
+            with st.expander("🎯 Staffing Requests"):
+                if st.session_state.get('pms_query_index', (None,))[0] != source_id:
+                    st.session_state['pms_query_index'] = (source_id, AvailabilityIndex(prepared))
+                    st.session_state.pop('pms_staffing', None)
+                index = st.session_state['pms_query_index'][1]
+
+                with st.form("pms_staffing_form"):
+                    requests = st.data_editor(
+                        pd.DataFrame({
+                            'Role': [index.roles[0] if index.roles else ANY],
+                            'Region': [ANY],
+                            'Min Availability %': [60],
+                            'Count': [10],
+                        }),
+                        num_rows="dynamic",
+                        hide_index=True,
+                        use_container_width=True,
+                        column_config={
+                            'Role': st.column_config.SelectboxColumn(options=[ANY] + list(index.roles)),
+                            'Region': st.column_config.SelectboxColumn(options=[ANY] + list(index.regions)),
+                            'Min Availability %': st.column_config.NumberColumn(min_value=0, max_value=100, step=1),
+                            'Count': st.column_config.NumberColumn(min_value=1, step=1),
+                        }
+                    )
+                    st.caption("Requests are filled top to bottom; nobody is proposed for two requests.")
+                    find_candidates = st.form_submit_button("🔎 Find Candidates")
+
+                if find_candidates:
+                    demands = [
+                        StaffingDemand(
+                            None if pd.isnull(role) or role == ANY else role,
+                            None if pd.isnull(region) or region == ANY else region,
+                            0 if pd.isnull(min_availability) else float(min_availability),
+                            1 if pd.isnull(count) else int(count)
+                        )
+                        for role, region, min_availability, count in requests.itertuples(index=False)
+                    ]
+                    st.session_state['pms_staffing'] = index.fill(demands)
+
+                if 'pms_staffing' in st.session_state:
+                    results = st.session_state['pms_staffing']
+                    st.dataframe(pd.DataFrame({
+                        'Request': [result.demand.label for result in results],
+                        'Found': [len(result.candidates) for result in results],
+                        'Eligible': [result.eligible for result in results],
+                        'Short': [max(result.shortfall, 0) for result in results],
+                    }), use_container_width=True, hide_index=True)
+                    candidates = results_frame(results)
+                    st.dataframe(candidates, use_container_width=True, hide_index=True)
+                    st.download_button(
+                        f"⬇️ Download Candidates ({len(candidates)} associates)",
+                        candidates.to_csv(index=False),
+                        file_name="pms_staffing_candidates.csv",
+                        mime="text/csv"
+                    )
+
+            # Who moved between an earlier upload and this one
+            with st.expander("🔁 Compare with Baseline Snapshot"):
+                baseline_file = st.file_uploader(
+                    "Baseline Excel file (e.g. last week's roster)",
+                    type=['xlsx'],
+                    key="pms_baseline"
+                )
+                if baseline_file is not None:
+                    # Compared once per pair of datasets, not on every rerun of the page
+                    compare_key = (source_id, baseline_file.file_id)
+                    if st.session_state.get('pms_comparison', (None,))[0] != compare_key:
+                        baseline, baseline_missing = prepare_upload(
+                            [baseline_file.getvalue()], [baseline_file.name], consolidate
+                        )
+                        comparison = None if baseline_missing else compare_snapshots(baseline, prepared)
+                        st.session_state['pms_comparison'] = (compare_key, comparison, baseline_missing)
+                    _, comparison, baseline_missing = st.session_state['pms_comparison']
+                    if baseline_missing:
+                        st.error(f"❌ Baseline is missing required columns: {', '.join(baseline_missing)}")
+                    else:
+                        summary = comparison.summary()
+                        for column, change in zip(st.columns(len(CHANGE_TYPES)), CHANGE_TYPES):
+                            column.metric(f"{change} Associates", summary[change])
+
+                        st.markdown("**Cells that changed**")
+                        cells = comparison.cells
+                        cells = cells[(cells['count delta'] != 0) | (cells['avg delta'] != 0)]
+                        st.dataframe(cells.reset_index(), use_container_width=True, hide_index=True)
+
+                        change_filter = st.selectbox(
+                            "Associates",
+                            ['All changes'] + [f"Moved into {bucket}" for bucket in BUCKETS]
+                        )
+                        if change_filter == 'All changes':
+                            changes = comparison.changes
+                        else:
+                            changes = comparison.moved_into(change_filter.replace('Moved into ', ''))
+                        st.dataframe(changes, use_container_width=True, hide_index=True)
+                        st.download_button(
+                            f"⬇️ Download Changes ({len(changes)} associates)",
+                            changes.to_csv(index=False),
+                            file_name="pms_snapshot_changes.csv",
+                            mime="text/csv"
+                        )
         except Exception as e:
             st.error(f"❌ Error: {str(e)}")
 
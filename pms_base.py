@@ -0,0 +1,124 @@
+"""
+Lightweight definitions shared by the PMS modules.
+
+Everything here is standard library only, so the command line can parse its
+arguments, print --help and render a saved tree snapshot without importing
+pandas or openpyxl. pms_core re-exports these names.
+"""
+import importlib
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from pms_metrics import OUTPUT_BYTES, RENDER_FAILURES, RENDER_SECONDS, output_size
+
+# Availability buckets in display order
+BUCKETS = ['76-100%', '51-75%', '26-50%', '0-25%']
+
+# Ways to combine the rows of an associate split across several allocations
+CONSOLIDATION_POLICIES = ['sum', 'max', 'primary']
+
+# Renderer registry: name -> callable(prepared, **options) returning the rendered output
+_RENDERERS = {}
+
+# Modules that register the built-in renderers when imported
+_RENDERER_MODULES = {
+    'json': 'pms_core',
+    'drilldown': 'pms_core',
+    'summary': 'pms_tabbed',
+    'tabbed': 'pms_tabbed',
+    'tree': 'pms_visualization',
+}
+
+
+def register_renderer(name):
+    """Decorator registering a renderer under the given view name"""
+    def decorator(func):
+        _RENDERERS[name] = func
+        return func
+    return decorator
+
+
+def get_renderer(name):
+    """Look up a renderer, importing the module that provides a built-in one if needed"""
+    if name not in _RENDERERS and name in _RENDERER_MODULES:
+        importlib.import_module(_RENDERER_MODULES[name])
+    if name not in _RENDERERS:
+        raise ValueError(f"Unknown renderer: {name}")
+    return _RENDERERS[name]
+
+
+class RenderCancelled(Exception):
+    """Raised by checkpoint() inside a renderer whose job has been cancelled"""
+
+
+# Cancellation event and progress callback of the job rendering on the current thread
+_job_state = threading.local()
+
+
+@contextmanager
+def cancel_on(event, progress=None):
+    """
+    Make checkpoint() raise RenderCancelled in renderers run in this block once event is set.
+
+    Args:
+        event: threading.Event signalling cancellation
+        progress: Optional callable(fraction) receiving the progress reported
+            by checkpoint(done, total) within the current render
+    """
+    previous = getattr(_job_state, 'cancelled', None), getattr(_job_state, 'progress', None)
+    _job_state.cancelled, _job_state.progress = event, progress
+    try:
+        yield
+    finally:
+        _job_state.cancelled, _job_state.progress = previous
+
+
+def checkpoint(done=None, total=None):
+    """
+    Cancellation point for long renderers; a no-op outside cancel_on.
+
+    Args:
+        done: Steps of the current render finished so far
+        total: Number of steps of the current render
+    """
+    event = getattr(_job_state, 'cancelled', None)
+    if event is not None and event.is_set():
+        raise RenderCancelled()
+    progress = getattr(_job_state, 'progress', None)
+    if progress is not None and done is not None and total:
+        progress(min(done / total, 1.0))
+
+
+def _dump_script_json(data):
+    """Serialize data for embedding inside a <script> block (no '<' can end or nest a tag)"""
+    return json.dumps(data, separators=(',', ':')).replace('<', '\\u003c')
+
+
+def render(prepared, *views, **options):
+    """
+    Render one or more views from the same prepared dataset.
+
+    The time and output size of every view are recorded in pms_metrics.
+
+    Returns:
+        The rendered output for a single view, or a dict of view name -> output
+    """
+    outputs = {}
+    for view in views:
+        renderer = get_renderer(view)
+        start = time.perf_counter()
+        try:
+            outputs[view] = renderer(prepared, **options)
+        except RenderCancelled:
+            raise
+        except Exception:
+            RENDER_FAILURES.inc(view=view)
+            raise
+        RENDER_SECONDS.observe(time.perf_counter() - start, view=view)
+        if isinstance(outputs[view], (str, bytes)):
+            OUTPUT_BYTES.observe(output_size(outputs[view]), view=view)
+    if len(views) == 1:
+        return outputs[views[0]]
+    return outputs
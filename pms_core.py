@@ -0,0 +1,909 @@
+"""
+Shared analytics core for the PMS dashboards.
+
+Roster data is loaded, cleaned and aggregated once into a PreparedDataset.
+The views (tabbed dashboard, org tree, JSON) are renderers registered by name
+that only read from the prepared dataset, so producing several views from one
+upload costs a single parse.
+"""
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+from pandas.api.types import union_categoricals
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+
+# The renderer registry and the constants the command line needs live in the
+# stdlib-only pms_base module; they are re-exported here
+from pms_base import (BUCKETS, CONSOLIDATION_POLICIES, _RENDERERS, RenderCancelled, _dump_script_json, cancel_on,
+                      checkpoint, get_renderer, register_renderer, render)
+from pms_metrics import STAGE_SECONDS
+
+# Columns every roster file must provide
+REQUIRED_COLUMNS = ['Current Role', 'Region', 'Associate ID', 'Associate Name', 'Current Availability']
+
+# Lower bound of each availability bucket (BUCKETS order)
+BUCKET_LOWER_BOUNDS = [76, 51, 26, 0]
+
+# Standard roles are always shown first, in this order
+STANDARD_ROLES = ['PGM', 'PM', 'SCRUM', 'TPDL']
+
+# Columns of the validation error report
+ERROR_COLUMNS = ['Row', 'Associate ID', 'Column', 'Reason', 'Value']
+
+# Column naming the workbook each row of a combined upload came from
+SOURCE_COLUMN = 'Source File'
+
+# Spreadsheet row of each combined row within its own file
+SOURCE_ROW_COLUMN = 'Source Row'
+
+# Group keys of the aggregate cell table
+CELL_KEYS = ['Region', 'Mapped_Role', 'Current Role', 'Bucket']
+
+# Default drill-down hierarchy, as on the tabbed dashboard
+DEFAULT_HIERARCHY = ['Region', 'Mapped_Role', 'Bucket']
+
+# Frame columns that describe an associate rather than group them
+NON_DIMENSION_COLUMNS = ['Associate ID', 'Associate Name', 'Current Availability']
+
+# Below this many rows the serial groupby is faster than starting a process pool
+# (about 30ms) and merging the shards' partial tables
+PARALLEL_MIN_ROWS = 500000
+
+# Start method of worker processes; never 'fork', since the Streamlit server
+# calling into this module is multithreaded
+START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Rows read from a workbook between progress reports
+EXCEL_CHUNK_ROWS = 5000
+
+# Rows of a large workbook used for the approximate preview
+PREVIEW_ROWS = 5000
+
+# Equal-width availability bins of the per-cell histograms: (0, 10], (10, 20], ..., (90, 100]
+HISTOGRAM_BINS = 10
+
+# Availability percentiles reported per cell, as (column, fraction)
+DISTRIBUTION_QUANTILES = [('p10', 0.1), ('median', 0.5), ('p90', 0.9)]
+
+
+@dataclass(frozen=True)
+class PreparedDataset:
+    """
+    Cleaned roster rows plus their aggregate, shared read-only by all renderers.
+
+    Attributes:
+        frame: One row per associate with availability > 0, sorted by
+            availability (descending) then name. Columns are the required
+            columns, 'Mapped_Role' and 'Bucket', then any other columns of
+            the source file (usable as drill-down dimensions).
+        cells: Count and availability sum per (Region, Mapped_Role,
+            Current Role, Bucket) cell, indexed by CELL_KEYS.
+        regions: Sorted region names.
+        roles: Mapped roles in display order, starting with 'Total'.
+        raw_roles: Sorted 'Current Role' values as they appear in the file.
+        errors: Validation report for the rows that were skipped (see
+            validate_dataframe).
+        merged_rows: Number of allocation rows folded into another row of
+            the same associate (see consolidate_allocations).
+        source_rows: Number of rows read from the source file(s).
+        dropped_rows: Number of rows of a combined upload dropped because
+            an earlier file already listed the associate (see combine_rosters).
+    """
+    frame: pd.DataFrame
+    cells: pd.DataFrame
+    regions: tuple
+    roles: tuple
+    raw_roles: tuple
+    errors: pd.DataFrame
+    merged_rows: int = 0
+    source_rows: int = 0
+    dropped_rows: int = 0
+
+    @property
+    def empty(self):
+        return self.frame.empty
+
+    @property
+    def total_count(self):
+        return len(self.frame)
+
+    @property
+    def total_avg_availability(self):
+        if self.frame.empty:
+            return 0
+        return round(self.frame['Current Availability'].mean(), 1)
+
+
+def load_dataframe(file_path=None, dataframe=None):
+    """
+    Load the roster either from an Excel file or from a pre-loaded DataFrame.
+
+    Args:
+        file_path: Path to the Excel file (optional if dataframe is provided)
+        dataframe: Pre-loaded pandas DataFrame (optional if file_path is provided)
+
+    Returns:
+        DataFrame with whitespace stripped from the column names
+    """
+    if dataframe is not None:
+        df = dataframe.copy(deep=False)
+    elif file_path is not None:
+        df = pd.read_excel(file_path, engine='openpyxl')
+    else:
+        raise ValueError("Either file_path or dataframe must be provided")
+
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def _open_workbook(source):
+    return load_workbook(source, read_only=True, data_only=True, keep_links=False)
+
+
+def read_excel_header(source):
+    """
+    Column names of the first sheet, read without parsing the rest of the workbook.
+
+    Args:
+        source: Path or binary file object of an .xlsx file
+
+    Returns:
+        List of stripped column names (empty header cells are left out)
+    """
+    workbook = _open_workbook(source)
+    try:
+        header = next(workbook.worksheets[0].iter_rows(max_row=1, values_only=True), ())
+    finally:
+        workbook.close()
+    return [str(value).strip() for value in header if value is not None]
+
+
+def _cell_value(cell):
+    """Cell value converted the way pd.read_excel converts it"""
+    if cell.value is None:
+        return ''
+    if cell.data_type == TYPE_ERROR:
+        return np.nan
+    if cell.data_type == TYPE_NUMERIC:
+        value = int(cell.value)
+        return value if value == cell.value else float(cell.value)
+    return cell.value
+
+
+def _rows_to_frame(data):
+    """Type raw sheet rows (header first) the way pd.read_excel does"""
+    width = max((len(values) for values in data), default=0)
+    data = [values + [''] * (width - len(values)) for values in data]
+    try:
+        return TextParser(data, header=0, skip_blank_lines=False).read()
+    except EmptyDataError:
+        return pd.DataFrame()
+
+
+def read_excel_chunked(source, progress=None, chunk_rows=EXCEL_CHUNK_ROWS, preview=None,
+                       preview_rows=PREVIEW_ROWS):
+    """
+    Read the first sheet of a workbook row by row, reporting progress.
+
+    Rows are streamed with openpyxl's read-only iter_rows and typed by the
+    same parser pd.read_excel uses, so the result is identical to
+    pd.read_excel(source, engine='openpyxl').
+
+    Args:
+        source: Path or binary file object of an .xlsx file
+        progress: Optional callable(rows_read, total_rows) called every
+            chunk_rows rows. total_rows is the row count declared by the
+            workbook, or None when it does not declare one.
+        chunk_rows: Rows read between progress reports
+        preview: Optional callable(sample, total_rows) called once, as soon as
+            the first preview_rows data rows are read, with those rows as a
+            DataFrame. Not called for sheets with fewer rows.
+        preview_rows: Data rows passed to preview
+
+    Returns:
+        DataFrame of the sheet
+    """
+    workbook = _open_workbook(source)
+    try:
+        sheet = workbook.worksheets[0]
+        total_rows = sheet.max_row
+        # Declared dimensions can be wrong, so read every row that is present
+        sheet.reset_dimensions()
+
+        data = []
+        last_row_with_data = -1
+        for row_number, row in enumerate(sheet.iter_rows()):
+            values = [_cell_value(cell) for cell in row]
+            while values and values[-1] == '':
+                values.pop()
+            if values:
+                last_row_with_data = row_number
+            data.append(values)
+            if progress is not None and (row_number + 1) % chunk_rows == 0:
+                progress(row_number + 1, total_rows)
+            if preview is not None and row_number == preview_rows:
+                preview(_rows_to_frame(data), total_rows - 1 if total_rows else None)
+    finally:
+        workbook.close()
+
+    # Drop trailing empty rows and pad short rows, as pd.read_excel does
+    data = data[:last_row_with_data + 1]
+    if progress is not None:
+        progress(len(data), len(data))
+    return _rows_to_frame(data)
+
+
+def _read_workbook_bytes(data):
+    return read_excel_chunked(BytesIO(data))
+
+
+def read_workbooks(contents, workers=None, progress=None):
+    """
+    Read several workbooks concurrently, one process per workbook.
+
+    Parsing is CPU-bound Python, so processes rather than threads let the
+    total time approach that of the slowest single file.
+
+    Args:
+        contents: List of raw .xlsx bytes
+        workers: Maximum number of processes (defaults to one per workbook,
+            capped at the CPU count)
+        progress: Optional callable(files_read, total_files) called as each
+            workbook finishes
+
+    Returns:
+        List of DataFrames in the order of contents
+    """
+    workers = min(workers or os.cpu_count() or 1, len(contents))
+    frames = [None] * len(contents)
+    if workers <= 1:
+        for i, data in enumerate(contents):
+            frames[i] = _read_workbook_bytes(data)
+            if progress is not None:
+                progress(i + 1, len(contents))
+        return frames
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(START_METHOD)) as pool:
+        futures = {pool.submit(_read_workbook_bytes, data): i for i, data in enumerate(contents)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            frames[futures[future]] = future.result()
+            if progress is not None:
+                progress(done, len(contents))
+    return frames
+
+
+def combine_rosters(frames, names, dedupe=True):
+    """
+    Stack the rosters of several workbooks into one, tagged with SOURCE_COLUMN
+    and SOURCE_ROW_COLUMN.
+
+    Region and role columns are turned into categoricals over the union of
+    all files' values before stacking, so the combined columns share one set
+    of codes instead of falling back to object arrays. They stay categorical
+    through validate_dataframe; clean_dataframe turns them back into the
+    plain text columns every prepared frame has, reading each distinct value
+    once.
+
+    Args:
+        frames: Raw roster DataFrames (as read from each workbook)
+        names: File name of each frame
+        dedupe: Drop rows whose Associate ID already appeared in an earlier
+            file. Repeats within one file are left to validate_dataframe.
+            Turn off when split allocations are consolidated afterwards.
+
+    Returns:
+        Tuple (combined DataFrame, number of rows dropped as cross-file duplicates)
+    """
+    frames = [load_dataframe(dataframe=frame) for frame in frames]
+    for column in ('Region', 'Current Role'):
+        present = [frame for frame in frames if column in frame.columns]
+        categories = union_categoricals(
+            [pd.Categorical(_text_column(frame[column])) for frame in present], sort_categories=True
+        ).categories
+        for frame in present:
+            frame[column] = pd.Categorical(_text_column(frame[column]), categories=categories)
+
+    combined = pd.concat(
+        [frame.assign(**{SOURCE_COLUMN: name, SOURCE_ROW_COLUMN: np.arange(len(frame)) + 2})
+         for frame, name in zip(frames, names)],
+        ignore_index=True
+    )
+    if not dedupe or 'Associate ID' not in combined.columns:
+        return combined, 0
+
+    ids = _text_column(combined['Associate ID'])
+    file_index = np.repeat(np.arange(len(frames)), [len(frame) for frame in frames])
+    first_file = pd.Series(file_index).groupby(ids.to_numpy()).transform('min').to_numpy()
+    repeated = (file_index > first_file) & (ids != '').to_numpy()
+    return combined[~repeated].reset_index(drop=True), int(repeated.sum())
+
+
+def parse_availability(series, errors='raise'):
+    """
+    Convert availability values such as '85%', 85 or 85.5 to whole percentages (null -> 0).
+
+    Args:
+        series: Raw 'Current Availability' column
+        errors: 'raise' to fail on unparsable values, 'coerce' to return the
+            unrounded float values with NaN for missing or unparsable ones
+
+    Returns:
+        int64 array, or float array when errors='coerce'
+    """
+    if not pd.api.types.is_numeric_dtype(series):
+        series = pd.to_numeric(
+            series.astype(str).str.replace('%', '', regex=False).str.strip().where(series.notna()),
+            errors=errors
+        )
+    if errors == 'coerce':
+        return series.to_numpy(dtype=float)
+    return np.trunc(series.fillna(0).to_numpy(dtype=float)).astype(np.int64)
+
+
+def map_role_name(role):
+    """Map a free-text role onto one of the standard roles where possible"""
+    role_str = str(role).upper().strip()
+    if 'SCRUM' in role_str:
+        return 'SCRUM'
+    elif 'TPDL' in role_str:
+        return 'TPDL'
+    elif 'PGM' in role_str:
+        return 'PGM'
+    elif 'PM' in role_str:
+        return 'PM'
+    else:
+        return str(role).strip()
+
+
+def assign_buckets(availability):
+    """Return the availability bucket for each value as an ordered categorical"""
+    availability = np.asarray(availability)
+    codes = np.select(
+        [availability >= bound for bound in BUCKET_LOWER_BOUNDS[:-1]],
+        list(range(len(BUCKETS) - 1)),
+        default=len(BUCKETS) - 1
+    )
+    return pd.Categorical.from_codes(codes, categories=BUCKETS, ordered=True)
+
+
+def order_roles(mapped_roles):
+    """Put 'Total' and the standard roles first, followed by any other role in sorted order"""
+    mapped_roles = sorted(mapped_roles)
+    ordered = ['Total'] + [role for role in STANDARD_ROLES if role in mapped_roles]
+    ordered += [role for role in mapped_roles if role not in STANDARD_ROLES]
+    return tuple(ordered)
+
+
+def _text_column(series):
+    """Stripped string values, with missing values as empty strings"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # Strip each category once, then look the rows up by code (-1, missing, picks the appended '')
+        labels = _text_column(pd.Series(series.cat.categories)).to_numpy()
+        labels = np.append(labels, '').astype(object)
+        return pd.Series(labels[series.cat.codes.to_numpy()], index=series.index, name=series.name, dtype=str)
+    return series.astype(str).str.strip().where(series.notna(), '')
+
+
+def find_missing_columns(df):
+    """Required columns that are not present in the DataFrame (or list of column names)"""
+    columns = df.columns if isinstance(df, pd.DataFrame) else df
+    return [col for col in REQUIRED_COLUMNS if col not in columns]
+
+
+def validate_dataframe(df, check_duplicates=True):
+    """
+    Check every row in bulk and split the roster into valid rows and an error report.
+
+    Rows are rejected for a missing Associate ID, an unparsable or out of range
+    (outside 0-100) availability, or an Associate ID already used by an earlier
+    valid row. Missing availability is not an error; it counts as 0%.
+
+    Args:
+        df: Raw roster DataFrame as returned by load_dataframe
+        check_duplicates: Reject repeated Associate IDs. Turn off when the
+            rows are consolidated afterwards (see consolidate_allocations).
+
+    Returns:
+        Tuple (valid_df, errors) where errors has one row per problem with the
+        columns in ERROR_COLUMNS. 'Row' is the spreadsheet row number (the
+        header is row 1); for combined uploads (see combine_rosters) it is
+        counted within the file named in the leading SOURCE_COLUMN.
+    """
+    missing_columns = find_missing_columns(df)
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+
+    ids = _text_column(df['Associate ID']).to_numpy()
+    availability = parse_availability(df['Current Availability'], errors='coerce')
+
+    null_id = ids == ''
+    unparsable = df['Current Availability'].notna().to_numpy() & np.isnan(availability)
+    with np.errstate(invalid='ignore'):
+        out_of_range = (availability < 0) | (availability > 100)
+    invalid = null_id | unparsable | out_of_range
+
+    # Duplicates are only counted among rows that are otherwise valid
+    duplicate = np.zeros(len(df), dtype=bool)
+    if check_duplicates:
+        duplicate[~invalid] = pd.Series(ids[~invalid]).duplicated(keep='first').to_numpy()
+    invalid |= duplicate
+
+    checks = [
+        (null_id, 'Associate ID', 'Missing Associate ID'),
+        (unparsable, 'Current Availability', 'Unparsable availability'),
+        (out_of_range, 'Current Availability', 'Availability outside 0-100'),
+        (duplicate, 'Associate ID', 'Duplicate Associate ID'),
+    ]
+    row_numbers = np.arange(len(df)) + 2
+    columns = ERROR_COLUMNS
+    if SOURCE_COLUMN in df.columns:
+        # Rows of a combined upload are numbered within their own file
+        sources = df[SOURCE_COLUMN].to_numpy()
+        row_numbers = df[SOURCE_ROW_COLUMN].to_numpy()
+        columns = [SOURCE_COLUMN] + ERROR_COLUMNS
+
+    reports = []
+    for mask, column, reason in checks:
+        positions = np.flatnonzero(mask)
+        if len(positions):
+            report = pd.DataFrame({
+                'Row': row_numbers[positions],
+                'Associate ID': ids[positions],
+                'Column': column,
+                'Reason': reason,
+                'Value': _text_column(df[column].iloc[positions]).to_numpy(),
+                '_position': positions,
+            })
+            if SOURCE_COLUMN in df.columns:
+                report[SOURCE_COLUMN] = sources[positions]
+            reports.append(report)
+
+    if reports:
+        errors = pd.concat(reports, ignore_index=True).sort_values('_position', kind='stable', ignore_index=True)
+        errors = errors[columns]
+    else:
+        errors = pd.DataFrame({col: [] for col in columns})
+    return df[~invalid], errors
+
+
+def consolidate_allocations(df, policy):
+    """
+    Collapse the allocation rows of each associate into a single row.
+
+    Rows are grouped by Associate ID with a hashed factorization, so the cost
+    stays linear in the number of rows.
+
+    Args:
+        df: Roster DataFrame that passed validate_dataframe
+        policy: How to combine the rows of one associate:
+            'sum' - first row's details, availability summed (capped at 100)
+            'max' - the row with the highest availability
+            'primary' - the first row as listed in the file
+
+    Returns:
+        DataFrame with one row per Associate ID, in file order
+    """
+    if policy not in CONSOLIDATION_POLICIES:
+        raise ValueError(f"Unknown consolidation policy: {policy}")
+
+    codes, uniques = pd.factorize(_text_column(df['Associate ID']), sort=False)
+    if len(uniques) == len(df):
+        return df
+
+    # Factorized codes follow first appearance, so these are the primary rows
+    first_rows = np.flatnonzero(~pd.Series(codes).duplicated().to_numpy())
+
+    if policy == 'primary':
+        return df.iloc[first_rows]
+
+    availability = np.nan_to_num(parse_availability(df['Current Availability'], errors='coerce'))
+    if policy == 'max':
+        best_rows = pd.Series(availability).groupby(codes, sort=False).idxmax().to_numpy()
+        return df.iloc[np.sort(best_rows)]
+
+    totals = np.bincount(codes, weights=availability, minlength=len(uniques))
+    df = df.iloc[first_rows].copy()
+    df['Current Availability'] = np.minimum(totals[codes[first_rows]], 100)
+    return df
+
+
+def clean_dataframe(df):
+    """
+    Parse availability, drop associates with 0% availability, derive
+    'Mapped_Role' and 'Bucket' columns and sort by availability then name.
+
+    Args:
+        df: Roster DataFrame that passed validate_dataframe
+
+    Returns:
+        New DataFrame with the required columns, the derived ones, then the
+        remaining source columns (mixed-type columns converted to text)
+    """
+    missing_columns = find_missing_columns(df)
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+
+    availability = parse_availability(df['Current Availability'])
+    keep = availability > 0
+    df = df.loc[keep]
+
+    frame = pd.DataFrame({
+        'Associate ID': _text_column(df['Associate ID']),
+        'Associate Name': _text_column(df['Associate Name']),
+        'Current Availability': availability[keep],
+        'Current Role': _text_column(df['Current Role']),
+        'Region': _text_column(df['Region']),
+    })
+
+    # Map each distinct role once instead of once per row
+    role_map = {role: map_role_name(role) for role in frame['Current Role'].unique()}
+    frame['Mapped_Role'] = frame['Current Role'].map(role_map)
+    frame['Bucket'] = assign_buckets(frame['Current Availability'].to_numpy())
+
+    # Keep the other source columns (Practice, Location, Grade, ...) for custom drill-downs
+    for column in df.columns:
+        if column not in frame.columns and column != SOURCE_ROW_COLUMN:
+            frame[column] = _text_column(df[column]) if df[column].dtype == object else df[column]
+
+    # Sort once so every group slice, tree table and modal list is already ordered
+    frame = frame.sort_values(
+        ['Current Availability', 'Associate Name'], ascending=[False, True], kind='stable'
+    )
+    return frame.reset_index(drop=True)
+
+
+def aggregate_cells(frame, workers=None):
+    """
+    Count and availability sum for every non-empty (Region, Mapped_Role, Current Role, Bucket) cell.
+
+    With workers > 1, frames of at least PARALLEL_MIN_ROWS rows are aggregated
+    across a process pool (see pms_parallel); the result is the same.
+    """
+    if workers and workers > 1 and len(frame) >= PARALLEL_MIN_ROWS:
+        # Imported here because pms_parallel builds on this module
+        from pms_parallel import parallel_aggregate
+        return parallel_aggregate(frame, workers=workers)
+    return frame.groupby(CELL_KEYS, observed=True, sort=True)['Current Availability'].agg(['count', 'sum'])
+
+
+def prepare_dataset(file_path=None, dataframe=None, consolidate=None, workers=None):
+    """
+    Load, validate, clean and aggregate roster data once for all renderers.
+
+    Args:
+        file_path: Path to the Excel file (optional if dataframe is provided)
+        dataframe: Pre-loaded pandas DataFrame (optional if file_path is provided)
+        consolidate: Optional policy from CONSOLIDATION_POLICIES that merges the
+            rows of associates split across several allocations. Without it,
+            repeated Associate IDs are reported as validation errors.
+        workers: Number of processes for the aggregation of large rosters
+
+    The time of each stage is recorded in pms_metrics.STAGE_SECONDS.
+
+    Returns:
+        PreparedDataset
+    """
+    # Reading a workbook is the parse stage; a DataFrame given by the caller was parsed there
+    start = time.perf_counter()
+    df = load_dataframe(file_path=file_path, dataframe=dataframe)
+    if file_path is not None:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage='parse')
+
+    with STAGE_SECONDS.time(stage='clean'):
+        valid, errors = validate_dataframe(df, check_duplicates=consolidate is None)
+
+        merged_rows = 0
+        if consolidate is not None:
+            consolidated = consolidate_allocations(valid, consolidate)
+            merged_rows = len(valid) - len(consolidated)
+            valid = consolidated
+
+        frame = clean_dataframe(valid)
+
+    with STAGE_SECONDS.time(stage='aggregate'):
+        cells = aggregate_cells(frame, workers=workers)
+        regions = tuple(sorted(frame['Region'].unique()))
+        roles = order_roles(frame['Mapped_Role'].unique())
+        raw_roles = tuple(sorted(frame['Current Role'].unique()))
+
+    return PreparedDataset(
+        frame=frame,
+        cells=cells,
+        regions=regions,
+        roles=roles,
+        raw_roles=raw_roles,
+        errors=errors,
+        merged_rows=merged_rows,
+        source_rows=len(df),
+    )
+
+
+def rollup(cells, keys):
+    """
+    Sum the cell table up to the given keys.
+
+    Args:
+        cells: Cell table from PreparedDataset.cells
+        keys: Subset of CELL_KEYS to keep (an empty list gives the grand total)
+
+    Returns:
+        DataFrame with 'count', 'sum' and 'avg_availability' columns indexed by keys
+    """
+    if keys:
+        totals = cells.groupby(level=keys, observed=True, sort=True).sum()
+    else:
+        totals = cells.sum().to_frame().T
+    totals['avg_availability'] = (totals['sum'] / totals['count']).round(1)
+    return totals
+
+
+def distribution_stats(frame, keys):
+    """
+    Availability percentiles and histogram for every non-empty group of rows.
+
+    Args:
+        frame: PreparedDataset.frame (availability in whole percentages)
+        keys: Columns to group by (an empty list gives the whole frame)
+
+    Returns:
+        DataFrame indexed by keys with 'p10', 'median' and 'p90' (numpy's
+        linear interpolation, rounded to one decimal) and 'histogram' (list
+        of HISTOGRAM_BINS counts, lowest availability first)
+    """
+    return distribution_levels(frame, [keys])[0]
+
+
+def distribution_levels(frame, levels):
+    """
+    distribution_stats for several grouping levels at once.
+
+    Availability is a whole percentage, so each group's distribution is fully
+    described by how many rows it has at every value 0-100. Those counts are
+    one bincount over the groups of all the levels' keys together; coarser
+    levels add up the rows of that small table, and percentiles are read off
+    its running totals. The frame is grouped once however many levels are
+    asked for.
+
+    Args:
+        frame: PreparedDataset.frame (availability in whole percentages)
+        levels: List of key lists, each a subset of the keys of the longest
+
+    Returns:
+        List of DataFrames as returned by distribution_stats, one per level
+    """
+    keys = max(levels, key=len)
+    availability = frame['Current Availability'].to_numpy()
+    if len(availability) and (availability.min() < 0 or availability.max() > 100
+                              or not np.array_equal(availability, np.round(availability))):
+        raise ValueError("Availability must be whole percentages between 0 and 100")
+    availability = availability.astype(np.int64)
+
+    if keys:
+        grouped = frame.groupby(keys, observed=True, sort=True)
+        codes = grouped.ngroup().to_numpy()
+        index = grouped.size().index
+    else:
+        codes = np.zeros(len(frame), dtype=np.int64)
+        index = pd.RangeIndex(1 if len(frame) else 0)
+    value_counts = np.bincount(codes * 101 + availability, minlength=len(index) * 101).reshape(len(index), 101)
+
+    results = []
+    for level in levels:
+        if list(level) == list(keys):
+            results.append(_distribution_table(value_counts, index))
+        elif not level:
+            results.append(_distribution_table(value_counts.sum(axis=0, keepdims=True)[:len(index)],
+                                               pd.RangeIndex(min(len(index), 1))))
+        else:
+            summed = pd.DataFrame(value_counts, index=index).groupby(level=list(level), sort=True).sum()
+            results.append(_distribution_table(summed.to_numpy(), summed.index))
+    return results
+
+
+def _distribution_table(value_counts, index):
+    """Percentiles and histograms of groups given their row counts at each availability 0-100"""
+    totals = value_counts.cumsum(axis=1)
+    counts = totals[:, -1]
+    stats = pd.DataFrame(index=index)
+    for column, q in DISTRIBUTION_QUANTILES:
+        # Position q * (count - 1) in ascending order, interpolated like np.percentile;
+        # the value at a position is the number of values whose running total does not pass it
+        rank = q * (counts - 1)
+        lower = np.floor(rank)
+        upper = np.ceil(rank)
+        low_values = (totals <= lower[:, None]).sum(axis=1)
+        high_values = (totals <= upper[:, None]).sum(axis=1)
+        stats[column] = (low_values + (high_values - low_values) * (rank - lower)).round(1)
+
+    # Bin i holds (10i, 10(i + 1)], with 0% in the lowest bin
+    edges = np.r_[0, np.arange(1, HISTOGRAM_BINS) * (100 // HISTOGRAM_BINS) + 1]
+    stats['histogram'] = np.add.reduceat(value_counts, edges, axis=1).tolist() if len(value_counts) else []
+    return stats
+
+
+def group_positions(frame, keys):
+    """
+    Row positions of every non-empty group, like DataFrame.groupby(keys).indices.
+
+    The groups are split out of one stable sort of the group codes instead of
+    boxing every key value, which matters once there are thousands of groups.
+
+    Args:
+        frame: DataFrame to group
+        keys: Column name or list of column names
+
+    Returns:
+        Dict mapping each key (a tuple for several columns) to the ascending
+        positions of its rows
+    """
+    grouped = frame.groupby(keys, observed=True, sort=False)
+    codes = grouped.ngroup().to_numpy()
+    counts = np.bincount(codes)
+    order = np.argsort(codes.astype(np.int16) if len(counts) <= np.iinfo(np.int16).max else codes, kind='stable')
+    return dict(zip(grouped.size().index.tolist(), np.split(order, np.cumsum(counts)[:-1])))
+
+
+def dimension_columns(frame):
+    """Columns of a prepared frame that can be used as drill-down levels"""
+    return [column for column in frame.columns if column not in NON_DIMENSION_COLUMNS]
+
+
+def _group_dimensions(frame, dimensions):
+    """Group the rows by the dimension columns (text values, missing ones as empty strings)"""
+    unknown = [column for column in dimensions if column not in dimension_columns(frame)]
+    if not dimensions or unknown:
+        raise ValueError(f"Unknown drill-down dimensions: {', '.join(map(str, unknown)) or 'none given'}")
+    if len(set(dimensions)) != len(dimensions):
+        raise ValueError("Drill-down dimensions must not repeat")
+
+    keys = pd.DataFrame({
+        column: frame[column] if column == 'Bucket' else _text_column(frame[column])
+        for column in dimensions
+    })
+    keys['Current Availability'] = frame['Current Availability']
+    return keys.groupby(dimensions, observed=True, sort=True)
+
+
+def drill_down_table(frame, dimensions, grouped=None):
+    """
+    Count and average availability for every non-empty combination of the dimensions.
+
+    Args:
+        frame: PreparedDataset.frame
+        dimensions: Ordered list of dimension columns, e.g. ['Practice', 'Region', 'Bucket']
+
+    Returns:
+        DataFrame with 'count', 'sum' and 'avg_availability' columns indexed by the dimensions
+    """
+    if grouped is None:
+        grouped = _group_dimensions(frame, list(dimensions))
+    table = grouped['Current Availability'].agg(['count', 'sum'])
+    table['avg_availability'] = (table['sum'] / table['count']).round(1)
+    return table
+
+
+def drill_down(frame, dimensions, associates=False):
+    """
+    Nested aggregate over a caller-chosen hierarchy of dimension columns.
+
+    The rows are grouped once, at the deepest level, and only non-empty
+    combinations are produced; the upper levels are summed from that leaf
+    table, so a deeper hierarchy adds a grouping key rather than another
+    pass over the roster.
+
+    Args:
+        frame: PreparedDataset.frame
+        dimensions: Ordered list of dimension columns (see dimension_columns)
+        associates: Attach [id, name, availability] rows, in frame order, to
+            the deepest level
+
+    Returns:
+        Dict {'count', 'avg_availability', 'children': {value: node}} where
+        the deepest nodes have no 'children' (but 'associates' if requested)
+    """
+    dimensions = list(dimensions)
+    grouped = _group_dimensions(frame, dimensions)
+    table = drill_down_table(frame, dimensions, grouped=grouped)
+
+    root = {'count': 0, 'sum': 0}
+    leaves = []
+    for key, count, total in zip(table.index, table['count'].tolist(), table['sum'].tolist()):
+        node = root
+        node['count'] += count
+        node['sum'] += total
+        for value in (key if len(dimensions) > 1 else (key,)):
+            node = node.setdefault('children', {}).setdefault(value, {'count': 0, 'sum': 0})
+            node['count'] += count
+            node['sum'] += total
+        leaves.append((key, node))
+
+    if associates:
+        indices = grouped.indices
+        records = list(zip(frame['Associate ID'].tolist(), frame['Associate Name'].tolist(),
+                           frame['Current Availability'].tolist()))
+        for key, node in leaves:
+            node['associates'] = [list(records[i]) for i in indices[key]]
+
+    def finish(node):
+        total = node.pop('sum')
+        nested = {key: node.pop(key) for key in ('children', 'associates') if key in node}
+        node['avg_availability'] = float(np.round(total / node['count'], 1)) if node['count'] else 0
+        if 'children' in nested:
+            node['children'] = {value: finish(child) for value, child in nested['children'].items()}
+        if 'associates' in nested:
+            node['associates'] = nested['associates']
+        return node
+
+    return finish(root)
+
+
+def approximate_summary(sample, total_rows=None):
+    """
+    Headline metrics estimated from a sample of raw roster rows.
+
+    Args:
+        sample: Raw rows as read from the file (e.g. the first rows of a large upload)
+        total_rows: Data rows in the whole file, used to scale the associate count
+
+    Returns:
+        Dict with 'sample_rows', 'total_count' (estimated associates with
+        availability > 0), 'avg_availability' and 'bucket_shares' (percentage
+        of each region's associates per bucket, regions x BUCKETS)
+    """
+    valid, _ = validate_dataframe(load_dataframe(dataframe=sample))
+    frame = clean_dataframe(valid)
+    scale = total_rows / len(sample) if total_rows and len(sample) else 1
+
+    shares = pd.crosstab(frame['Region'], frame['Bucket'], normalize='index')
+    shares = (shares.reindex(columns=BUCKETS, fill_value=0) * 100).round(1)
+    shares.columns = list(BUCKETS)
+    return {
+        'sample_rows': len(sample),
+        'total_count': int(round(len(frame) * scale)),
+        'avg_availability': round(frame['Current Availability'].mean(), 1) if len(frame) else 0,
+        'bucket_shares': shares,
+    }
+
+
+@register_renderer('json')
+def render_json(prepared, indent=None):
+    """Render the aggregate (no associate records) as JSON"""
+    cells = rollup(prepared.cells, ['Region', 'Mapped_Role', 'Bucket'])
+    data = {
+        'total': {
+            'count': prepared.total_count,
+            'avg_availability': prepared.total_avg_availability
+        },
+        'regions': list(prepared.regions),
+        'roles': list(prepared.roles),
+        'buckets': BUCKETS,
+        'cells': [
+            {
+                'region': region,
+                'role': role,
+                'bucket': bucket,
+                'count': int(row['count']),
+                'avg_availability': float(row['avg_availability'])
+            }
+            for (region, role, bucket), row in cells.iterrows()
+        ]
+    }
+    return json.dumps(data, indent=indent)
+
+
+@register_renderer('drilldown')
+def render_drilldown(prepared, dimensions=None, associates=False, indent=None):
+    """Render the nested aggregate over the given hierarchy (default DEFAULT_HIERARCHY) as JSON"""
+    dimensions = list(dimensions or DEFAULT_HIERARCHY)
+    data = {'dimensions': dimensions, **drill_down(prepared.frame, dimensions, associates=associates)}
+    return json.dumps(data, indent=indent, separators=None if indent else (',', ':'))
@@ -0,0 +1,209 @@
+"""
+Export the associates behind a dashboard cell, or the whole
+Region x Role x Bucket breakdown, to CSV or XLSX.
+
+The output is written in chunks, so the CSV text or sheet XML of the whole
+selection is never held in memory at once. The selected rows themselves are
+materialized first (select_cell returns a sorted copy), and the app buffers
+the finished file in memory to offer it as a download.
+"""
+import os
+import zipfile
+from io import BytesIO
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook
+
+from pms_core import BUCKETS
+
+# Columns written for each associate, in order
+EXPORT_COLUMNS = ['Region', 'Mapped_Role', 'Bucket', 'Associate ID', 'Associate Name',
+                  'Current Availability', 'Current Role']
+
+# Header labels matching EXPORT_COLUMNS
+EXPORT_HEADERS = ['Region', 'Role', 'Bucket', 'Associate ID', 'Associate Name',
+                  'Current Availability', 'Current Role']
+
+EXPORT_FORMATS = ['csv', 'xlsx']
+
+# Frame columns of the per-associate assignment stream, and their NDJSON field names
+# (role as written in the file, mapped_role as grouped on the tabbed dashboard)
+ASSIGNMENT_COLUMNS = ['Associate ID', 'Associate Name', 'Current Availability', 'Current Role', 'Mapped_Role',
+                      'Region', 'Bucket']
+ASSIGNMENT_FIELDS = ['id', 'name', 'availability', 'role', 'mapped_role', 'region', 'bucket']
+
+# Rows converted per chunk
+CHUNK_SIZE = 50000
+
+# Worksheet part inside the XLSX package
+SHEET_PART = 'xl/worksheets/sheet1.xml'
+
+# Control characters that are not allowed in XML text
+ILLEGAL_XML_CHARS = r'[\x00-\x08\x0b\x0c\x0e-\x1f]'
+
+
+def select_cell(prepared, region=None, role=None, bucket=None):
+    """
+    Associates of one dashboard cell, already ordered by availability then name.
+
+    Args:
+        prepared: PreparedDataset from pms_core.prepare_dataset
+        region: Region name, or None for all regions
+        role: Mapped role as shown on the role cards, or None/'Total' for all roles
+        bucket: Availability bucket such as '76-100%', or None for all buckets
+
+    Returns:
+        DataFrame with EXPORT_COLUMNS. Without any filter the rows are grouped
+        by Region, Role and Bucket (the whole breakdown).
+    """
+    if bucket is not None and bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket: {bucket}")
+
+    frame = prepared.frame
+    mask = None
+    for column, value in (('Region', region), ('Mapped_Role', role), ('Bucket', bucket)):
+        if value is None or (column == 'Mapped_Role' and value == 'Total'):
+            continue
+        column_mask = (frame[column] == value).to_numpy()
+        mask = column_mask if mask is None else mask & column_mask
+
+    selected = frame if mask is None else frame[mask]
+
+    # Stable sort keeps the availability/name order inside each cell
+    selected = selected.sort_values(['Region', 'Mapped_Role', 'Bucket'], kind='stable')
+    return selected[EXPORT_COLUMNS]
+
+
+def export_format(path):
+    """Infer the export format from a file name"""
+    extension = os.path.splitext(str(path))[1].lower().lstrip('.')
+    if extension not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {extension or path} (use .csv or .xlsx)")
+    return extension
+
+
+def write_csv(rows, output):
+    """Write rows to a path or binary file object as CSV, chunk by chunk"""
+    rows = rows.set_axis(EXPORT_HEADERS, axis=1)
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, 'wb') as f:
+            return write_csv(rows, f)
+
+    for start in range(0, max(len(rows), 1), CHUNK_SIZE):
+        chunk = rows.iloc[start:start + CHUNK_SIZE]
+        output.write(chunk.to_csv(index=False, header=(start == 0)).encode('utf-8'))
+    return len(rows)
+
+
+def _xml_text(values):
+    """Escape string values for XML text, dropping characters XML cannot hold"""
+    return (values.astype(str)
+            .str.replace(ILLEGAL_XML_CHARS, '', regex=True)
+            .str.replace('&', '&amp;', regex=False)
+            .str.replace('<', '&lt;', regex=False)
+            .str.replace('>', '&gt;', regex=False))
+
+
+def _rows_xml(frame, first_row):
+    """SpreadsheetML <row> elements for a chunk of rows, built with vectorized string ops"""
+    row_xml = '<row r="' + pd.Series(np.arange(first_row, first_row + len(frame)), index=frame.index).astype(str) + '">'
+    for column in frame.columns:
+        values = frame[column]
+        if pd.api.types.is_numeric_dtype(values):
+            row_xml = row_xml + '<c><v>' + values.astype(str) + '</v></c>'
+        else:
+            row_xml = row_xml + '<c t="inlineStr"><is><t xml:space="preserve">' + _xml_text(values) + '</t></is></c>'
+    return (row_xml + '</row>').str.cat()
+
+
+def write_xlsx(rows, output, sheet_title='Associates'):
+    """
+    Write rows to a path or binary file object as XLSX.
+
+    The package parts (workbook, styles, content types) come from an empty
+    openpyxl write-only workbook. The sheet data is streamed into the zip in
+    chunks of row XML built with vectorized string operations, so only one
+    chunk's XML exists at a time, and this is far faster than appending
+    cells one by one.
+    """
+    scaffold = BytesIO()
+    workbook = Workbook(write_only=True)
+    workbook.create_sheet(title=sheet_title)
+    workbook.save(scaffold)
+
+    header = pd.DataFrame([EXPORT_HEADERS], columns=EXPORT_COLUMNS, dtype=object)
+    with zipfile.ZipFile(scaffold) as template, \
+            zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as package:
+        for item in template.infolist():
+            if item.filename != SHEET_PART:
+                package.writestr(item.filename, template.read(item.filename))
+                continue
+
+            head, tail = template.read(SHEET_PART).decode('utf-8').split('<sheetData></sheetData>')
+            with package.open(SHEET_PART, 'w', force_zip64=True) as sheet:
+                sheet.write((head + '<sheetData>' + _rows_xml(header, 1)).encode('utf-8'))
+                for start in range(0, len(rows), CHUNK_SIZE):
+                    chunk = rows.iloc[start:start + CHUNK_SIZE]
+                    sheet.write(_rows_xml(chunk, start + 2).encode('utf-8'))
+                sheet.write(('</sheetData>' + tail).encode('utf-8'))
+
+    return len(rows)
+
+
+def export_associates(prepared, output, fmt=None, region=None, role=None, bucket=None):
+    """
+    Export one cell (or the whole breakdown when no filter is given).
+
+    Args:
+        prepared: PreparedDataset from pms_core.prepare_dataset
+        output: File path or binary file object
+        fmt: 'csv' or 'xlsx'; inferred from the file name when omitted
+        region, role, bucket: Cell filters, see select_cell
+
+    Returns:
+        Number of associates written
+    """
+    if fmt is None:
+        fmt = export_format(output)
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt} (use csv or xlsx)")
+
+    rows = select_cell(prepared, region=region, role=role, bucket=bucket)
+    if fmt == 'csv':
+        return write_csv(rows, output)
+    return write_xlsx(rows, output)
+
+
+def write_assignments(prepared, output):
+    """
+    Stream every associate's assignment as NDJSON, one JSON object per line.
+
+    Lines are produced chunk by chunk, so memory use does not grow with the
+    number of associates and the output can be piped into other tools.
+
+    Args:
+        prepared: PreparedDataset from pms_core.prepare_dataset
+        output: File path or text file object (e.g. sys.stdout)
+
+    Returns:
+        Number of associates written
+    """
+    if isinstance(output, (str, os.PathLike)):
+        with open(output, 'w', encoding='utf-8') as f:
+            return write_assignments(prepared, f)
+
+    frame = prepared.frame
+    for start in range(0, len(frame), CHUNK_SIZE):
+        chunk = frame.iloc[start:start + CHUNK_SIZE][ASSIGNMENT_COLUMNS].set_axis(ASSIGNMENT_FIELDS, axis=1)
+        output.write(chunk.to_json(orient='records', lines=True, force_ascii=False))
+    output.flush()
+    return len(frame)
+
+
+def export_file_name(region=None, role=None, bucket=None, fmt='csv'):
+    """Descriptive download name such as 'pms_EMEA_PM_76-100.csv'"""
+    parts = [part.replace('%', '') for part in (region, role, bucket) if part and part != 'Total']
+    name = '_'.join(['pms'] + (parts or ['breakdown']))
+    name = ''.join(ch if ch.isalnum() or ch in '-_' else '_' for ch in name)
+    return f"{name}.{fmt}"
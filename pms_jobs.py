@@ -0,0 +1,122 @@
+"""
+Background rendering jobs for the Streamlit app.
+
+Rendering the dashboards of a large roster takes long enough to freeze a
+session, so each view is rendered as one stage of a job on a small shared
+thread pool. The session polls the job for progress and can cancel it;
+cancellation takes effect at the next stage boundary or at the next
+checkpoint inside the renderer (the tabbed and tree renderers check between
+their steps and per region), and a job cancelled while still queued never
+starts. The same checkpoints report how far the current stage has got, so
+progress moves within a stage too.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pms_core import RenderCancelled, cancel_on, render
+
+# Jobs rendering at the same time across all sessions
+JOB_WORKERS = int(os.environ.get('PMS_JOB_WORKERS', '2'))
+
+# Progress labels of the views a job renders
+STAGE_LABELS = {
+    'tabbed': 'Building interactive dashboard',
+    'summary': 'Building summary dashboard',
+    'tree': 'Building org tree view',
+}
+
+_POOL = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='pms-job')
+
+
+class RenderJob:
+    """
+    Render several views of a prepared dataset in the background, one stage per view.
+
+    Args:
+        prepared: PreparedDataset to render
+        views: Renderer names, rendered in order
+        options: Optional view name -> keyword arguments for that renderer
+
+    Attributes:
+        status: 'queued', 'running', 'done', 'cancelled' or 'failed'
+        stage: View being rendered (None before the first stage)
+        completed: Number of views rendered so far
+        stage_progress: Fraction of the current stage done, as reported by
+            the renderer's checkpoints
+        results: View name -> rendered output, complete once status is 'done'
+        error: Exception that failed the job
+    """
+
+    def __init__(self, prepared, views=('tabbed', 'tree'), options=None):
+        self.prepared = prepared
+        self.views = tuple(views)
+        self.options = options or {}
+        self.status = 'queued'
+        self.stage = None
+        self.completed = 0
+        self.stage_progress = 0.0
+        self.results = {}
+        self.error = None
+        self._cancelled = threading.Event()
+        self._future = None
+
+    def start(self, pool=None):
+        """Queue the job on the shared pool (or the given executor)"""
+        self._future = (pool or _POOL).submit(self._run)
+        return self
+
+    def _run(self):
+        try:
+            with cancel_on(self._cancelled, progress=self._report):
+                for view in self.views:
+                    if self._cancelled.is_set():
+                        break
+                    self.status = 'running'
+                    self.stage = view
+                    self.stage_progress = 0.0
+                    self.results[view] = render(self.prepared, view, **self.options.get(view, {}))
+                    self.completed += 1
+                    self.stage_progress = 0.0
+        except RenderCancelled:
+            pass
+        except Exception as e:
+            self.error = e
+            self.status = 'failed'
+            return
+        self.status = 'cancelled' if self.completed < len(self.views) else 'done'
+
+    def _report(self, fraction):
+        self.stage_progress = fraction
+
+    def cancel(self):
+        """Stop the job at the next checkpoint or stage boundary (immediately if it has not started)"""
+        self._cancelled.set()
+        if self._future is not None and self._future.cancel():
+            self.status = 'cancelled'
+
+    def wait(self, timeout=None):
+        """Block until the job has finished"""
+        if self._future is not None and not self._future.cancelled():
+            self._future.result(timeout)
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'cancelled', 'failed')
+
+    @property
+    def cancel_requested(self):
+        return self._cancelled.is_set()
+
+    @property
+    def progress(self):
+        """Fraction of the job done: completed stages plus the reported part of the current one"""
+        if not self.views:
+            return 1.0
+        return min((self.completed + self.stage_progress) / len(self.views), 1.0)
+
+    @property
+    def stage_label(self):
+        if self.stage is None:
+            return 'Waiting for a free worker'
+        return STAGE_LABELS.get(self.stage, f'Rendering {self.stage}')
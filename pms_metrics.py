@@ -0,0 +1,344 @@
+"""
+Operational metrics of the dashboard service in the Prometheus text format.
+
+Counters and histograms are plain in-process objects: recording a value is
+a lock, a bisect and a few additions, so it can sit on every request path.
+The exposition is only built when something reads it, either from the
+local HTTP endpoint (PMS_METRICS_PORT) or from a text file rewritten in the
+background (PMS_METRICS_FILE, e.g. for node_exporter's textfile collector).
+
+Metrics are per process. When several app processes run on one host, each
+writes its own text file (the process id goes into the file name and a pid
+label into every sample), and only one of them can own a given port; the
+others log a warning and carry on without the endpoint.
+
+Standard library only, like pms_base, so any module can record metrics.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Histogram buckets (upper bounds) for durations, sizes and row counts
+SECONDS_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = tuple(16384 * 4 ** i for i in range(9))
+ROWS_BUCKETS = (100, 1000, 10000, 50000, 100000, 250000, 500000, 1000000)
+
+# Seconds between rewrites of the PMS_METRICS_FILE text file
+EXPORT_INTERVAL = float(os.environ.get('PMS_METRICS_INTERVAL', '15'))
+
+logger = logging.getLogger(__name__)
+
+
+def _escape(value):
+    """Escape a label value for the text format"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=(), const=()):
+    """Render a {name="value",...} label set (empty string when there are no labels)"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in const]
+    pairs += [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _number(value):
+    """Format a sample value the way Prometheus clients do"""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """
+    Base of the metric types: a name, help text and optional label names.
+
+    Args:
+        name: Metric name
+        help: One-line description shown in the exposition
+        labelnames: Names of the labels every sample must provide
+    """
+    kind = 'untyped'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} needs labels {', '.join(self.labelnames) or '(none)'}")
+        return tuple(labels[name] for name in self.labelnames)
+
+    def samples(self, const=()):
+        """(suffix, label text, value) tuples of the current values, with the const (name, value) labels first"""
+        raise NotImplementedError
+
+    def exposition(self, const=()):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        lines += [f'{self.name}{suffix}{labels} {_number(value)}' for suffix, labels, value in self.samples(const)]
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """A value that only goes up, per label set"""
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self, const=()):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [('', _labels(self.labelnames, key, const=const), value) for key, value in values]
+
+
+class Gauge(Metric):
+    """A value computed by a function each time the metrics are read"""
+    kind = 'gauge'
+
+    def __init__(self, name, help, function):
+        super().__init__(name, help)
+        self.function = function
+
+    def samples(self, const=()):
+        value = self.function()
+        return [] if value is None else [('', _labels((), (), const=const), value)]
+
+
+class Histogram(Metric):
+    """
+    Observations counted into cumulative buckets, with their sum and count.
+
+    Args:
+        buckets: Increasing upper bounds; +Inf is added automatically
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, help, buckets, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0]
+            series[index] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        """Context manager observing the seconds spent in its block"""
+        return _Timer(self, labels)
+
+    def count(self, **labels):
+        series = self._series.get(self._key(labels))
+        return sum(series[:-1]) if series else 0
+
+    def samples(self, const=()):
+        with self._lock:
+            series = sorted((key, list(values)) for key, values in self._series.items())
+        samples = []
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), values[:-1]):
+                cumulative += count
+                samples.append(('_bucket', _labels(self.labelnames, key, [('le', _number(bound))], const), cumulative))
+            samples.append(('_sum', _labels(self.labelnames, key, const=const), values[-1]))
+            samples.append(('_count', _labels(self.labelnames, key, const=const), cumulative))
+        return samples
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+# Every metric of the service, in exposition order
+REGISTRY = []
+
+
+def register(metric):
+    """Add a metric to the exposition and return it"""
+    REGISTRY.append(metric)
+    return metric
+
+
+def _ratio(hits, misses):
+    return hits / (hits + misses) if hits + misses else None
+
+
+# Metrics of the dashboard service
+UPLOADS = register(Counter(
+    'pms_uploads_total', "Rosters loaded into a session (uploads or sample data)"))
+UPLOAD_BYTES = register(Histogram(
+    'pms_upload_bytes', "Size of the uploaded workbooks of one roster", BYTES_BUCKETS))
+UPLOAD_ROWS = register(Histogram(
+    'pms_upload_rows', "Data rows of one roster, before validation", ROWS_BUCKETS))
+DATASET_CACHE = register(Counter(
+    'pms_dataset_cache_lookups_total', "Shared dataset store lookups for new uploads", ['result']))
+DATASET_CACHE_HIT_RATIO = register(Gauge(
+    'pms_dataset_cache_hit_ratio', "Share of upload lookups served from the shared dataset store",
+    lambda: _ratio(DATASET_CACHE.value(result='hit'), DATASET_CACHE.value(result='miss'))))
+STAGE_SECONDS = register(Histogram(
+    'pms_stage_duration_seconds', "Time spent reading (parse), validating and cleaning (clean) "
+    "and aggregating (aggregate) a roster", SECONDS_BUCKETS, ['stage']))
+RENDER_SECONDS = register(Histogram(
+    'pms_render_duration_seconds', "Time spent rendering one view", SECONDS_BUCKETS, ['view']))
+OUTPUT_BYTES = register(Histogram(
+    'pms_output_bytes', "Size of one rendered view", BYTES_BUCKETS, ['view']))
+RENDER_FAILURES = register(Counter(
+    'pms_render_failures_total', "Renders that raised an error", ['view']))
+
+
+def output_size(output):
+    """UTF-8 size of a rendered output without copying ASCII pages"""
+    if isinstance(output, bytes):
+        return len(output)
+    return len(output) if output.isascii() else len(output.encode('utf-8'))
+
+
+def exposition(const=()):
+    """All metrics in the Prometheus text format, optionally with const (name, value) labels on every sample"""
+    return '\n'.join(metric.exposition(const) for metric in REGISTRY) + '\n'
+
+
+def write_textfile(path, const=()):
+    """Write the exposition to path atomically, so a scraper never reads half a file"""
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        f.write(exposition(const))
+    os.replace(temporary, path)
+
+
+def process_path(path, pid=None):
+    """
+    Per-process name of a PMS_METRICS_FILE path.
+
+    '{pid}' in the path is replaced by the process id; otherwise the id goes
+    before the extension ('pms.prom' -> 'pms.1234.prom'), so node_exporter
+    still picks the file up.
+    """
+    pid = os.getpid() if pid is None else pid
+    if '{pid}' in path:
+        return path.replace('{pid}', str(pid))
+    root, extension = os.path.splitext(path)
+    return f'{root}.{pid}{extension}'
+
+
+def serve(port, host='127.0.0.1'):
+    """
+    Serve GET /metrics on a background thread.
+
+    Returns:
+        The running ThreadingHTTPServer (port 0 picks a free port, see server_address)
+    """
+    # Imported here: http.server would add ~40ms to every command line start
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = exposition().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='pms-metrics', daemon=True).start()
+    return server
+
+
+def _export_forever(path, interval):
+    const = [('pid', os.getpid())]
+    failing = False
+    while True:
+        try:
+            write_textfile(path, const)
+            failing = False
+        except OSError as e:
+            # Warn once per outage, keep retrying
+            if not failing:
+                logger.warning("Could not write metrics to %s: %s", path, e)
+            failing = True
+        time.sleep(interval)
+
+
+def _remove_textfile(path):
+    """Remove this process's metrics file at exit, so no stale samples are scraped"""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_exporter_lock = threading.Lock()
+_exporter_started = False
+
+
+def start_exporter():
+    """
+    Start the exporters configured by PMS_METRICS_PORT and PMS_METRICS_FILE, once per process.
+
+    Streamlit runs the app script again on every interaction, so repeated
+    calls are no-ops. A port that cannot be bound (e.g. taken by another
+    worker process) is logged, not raised: metrics must never stop the app.
+    The text file gets a per-process name (see process_path).
+
+    Returns:
+        Path of this process's metrics file, or None
+    """
+    global _exporter_started
+    with _exporter_lock:
+        if _exporter_started:
+            return None
+        _exporter_started = True
+        port = os.environ.get('PMS_METRICS_PORT')
+        if port:
+            try:
+                serve(int(port), os.environ.get('PMS_METRICS_HOST', '127.0.0.1'))
+            except (OSError, ValueError) as e:
+                logger.warning("Metrics endpoint not started on port %s: %s (give each process its own "
+                               "PMS_METRICS_PORT, or use PMS_METRICS_FILE)", port, e)
+        path = os.environ.get('PMS_METRICS_FILE')
+        if path:
+            path = process_path(path)
+            atexit.register(_remove_textfile, path)
+            threading.Thread(target=_export_forever, args=(path, EXPORT_INTERVAL), name='pms-metrics-file',
+                             daemon=True).start()
+        return path
@@ -0,0 +1,88 @@
+"""
+Sharded parallel aggregation for very large rosters.
+
+Each worker groups a contiguous row range (shard) of the prepared frame on
+its own, string keys included, and returns a small partial count/sum table;
+the parent only adds the partial tables up. Nothing is encoded row by row in
+the parent; each worker receives just its shard's key columns. Workers are
+started with 'forkserver' (or 'spawn' where that is unavailable), never
+'fork': the Streamlit server runs this from a multithreaded process, and a
+forked child can inherit locks held by other threads. The result is
+identical to the serial aggregate_cells in pms_core.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from pms_core import CELL_KEYS, START_METHOD
+
+# Columns a shard needs
+SHARD_COLUMNS = CELL_KEYS + ['Current Availability']
+
+
+def _aggregate_rows(rows):
+    """
+    Partial count/sum per non-empty cell of some rows, encoding their own keys.
+
+    Mapped_Role is a function of Current Role, so the cell key only combines
+    Region, Current Role and Bucket codes. The combined keys are factorized
+    again so the counts and sums are bincounts over the occupied cells only,
+    not over every region x role x bucket combination.
+    """
+    region_codes, regions = pd.factorize(rows['Region'], use_na_sentinel=False)
+    role_codes, roles = pd.factorize(rows['Current Role'], use_na_sentinel=False)
+    buckets = rows['Bucket'].dtype
+    n_buckets = len(buckets.categories)
+    availability = rows['Current Availability'].to_numpy()
+
+    keys = (region_codes.astype(np.int64) * len(roles) + role_codes) * n_buckets + rows['Bucket'].cat.codes.to_numpy()
+    cell_codes, present = pd.factorize(keys, sort=True)
+    counts = np.bincount(cell_codes, minlength=len(present))
+    sums = np.bincount(cell_codes, weights=availability, minlength=len(present))
+
+    # Factorized codes follow first appearance, so this is each role's first row
+    first_rows = np.flatnonzero(~pd.Series(role_codes).duplicated().to_numpy())
+    role_at = present // n_buckets % len(roles)
+    return pd.DataFrame({
+        'Region': regions.take(present // n_buckets // len(roles)),
+        'Mapped_Role': rows['Mapped_Role'].to_numpy()[first_rows[role_at]],
+        'Current Role': roles.take(role_at),
+        'Bucket': pd.Categorical.from_codes(present % n_buckets, dtype=buckets),
+        'count': counts,
+        'sum': sums.astype(availability.dtype),
+    })
+
+
+def parallel_aggregate(frame, workers=None, shard_size=None):
+    """
+    Aggregate a prepared frame across a process pool.
+
+    Args:
+        frame: PreparedDataset.frame
+        workers: Number of processes (defaults to the CPU count)
+        shard_size: Rows per shard (defaults to an even split across workers)
+
+    Returns:
+        DataFrame matching pms_core.aggregate_cells
+    """
+    workers = workers or os.cpu_count() or 1
+    n_rows = len(frame)
+    shard_size = shard_size or max(-(-n_rows // workers), 1)
+    shards = [(start, min(start + shard_size, n_rows)) for start in range(0, n_rows, shard_size)]
+    if len(shards) < 2:
+        return _merge([_aggregate_rows(frame)])
+
+    columns = frame[SHARD_COLUMNS]
+    context = multiprocessing.get_context(START_METHOD)
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards)), mp_context=context) as pool:
+        partials = list(pool.map(_aggregate_rows, (columns.iloc[start:stop] for start, stop in shards)))
+
+    return _merge(partials)
+
+
+def _merge(partials):
+    """Add up the partial tables (one row per non-empty cell per shard, so this is small)"""
+    return pd.concat(partials, ignore_index=True).groupby(CELL_KEYS, observed=True, sort=True)[['count', 'sum']].sum()
@@ -0,0 +1,295 @@
+"""
+Answer staffing requests such as "12 PMs in APAC with at least 60% availability".
+
+The prepared frame is already sorted by availability (descending), so the row
+positions of each (Mapped_Role, Region) group are kept as arrays in that
+order. A request binary-searches the availability threshold in its group and
+takes the first candidates, and a batch of requests is filled in priority
+order without booking the same associate twice.
+"""
+import argparse
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from pms_core import CONSOLIDATION_POLICIES, prepare_dataset
+
+# Columns returned for each candidate
+CANDIDATE_COLUMNS = ['Associate ID', 'Associate Name', 'Current Availability', 'Mapped_Role', 'Region',
+                     'Current Role', 'Bucket']
+
+# Columns of a batch demands file (see read_demands)
+DEMAND_COLUMNS = ['role', 'region', 'min_availability', 'count']
+
+# Placeholder accepted for "any region" / "any role" in demand strings and files
+ANY = '*'
+
+
+@dataclass(frozen=True)
+class StaffingDemand:
+    """
+    One staffing request.
+
+    Attributes:
+        role: Mapped role as shown on the role cards, or None for any role
+        region: Region name, or None for any region
+        min_availability: Lowest acceptable availability (percent)
+        count: Number of associates wanted
+    """
+    role: object = None
+    region: object = None
+    min_availability: float = 0
+    count: int = 1
+
+    @property
+    def label(self):
+        return (f"{self.count} x {self.role or 'any role'} in {self.region or 'any region'}"
+                f" >= {self.min_availability:g}%")
+
+
+@dataclass(frozen=True)
+class StaffingResult:
+    """
+    Candidates found for one demand.
+
+    Attributes:
+        demand: The StaffingDemand
+        candidates: Up to demand.count rows with CANDIDATE_COLUMNS, highest
+            availability first
+        eligible: Associates meeting the demand before any were booked by
+            earlier demands of the same batch
+    """
+    demand: StaffingDemand
+    candidates: pd.DataFrame
+    eligible: int
+
+    @property
+    def shortfall(self):
+        return self.demand.count - len(self.candidates)
+
+
+class AvailabilityIndex:
+    """
+    Row positions of a prepared dataset per (role, region), in availability order.
+
+    Groups are also kept for "any region" and "any role", so every demand is
+    a dictionary lookup plus a binary search.
+
+    Args:
+        prepared: PreparedDataset from pms_core.prepare_dataset
+    """
+
+    def __init__(self, prepared):
+        frame = prepared.frame
+        self.table = frame[CANDIDATE_COLUMNS]
+        self.roles = tuple(role for role in prepared.roles if role != 'Total')
+        self.regions = prepared.regions
+
+        # (role, region) -> (row positions, negated availability); negated so that the values ascend
+        negated = -frame['Current Availability'].to_numpy(dtype=float)
+        groups = {(None, None): np.arange(len(frame))}
+        for role, rows in frame.groupby('Mapped_Role', observed=True, sort=False).indices.items():
+            groups[(role, None)] = rows
+        for region, rows in frame.groupby('Region', observed=True, sort=False).indices.items():
+            groups[(None, region)] = rows
+        groups.update(frame.groupby(['Mapped_Role', 'Region'], observed=True, sort=False).indices)
+        self._groups = {key: (rows, negated[rows]) for key, rows in groups.items()}
+        self._no_rows = (np.arange(0), negated[:0])
+
+    def eligible_rows(self, demand):
+        """Positions of every associate meeting the demand, highest availability first"""
+        if demand.role is not None and demand.role not in self.roles:
+            raise ValueError(f"Unknown role: {demand.role}")
+        if demand.region is not None and demand.region not in self.regions:
+            raise ValueError(f"Unknown region: {demand.region}")
+
+        rows, negated = self._groups.get((demand.role, demand.region), self._no_rows)
+        return rows[:np.searchsorted(negated, -demand.min_availability, side='right')]
+
+    def query(self, demand):
+        """Top demand.count candidates for one demand"""
+        rows = self.eligible_rows(demand)
+        return StaffingResult(demand, self._candidates(rows[:demand.count]), len(rows))
+
+    def fill(self, demands):
+        """
+        Fill several demands in the given (priority) order.
+
+        An associate booked by one demand is skipped by the later ones, so no
+        one is proposed twice.
+
+        Returns:
+            List of StaffingResult, one per demand
+        """
+        booked = np.zeros(len(self.table), dtype=bool)
+        results = []
+        for demand in demands:
+            rows = self.eligible_rows(demand)
+            chosen = rows[~booked[rows]][:demand.count]
+            booked[chosen] = True
+            results.append(StaffingResult(demand, self._candidates(chosen), len(rows)))
+        return results
+
+    def _candidates(self, rows):
+        return self.table.iloc[rows].reset_index(drop=True)
+
+
+def find_candidates(prepared, role=None, region=None, min_availability=0, count=1):
+    """
+    Top candidates for a single staffing request.
+
+    A one-off helper: it indexes the whole dataset on every call. For
+    repeated queries against the same dataset, build one AvailabilityIndex
+    and call its query/fill methods (as the app does).
+
+    Args:
+        prepared: PreparedDataset from pms_core.prepare_dataset
+        role: Mapped role, or None/'Total' for any role
+        region: Region name, or None for any region
+        min_availability: Lowest acceptable availability (percent)
+        count: Number of associates wanted
+
+    Returns:
+        StaffingResult
+    """
+    demand = StaffingDemand(None if role == 'Total' else role, region, min_availability, count)
+    return AvailabilityIndex(prepared).query(demand)
+
+
+def fill_demands(prepared, demands):
+    """
+    Fill a batch of StaffingDemand in order without double-booking (see AvailabilityIndex.fill).
+
+    Like find_candidates, this indexes the dataset for a single batch.
+    """
+    return AvailabilityIndex(prepared).fill(demands)
+
+
+def results_frame(results):
+    """All candidates of a batch in one table, with the demand each was proposed for"""
+    frames = [result.candidates.assign(Demand=result.demand.label) for result in results]
+    if not frames:
+        return pd.DataFrame(columns=['Demand'] + CANDIDATE_COLUMNS)
+    return pd.concat(frames, ignore_index=True)[['Demand'] + CANDIDATE_COLUMNS]
+
+
+def _optional(value):
+    """None for an empty or '*' role/region"""
+    if value is None or pd.isnull(value):
+        return None
+    value = str(value).strip()
+    return None if value in ('', ANY) else value
+
+
+def check_demand(demand):
+    """
+    Reject counts below 1 and availabilities outside 0-100%.
+
+    Returns:
+        The demand, unchanged
+    """
+    if demand.count < 1:
+        raise ValueError(f"count must be at least 1, got {demand.count}")
+    if not 0 <= demand.min_availability <= 100:
+        raise ValueError(f"min_availability must be between 0 and 100, got {demand.min_availability:g}")
+    return demand
+
+
+def parse_demand(text):
+    """
+    Parse a demand written as ROLE:REGION:MIN_AVAILABILITY:COUNT, e.g. 'PM:APAC:60:12'.
+
+    ROLE and REGION may be '*' (or empty) for any; MIN_AVAILABILITY and COUNT
+    may be left out (0% and 1 associate).
+    """
+    parts = text.split(':')
+    if len(parts) > 4:
+        raise ValueError(f"Invalid demand '{text}' (use ROLE:REGION:MIN_AVAILABILITY:COUNT)")
+    parts += [''] * (4 - len(parts))
+    try:
+        min_availability = float(parts[2].rstrip('%')) if parts[2].strip() else 0
+        count = int(parts[3]) if parts[3].strip() else 1
+    except ValueError:
+        raise ValueError(f"Invalid demand '{text}' (use ROLE:REGION:MIN_AVAILABILITY:COUNT)") from None
+    try:
+        return check_demand(StaffingDemand(_optional(parts[0]), _optional(parts[1]), min_availability, count))
+    except ValueError as e:
+        raise ValueError(f"Invalid demand '{text}': {e}") from None
+
+
+def read_demands(source):
+    """
+    Read a batch of demands from a CSV file with DEMAND_COLUMNS, one demand per row.
+
+    Empty role/region cells mean any; rows are filled in file order.
+    """
+    table = pd.read_csv(source, dtype={'role': str, 'region': str})
+    table.columns = [str(column).strip().lower() for column in table.columns]
+    missing = [column for column in DEMAND_COLUMNS if column not in table.columns]
+    if missing:
+        raise ValueError(f"Missing demand columns: {', '.join(missing)}")
+
+    table['min_availability'] = table['min_availability'].fillna(0)
+    table['count'] = table['count'].fillna(1)
+    demands = []
+    # Row numbers as in a spreadsheet, after the header
+    for number, row in enumerate(table[DEMAND_COLUMNS].itertuples(index=False), start=2):
+        demand = StaffingDemand(_optional(row.role), _optional(row.region), float(row.min_availability), int(row.count))
+        try:
+            demands.append(check_demand(demand))
+        except ValueError as e:
+            raise ValueError(f"Invalid demand on row {number}: {e}") from None
+    return demands
+
+
+def main(argv=None):
+    """Command line entry point of the 'query' subcommand"""
+    parser = argparse.ArgumentParser(
+        prog='pms_visualization.py query',
+        description="Find associates for staffing requests.",
+        epilog="Example: python pms_visualization.py query roster.xlsx --demand PM:APAC:60:12 --demand 'SCRUM:*:50:3'\n"
+               "         python pms_visualization.py query roster.xlsx --demands demands.csv --output staffing.csv",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('file_path', help="Path to the Excel file")
+    parser.add_argument('--demand', action='append', default=[], metavar='ROLE:REGION:MIN:COUNT',
+                        help="A staffing request; repeat for a batch ('*' matches any role or region)")
+    parser.add_argument('--demands', metavar='CSV',
+                        help="CSV file of requests with role, region, min_availability and count columns")
+    parser.add_argument('--output', metavar='PATH',
+                        help="Write the candidates to a .csv or .xlsx file instead of stdout")
+    parser.add_argument('--consolidate', choices=CONSOLIDATION_POLICIES,
+                        help="Merge associates that appear on several allocation rows")
+    args = parser.parse_args(argv)
+
+    try:
+        demands = [parse_demand(text) for text in args.demand]
+        if args.demands:
+            demands += read_demands(args.demands)
+    except ValueError as e:
+        parser.error(str(e))
+    if not demands:
+        parser.error("give at least one --demand or a --demands file")
+
+    prepared = prepare_dataset(file_path=args.file_path, consolidate=args.consolidate)
+    try:
+        results = fill_demands(prepared, demands)
+    except ValueError as e:
+        # Unknown role or region
+        parser.error(str(e))
+    for result in results:
+        note = f", {result.shortfall} short" if result.shortfall > 0 else ''
+        print(f"{result.demand.label}: {len(result.candidates)} found ({result.eligible} eligible{note})",
+              file=sys.stderr)
+
+    table = results_frame(results)
+    if args.output and args.output.lower().endswith('.xlsx'):
+        table.to_excel(args.output, index=False)
+    elif args.output:
+        table.to_csv(args.output, index=False)
+    else:
+        table.to_csv(sys.stdout, index=False)
+    if args.output:
+        print(f"Candidates saved to: {args.output}", file=sys.stderr)
@@ -0,0 +1,282 @@
+"""
+Content-addressed store of prepared datasets shared between processes.
+
+A PreparedDataset is published once as uncompressed Arrow IPC files under
+the hash of the uploaded bytes. Any process (another Streamlit worker,
+another session, the CLI) that sees the same upload memory-maps those files
+instead of re-reading the Excel file, so the column buffers live in the
+shared page cache rather than in every worker's heap.
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from pms_core import CELL_KEYS, PreparedDataset
+
+# Bump when the stored layout changes so old entries are not reused
+STORE_VERSION = 1
+
+# Directory holding one sub-directory per published dataset
+STORE_DIR = os.environ.get('PMS_DATASET_STORE', os.path.join(tempfile.gettempdir(), 'pms_datasets'))
+
+# Published datasets older than this (seconds since last use) or beyond this
+# total size (bytes, least recently used first) are removed from STORE_DIR
+STORE_MAX_AGE = float(os.environ.get('PMS_DATASET_STORE_MAX_AGE', str(7 * 24 * 3600)))
+STORE_MAX_BYTES = int(os.environ.get('PMS_DATASET_STORE_MAX_BYTES', str(2 * 1024 ** 3)))
+
+# Datasets kept mapped by this process, least recently used first
+MAX_OPEN_DATASETS = int(os.environ.get('PMS_OPEN_DATASETS', '8'))
+
+# Datasets already mapped by this process, by key
+_OPEN_DATASETS = OrderedDict()
+_OPEN_LOCK = threading.Lock()
+
+
+def dataset_key(data, **options):
+    """
+    Content hash identifying a prepared dataset.
+
+    Args:
+        data: Raw bytes of the uploaded file
+        options: prepare_dataset options that change the result (e.g. consolidate)
+
+    Returns:
+        Hex digest used as the store key
+    """
+    digest = hashlib.sha256(data)
+    digest.update(json.dumps({'version': STORE_VERSION, **options}, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _write_table(frame, path):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    with pa.OSFile(path, 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _string_dtype():
+    """Arrow-backed string dtype with NaN missing values (pandas 3's default 'str')"""
+    try:
+        return pd.StringDtype('pyarrow', na_value=np.nan)
+    except TypeError:
+        # pandas 2.1 and 2.2 spell it differently
+        return pd.StringDtype('pyarrow_numpy')
+
+
+# Dtype of mapped string columns
+STRING_DTYPE = _string_dtype()
+
+
+def _string_column(arrow_type):
+    """types_mapper keeping string columns in Arrow memory (pandas 2 would copy them to Python objects)"""
+    return STRING_DTYPE if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type) else None
+
+
+def _map_table(path):
+    """Memory-map an Arrow IPC file; numeric and string buffers are not copied"""
+    with pa.memory_map(path, 'r') as source:
+        table = ipc.open_file(source).read_all()
+    return table.to_pandas(split_blocks=True, types_mapper=_string_column)
+
+
+def publish_dataset(key, prepared, store_dir=None):
+    """
+    Write a prepared dataset to the store (no-op if the key is already published).
+
+    Files are written to a private temporary directory and renamed into place,
+    so readers never see a partially written dataset.
+
+    Returns:
+        Directory of the published dataset
+    """
+    store_dir = store_dir or STORE_DIR
+    target = os.path.join(store_dir, key)
+    if os.path.isdir(target):
+        return target
+
+    os.makedirs(store_dir, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f'.{key[:12]}-', dir=store_dir)
+    try:
+        _write_table(prepared.frame, os.path.join(staging, 'frame.arrow'))
+        _write_table(prepared.cells.reset_index(), os.path.join(staging, 'cells.arrow'))
+        _write_table(prepared.errors, os.path.join(staging, 'errors.arrow'))
+        with open(os.path.join(staging, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({
+                'regions': list(prepared.regions),
+                'roles': list(prepared.roles),
+                'raw_roles': list(prepared.raw_roles),
+                'merged_rows': prepared.merged_rows,
+                'source_rows': prepared.source_rows,
+                'dropped_rows': prepared.dropped_rows,
+            }, f)
+        os.rename(staging, target)
+    except OSError:
+        # Another process published the same key first
+        shutil.rmtree(staging, ignore_errors=True)
+        if not os.path.isdir(target):
+            raise
+    evict_datasets(store_dir=store_dir, keep=key)
+    return target
+
+
+def _directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def evict_datasets(store_dir=None, max_age=None, max_bytes=None, keep=None):
+    """
+    Remove published datasets unused for max_age seconds, then the least
+    recently used ones until the store fits in max_bytes.
+
+    A dataset's directory time is its last use (open_dataset touches it).
+    Entries are renamed away before deletion, so other processes either map
+    a complete dataset or miss it and prepare it again; files they already
+    mapped stay readable until unmapped.
+
+    Args:
+        store_dir: Store directory (defaults to STORE_DIR)
+        max_age: Seconds since last use (defaults to STORE_MAX_AGE)
+        max_bytes: Total size limit (defaults to STORE_MAX_BYTES)
+        keep: Key never to remove (e.g. the one just published)
+
+    Returns:
+        List of removed keys
+    """
+    store_dir = store_dir or STORE_DIR
+    max_age = STORE_MAX_AGE if max_age is None else max_age
+    max_bytes = STORE_MAX_BYTES if max_bytes is None else max_bytes
+    try:
+        names = os.listdir(store_dir)
+    except FileNotFoundError:
+        return []
+
+    entries = []
+    now = time.time()
+    for name in names:
+        path = os.path.join(store_dir, name)
+        try:
+            used = os.stat(path).st_mtime
+        except OSError:
+            continue
+        if name.startswith('.'):
+            # Staging or evicted directories left behind by a crashed process
+            if now - used > max_age:
+                shutil.rmtree(path, ignore_errors=True)
+            continue
+        entries.append((used, name, _directory_size(path)))
+
+    removed = []
+    total = sum(size for _, _, size in entries)
+    for used, name, size in sorted(entries):
+        if name == keep or (now - used <= max_age and total <= max_bytes):
+            continue
+        if _remove_entry(store_dir, name):
+            total -= size
+            removed.append(name)
+    return removed
+
+
+def _remove_entry(store_dir, key):
+    """Rename a published dataset away, then delete it; False if it was not there"""
+    doomed = os.path.join(store_dir, f'.evicted-{key[:12]}-{os.getpid()}-{threading.get_ident()}')
+    try:
+        os.rename(os.path.join(store_dir, key), doomed)
+    except OSError:
+        return False
+    shutil.rmtree(doomed, ignore_errors=True)
+    return True
+
+
+def open_dataset(key, store_dir=None):
+    """
+    Map a published dataset.
+
+    Returns:
+        PreparedDataset, or None if the key has not been published
+    """
+    with _OPEN_LOCK:
+        if key in _OPEN_DATASETS:
+            _OPEN_DATASETS.move_to_end(key)
+            return _OPEN_DATASETS[key]
+
+    path = os.path.join(store_dir or STORE_DIR, key)
+    try:
+        # Mark the dataset as used for evict_datasets
+        os.utime(path)
+    except OSError:
+        return None
+
+    with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+        meta = json.load(f)
+    prepared = PreparedDataset(
+        frame=_map_table(os.path.join(path, 'frame.arrow')),
+        cells=_map_table(os.path.join(path, 'cells.arrow')).set_index(CELL_KEYS),
+        regions=tuple(meta['regions']),
+        roles=tuple(meta['roles']),
+        raw_roles=tuple(meta['raw_roles']),
+        errors=_map_table(os.path.join(path, 'errors.arrow')),
+        merged_rows=meta['merged_rows'],
+        source_rows=meta['source_rows'],
+        dropped_rows=meta.get('dropped_rows', 0),
+    )
+
+    with _OPEN_LOCK:
+        prepared = _OPEN_DATASETS.setdefault(key, prepared)
+        _OPEN_DATASETS.move_to_end(key)
+        # Dropping the reference unmaps the files once no session uses them
+        while len(_OPEN_DATASETS) > MAX_OPEN_DATASETS:
+            _OPEN_DATASETS.popitem(last=False)
+        return prepared
+
+
+def release_dataset(key, store_dir=None, remove=False):
+    """
+    Drop this process's mapping of a dataset.
+
+    Args:
+        key: Store key from dataset_key
+        remove: Also delete the published files (for content that is gone for good)
+    """
+    with _OPEN_LOCK:
+        _OPEN_DATASETS.pop(key, None)
+    if remove:
+        _remove_entry(store_dir or STORE_DIR, key)
+
+
+def shared_dataset(key, prepare, store_dir=None):
+    """
+    Return the published dataset for key, preparing and publishing it first if needed.
+
+    Args:
+        key: Store key from dataset_key
+        prepare: Callable returning a PreparedDataset, only called on a miss
+
+    Returns:
+        Tuple (prepared, hit) where hit tells whether the store already had it
+    """
+    prepared = open_dataset(key, store_dir=store_dir)
+    if prepared is not None:
+        return prepared, True
+
+    prepared = prepare()
+    publish_dataset(key, prepared, store_dir=store_dir)
+    # Another process's evict_datasets may remove it again right away; the
+    # in-memory copy serves this caller then
+    return open_dataset(key, store_dir=store_dir) or prepared, False
@@ -0,0 +1,933 @@
+"""
+Tabbed Region -> Role -> Bucket dashboard page.
+
+The 'tabbed' and 'summary' renderers, their page template and the page size
+model live here rather than in the Streamlit app, so the command line, the
+background jobs and the tests render dashboards without importing Streamlit.
+"""
+import os
+import re
+from dataclasses import dataclass
+from html import escape as html_escape
+
+import numpy as np
+
+from pms_core import (BUCKETS, HISTOGRAM_BINS, _dump_script_json, checkpoint, distribution_levels, group_positions,
+                      prepare_dataset, register_renderer, render, rollup)
+
+# Largest dashboard page embedded in the app, in bytes; bigger pages are degraded
+# (fewer associates per cell, summary only, or download only)
+DASHBOARD_BYTE_BUDGET = int(os.environ.get('PMS_DASHBOARD_BYTE_BUDGET', str(40 * 1024 * 1024)))
+
+# Approximate serialized size of one role entry (four bucket cells and spread
+# statistics, no associates) and of one server-rendered overall role card
+ROLE_ENTRY_BYTES = 400
+ROLE_CARD_BYTES = 1300
+
+# Characters that _dump_script_json writes as more than one byte, and the extra
+# bytes each costs: \uXXXX escapes (non-ASCII and '<'), surrogate pairs beyond
+# the BMP, two-character escapes and \u00XX control characters. The patterns
+# must also compile in RE2 (Arrow-backed strings), hence the literal range ends
+JSON_ESCAPE_COSTS = [
+    (r'[^\x00-\x7f]|<', 5),
+    ('[\U00010000-\U0010ffff]', 6),
+    (r'["\\\x08\x0c\n\r\t]', 1),
+    (r'[\x00-\x07\x0b\x0e-\x1f]', 5),
+]
+# Any of the above, to find the few strings that need counting
+ESCAPED_CHARS = r'[^\x20-\x7e]|["\\<]'
+
+# {{name}} slot markers of the page templates
+TEMPLATE_SLOT = re.compile(r'\{\{(\w+)\}\}')
+
+# One <rect> per histogram bin of the role card sparklines (24 units high, bars up to 22)
+SPARKLINE_BARS = [
+    f'<rect x="{i * 100 / HISTOGRAM_BINS + 0.5:g}" y="{{y}}" width="{100 / HISTOGRAM_BINS - 1:g}" height="{{height}}">'
+    f'<title>{i * 100 / HISTOGRAM_BINS:g}-{(i + 1) * 100 / HISTOGRAM_BINS:g}%: {{n}}</title></rect>'
+    for i in range(HISTOGRAM_BINS)
+]
+
+# Associate fields embedded for the overall tab and for the region tabs
+OVERALL_ASSOCIATE_COLUMNS = ['Associate ID', 'Associate Name', 'Current Availability', 'Region', 'Mapped_Role']
+REGION_ASSOCIATE_COLUMNS = ['Associate ID', 'Associate Name', 'Current Availability', 'Mapped_Role']
+
+
+def generate_pms_visualization(file_path=None, dataframe=None, prepared=None, budget=None):
+    """
+    Generate an interactive HTML visualization from Excel data with bucket-based organization.
+
+    Args:
+        file_path: Path to the Excel file (optional if dataframe is provided)
+        dataframe: Pre-loaded pandas DataFrame (optional if file_path is provided)
+        prepared: PreparedDataset from pms_core.prepare_dataset, skips loading and cleaning
+        budget: Optional page size limit in bytes; a page estimated to be larger
+            embeds fewer associates per cell (see plan_dashboard)
+
+    Returns:
+        HTML string of the visualization
+    """
+    if prepared is None:
+        prepared = prepare_dataset(file_path=file_path, dataframe=dataframe)
+    top_n = None if budget is None else plan_dashboard(prepared, budget=budget).top_n
+    return render(prepared, 'tabbed', top_n=top_n)
+
+
+def _cell_stats(cells, keys):
+    """Map each cell key to (count, avg_availability) for the given rollup level"""
+    totals = rollup(cells, keys)
+    return dict(zip(totals.index, zip(totals['count'].astype(int).tolist(), totals['avg_availability'].tolist())))
+
+
+def _distributions(stats, keys):
+    """Map each group key of a distribution_levels table to its percentiles and histogram"""
+    if not keys:
+        return stats.to_dict('records')[0] if len(stats) else {}
+    return stats.to_dict('index')
+
+
+def _dashboard_steps(prepared):
+    """Progress steps of the tabbed renderer: four bulk steps, one per region, then filling the page"""
+    return len(prepared.regions) + 5
+
+
+def _build_dashboard_data(prepared, top_n=None):
+    """
+    Build the Region -> Role -> Bucket structure embedded in the tabbed dashboard.
+
+    Checks for cancellation and reports progress (pms_base.checkpoint)
+    between steps and regions.
+
+    Args:
+        prepared: PreparedDataset from pms_core.prepare_dataset
+        top_n: None embeds every associate; a number embeds only the first
+            top_n associates (highest availability) of each cell
+    """
+    frame = prepared.frame
+    cells = prepared.cells
+
+    # Counts and averages come from the aggregate, associate lists from row positions
+    role_stats = _cell_stats(cells, ['Mapped_Role'])
+    role_bucket_stats = _cell_stats(cells, ['Mapped_Role', 'Bucket'])
+    bucket_stats = _cell_stats(cells, ['Bucket'])
+    region_stats = _cell_stats(cells, ['Region'])
+    region_bucket_stats = _cell_stats(cells, ['Region', 'Bucket'])
+    region_role_stats = _cell_stats(cells, ['Region', 'Mapped_Role'])
+    region_role_bucket_stats = _cell_stats(cells, ['Region', 'Mapped_Role', 'Bucket'])
+    steps = _dashboard_steps(prepared)
+    checkpoint(1, steps)
+
+    # Availability spread of every role card
+    levels = [[], ['Mapped_Role'], ['Region'], ['Region', 'Mapped_Role']]
+    total_dist, role_dist, region_dist, region_role_dist = map(
+        _distributions, distribution_levels(frame, levels), levels)
+    checkpoint(2, steps)
+
+    bucket_rows = group_positions(frame, 'Bucket')
+    role_bucket_rows = group_positions(frame, ['Mapped_Role', 'Bucket'])
+    region_bucket_rows = group_positions(frame, ['Region', 'Bucket'])
+    region_role_bucket_rows = group_positions(frame, ['Region', 'Mapped_Role', 'Bucket'])
+    checkpoint(3, steps)
+
+    if top_n is None:
+        overall_records = frame[OVERALL_ASSOCIATE_COLUMNS].to_dict('records')
+        region_records = frame[REGION_ASSOCIATE_COLUMNS].to_dict('records')
+    else:
+        # Rows are sorted by availability, so each cell's top associates are its first rows
+        for rows in (bucket_rows, role_bucket_rows, region_bucket_rows, region_role_bucket_rows):
+            for key in rows:
+                rows[key] = rows[key][:top_n]
+        overall_records = _records_at(frame, OVERALL_ASSOCIATE_COLUMNS, (bucket_rows, role_bucket_rows))
+        region_records = _records_at(frame, REGION_ASSOCIATE_COLUMNS, (region_bucket_rows, region_role_bucket_rows))
+    checkpoint(4, steps)
+
+    dashboard_data = {
+        'Total': {
+            'count': prepared.total_count,
+            'avg_availability': prepared.total_avg_availability
+        },
+        'Regions': {},
+        'Roles': {}
+    }
+
+    # Overall role statistics
+    for role in prepared.roles:
+        if role == 'Total':
+            dashboard_data['Roles'][role] = _role_entry(
+                (prepared.total_count, prepared.total_avg_availability), (),
+                bucket_stats, bucket_rows, overall_records, total_dist
+            )
+        else:
+            dashboard_data['Roles'][role] = _role_entry(
+                role_stats.get(role, (0, 0)), (role,),
+                role_bucket_stats, role_bucket_rows, overall_records, role_dist.get(role)
+            )
+
+    # Region statistics
+    for done, region in enumerate(prepared.regions, start=4):
+        checkpoint(done, steps)
+        count, avg_avail = region_stats[region]
+        dashboard_data['Regions'][region] = {
+            'count': count,
+            'avg_availability': avg_avail,
+            'roles': {}
+        }
+        for role in prepared.roles:
+            if role == 'Total':
+                dashboard_data['Regions'][region]['roles'][role] = _role_entry(
+                    (count, avg_avail), (region,),
+                    region_bucket_stats, region_bucket_rows, region_records, region_dist[region]
+                )
+            else:
+                dashboard_data['Regions'][region]['roles'][role] = _role_entry(
+                    region_role_stats.get((region, role), (0, 0)), (region, role),
+                    region_role_bucket_stats, region_role_bucket_rows, region_records,
+                    region_role_dist.get((region, role))
+                )
+
+    if top_n is not None:
+        dashboard_data['Summary'] = {'top_n': top_n}
+
+    return dashboard_data
+
+
+def _records_at(frame, columns, row_groups):
+    """Records of only the rows referenced by the groups, keyed by row position"""
+    positions = sorted({i for rows in row_groups for group in rows.values() for i in group})
+    return dict(zip(positions, frame[columns].iloc[positions].to_dict('records')))
+
+
+def _role_entry(stats, prefix, bucket_stats, bucket_rows, records, distribution=None):
+    """Count/average/spread of one role card plus its bucket cards and associate lists"""
+    count, avg_avail = stats
+    buckets = {}
+    for bucket in BUCKETS:
+        parts = prefix + (bucket,)
+        key = parts[0] if len(parts) == 1 else parts
+        bucket_count, bucket_avg = bucket_stats.get(key, (0, 0))
+        buckets[bucket] = {
+            'count': bucket_count,
+            'avg_availability': bucket_avg,
+            'associates': [records[i] for i in bucket_rows.get(key, ())]
+        }
+    entry = {
+        'count': count,
+        'avg_availability': avg_avail,
+        'buckets': buckets
+    }
+    if distribution:
+        entry.update(distribution)
+    return entry
+
+
+def _spread_html(entry):
+    """Median, p10-p90 range and histogram sparkline shown on a role card"""
+    if not entry['count']:
+        return ''
+    histogram = entry['histogram']
+    scale = 22 / max(histogram)
+    bars = ''.join([
+        bar.format(y=24 - height, height=height, n=n)
+        for bar, n in zip(SPARKLINE_BARS, histogram)
+        for height in [round(n * scale)]
+    ])
+    return (
+        f'<svg class="sparkline" viewBox="0 0 100 24" preserveAspectRatio="none">{bars}</svg>'
+        f'<div class="role-spread">Median {entry["median"]:g}% &middot; P10-P90 {entry["p10"]:g}-{entry["p90"]:g}%</div>'
+    )
+
+
+def _compile_template(text):
+    """
+    Split a page template into literal chunks and {{slot}} names once.
+
+    Returns:
+        Tuple (literals, slots) with len(literals) == len(slots) + 1
+    """
+    parts = TEMPLATE_SLOT.split(text)
+    return tuple(parts[0::2]), tuple(parts[1::2])
+
+
+def _fill_template(compiled, **values):
+    """Join a compiled template with already-escaped slot values"""
+    literals, slots = compiled
+    pieces = [literals[0]]
+    for slot, literal in zip(slots, literals[1:]):
+        pieces.append(values[slot])
+        pieces.append(literal)
+    return ''.join(pieces)
+
+
+# Page shown when no associate has availability above 0%
+EMPTY_DASHBOARD_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>PMS Resource Visualization</title>
+    <style>
+        body { font-family: 'Segoe UI', sans-serif; margin: 20px; }
+        .empty-message {
+            text-align: center;
+            padding: 50px;
+            background: #f8f9fa;
+            border-radius: 8px;
+            color: #5f6368;
+            font-size: 18px;
+        }
+    </style>
+</head>
+<body>
+    <div class="empty-message">No resources with availability greater than 0% found in the data.</div>
+</body>
+</html>
+"""
+
+# Tabbed dashboard shell; {{slot}} markers are filled by render_tabbed
+TABBED_PAGE_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>PMS Resource Visualization</title>
+    <style>
+        * { margin: 0; padding: 0; box-sizing: border-box; font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; }
+        body { background-color: #f0f2f5; color: #333; }
+        .container { max-width: 1200px; margin: 0 auto; padding: 20px; }
+        .header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 20px; background-color: #fff; padding: 15px 20px; border-radius: 8px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); }
+        .header-title { font-size: 20px; font-weight: 600; color: #333; }
+        .total-box { display: flex; align-items: center; background-color: #e9ecef; border-radius: 6px; padding: 10px 15px; }
+        .total-label { font-size: 14px; font-weight: 500; color: #555; }
+        .total-value { font-size: 16px; font-weight: 600; color: #333; margin-left: 10px; }
+        .tab-container { display: flex; border-bottom: 2px solid #e0e0e0; margin-bottom: 20px; }
+        .tab { padding: 10px 20px; font-size: 15px; font-weight: 500; cursor: pointer; transition: all 0.2s; }
+        .tab.active, .tab:hover { border-bottom: 2px solid #007bff; color: #007bff; }
+        .tab-content { display: none; }
+        .tab-content.active { display: block; }
+        .region-tab { display: none; }
+        .region-picker { position: relative; margin-left: auto; align-self: center; }
+        .region-search { width: 260px; padding: 8px 12px; border: 1px solid #ccc; border-radius: 6px; font-size: 14px; }
+        .region-list { display: none; position: absolute; right: 0; width: 320px; max-height: 320px; height: 320px; overflow-y: auto; background-color: #fff; border-radius: 6px; box-shadow: 0 5px 15px rgba(0,0,0,0.2); z-index: 500; }
+        .region-list.open { display: block; }
+        .region-list-rows { position: relative; }
+        .region-option { position: absolute; left: 0; right: 0; height: 32px; line-height: 32px; padding: 0 12px; cursor: pointer; white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+        .region-option:hover { background-color: #e8f0fe; }
+        .region-option-count { float: right; margin-left: 10px; color: #888; font-size: 12px; }
+        .role-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 20px; }
+        .role-card { background-color: #fff; border-radius: 8px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); padding: 15px; cursor: pointer; transition: all 0.2s; }
+        .role-card.active { border: 2px solid #007bff; }
+        .role-card.no-data { background-color: #f8f9fa; cursor: not-allowed; }
+        .role-close { font-size: 12px; font-weight: 500; color: #aaa; cursor: pointer; }
+        .role-name { font-size: 16px; font-weight: 500; margin-bottom: 5px; }
+        .role-stats { display: flex; justify-content: space-between; }
+        .stat-label { font-size: 12px; color: #777; }
+        .stat-number, .stat-percentage { font-size: 18px; font-weight: 600; color: #333; }
+        .sparkline { display: block; width: 100%; height: 24px; margin-top: 10px; fill: #007bff; opacity: 0.7; }
+        .role-spread { font-size: 11px; color: #777; margin-top: 4px; }
+        .bucket-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 20px; margin-top: 20px; }
+        .bucket-card { background-color: #fff; border-radius: 8px; box-shadow: 0 2px 5px rgba(0,0,0,0.1); padding: 15px; cursor: pointer; transition: all 0.2s; }
+        .bucket-card.bucket-76-100 { background-color: #ea4335; color: white; }
+        .bucket-card.bucket-51-75 { background-color: #fbbc05; color: white; }
+        .bucket-card.bucket-26-50 { background-color: #34a853; color: white; }
+        .bucket-card.bucket-0-25 { background-color: #808080; color: white; }
+        .bucket-name { font-size: 16px; font-weight: 500; margin-bottom: 5px; }
+        .bucket-count, .bucket-avg { font-size: 14px; font-weight: 500; color: #fff; }
+        .bucket-label { font-size: 12px; color: #ddd; }
+        .no-data { text-align: center; color: #888; font-style: italic; margin: 20px 0; }
+        .associates-modal { display: none; position: fixed; top: 50%; left: 50%; transform: translate(-50%, -50%); width: 80%; max-width: 1000px; background-color: #fff; border-radius: 8px; box-shadow: 0 5px 15px rgba(0,0,0,0.3); z-index: 1000; }
+        .modal-header { display: flex; justify-content: space-between; align-items: center; padding: 15px 20px; border-bottom: 1px solid #e0e0e0; background-color: #f8f9fa; }
+        .modal-title { font-size: 18px; font-weight: 600; color: #333; }
+        .modal-subtitle { font-size: 14px; color: #777; margin-top: 5px; }
+        .modal-close { font-size: 20px; font-weight: 500; cursor: pointer; }
+        .modal-content { max-height: 70vh; overflow-y: auto; padding: 20px; }
+        .associates-table { width: 100%; border-collapse: collapse; margin-top: 15px; }
+        .associates-table th { background-color: #f1f3f4; color: #5f6368; text-align: left; padding: 12px 15px; font-weight: 500; border-bottom: 1px solid #e0e0e0; }
+        .associates-table td { padding: 10px 15px; border-bottom: 1px solid #f0f0f0; }
+        .associates-table tr:last-child td { border-bottom: none; }
+        .associates-table tr:nth-child(even) { background-color: #f9f9f9; }
+        .associates-table tr:hover { background-color: #f0f0f0; }
+        .avail-indicator { display: inline-block; width: 12px; height: 12px; border-radius: 50%; margin-right: 5px; }
+        .avail-76-100 { background-color: #ea4335; }
+        .avail-51-75 { background-color: #fbbc05; }
+        .avail-26-50 { background-color: #34a853; }
+        .avail-0-25 { background-color: #808080; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <div class="header-title">PMS Resource Dashboard</div>
+            <div class="total-box">
+                <div class="total-label">Total:</div>
+                <div class="total-value">{{total}}</div>
+            </div>
+        </div>
+        <div class="tab-container">
+            <div class="tab active" id="overallTab">Overall</div>
+            <div class="tab region-tab" id="regionTab"></div>
+            <div class="region-picker">
+                <input type="search" id="regionSearch" class="region-search" placeholder="Search {{region_count}} regions..." autocomplete="off">
+                <div class="region-list" id="regionList"><div class="region-list-rows" id="regionListRows"></div></div>
+            </div>
+        </div>
+        <div id="tab-overall" class="tab-content active">
+            <div class="role-grid">{{overall_cards}}</div>
+            <div class="bucket-container"></div>
+        </div>
+        <div id="regionPanels"></div>
+        <div id="associatesModal" class="associates-modal">
+            <div class="modal-header">
+                <div class="modal-title" id="modalTitle"></div>
+                <div class="modal-subtitle" id="modalSubtitle"></div>
+                <div class="modal-close" onclick="closeModal()">&times;</div>
+            </div>
+            <div class="modal-content" id="modalBody"></div>
+        </div>
+    </div>
+    <script>
+        // Store the dashboard data
+        const dashboardData = {{dashboard_data}};
+
+        // Display order of the regions and roles (object keys alone would reorder numeric names)
+        const regionNames = {{region_names}};
+        const roleNames = {{role_names}};
+
+        const bucketClasses = {
+            '76-100%': 'bucket-76-100',
+            '51-75%': 'bucket-51-75',
+            '26-50%': 'bucket-26-50',
+            '0-25%': 'bucket-0-25'
+        };
+
+        // Names come from the uploaded file, so escape them before building markup
+        function escapeHtml(value) {
+            return String(value ?? '').replace(/[&<>"']/g, ch => ({
+                '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'
+            })[ch]);
+        }
+
+        // Role card with its availability sparkline (same markup as the server-rendered overall cards)
+        function spreadHTML(entry) {
+            if (!entry.count) return '';
+            const tallest = Math.max(...entry.histogram);
+            const width = 100 / entry.histogram.length;
+            const bars = entry.histogram.map((n, i) => {
+                const height = Math.round(n * 22 / tallest);
+                return `<rect x="${i * width + 0.5}" y="${24 - height}" width="${width - 1}" height="${height}"><title>${i * width}-${(i + 1) * width}%: ${n}</title></rect>`;
+            }).join('');
+            return `<svg class="sparkline" viewBox="0 0 100 24" preserveAspectRatio="none">${bars}</svg>` +
+                `<div class="role-spread">Median ${entry.median}% &middot; P10-P90 ${entry.p10}-${entry.p90}%</div>`;
+        }
+
+        function roleCardHTML(role, entry) {
+            return `
+                <div class="role-card${entry.count === 0 ? ' no-data' : ''}" data-role="${escapeHtml(role)}">
+                    <div class="role-name">${escapeHtml(role)}</div>
+                    <div class="role-stats">
+                        <div>
+                            <div class="stat-number">${entry.count}</div>
+                            <div class="stat-label">Associates</div>
+                        </div>
+                        <div>
+                            <div class="stat-percentage">${entry.avg_availability}%</div>
+                            <div class="stat-label">Avg Availability</div>
+                        </div>
+                    </div>
+                    ${spreadHTML(entry)}
+                </div>`;
+        }
+
+        // Tab switching functionality
+        function showPanel(tab, panel) {
+            document.querySelectorAll('.tab').forEach(t => t.classList.remove('active'));
+            tab.classList.add('active');
+            document.querySelectorAll('.tab-content').forEach(content => content.classList.remove('active'));
+            panel.classList.add('active');
+            panel.querySelector('.bucket-container').innerHTML = '';
+        }
+
+        document.getElementById('overallTab').addEventListener('click', function() {
+            showPanel(this, document.getElementById('tab-overall'));
+        });
+
+        document.getElementById('regionTab').addEventListener('click', function() {
+            selectRegion(Number(this.dataset.index));
+        });
+
+        // A region's role grid is built from dashboardData the first time it is opened
+        const regionPanels = new Map();
+
+        function regionPanel(index) {
+            if (!regionPanels.has(index)) {
+                const region = regionNames[index];
+                const roles = dashboardData.Regions[region].roles;
+                const panel = document.createElement('div');
+                panel.className = 'tab-content';
+                panel.dataset.region = region;
+                panel.innerHTML = `<div class="role-grid">${roleNames.map(role => roleCardHTML(role, roles[role])).join('')}</div>` +
+                    '<div class="bucket-container"></div>';
+                document.getElementById('regionPanels').appendChild(panel);
+                regionPanels.set(index, panel);
+            }
+            return regionPanels.get(index);
+        }
+
+        function selectRegion(index) {
+            const regionTab = document.getElementById('regionTab');
+            regionTab.textContent = regionNames[index];
+            regionTab.dataset.index = index;
+            regionTab.style.display = 'block';
+            showPanel(regionTab, regionPanel(index));
+            closeRegionList();
+        }
+
+        // Searchable region selector; only the rows scrolled into view are in the DOM
+        const REGION_ROW_HEIGHT = 32;
+        const regionSearchNames = regionNames.map(name => name.toLowerCase());
+        const regionList = document.getElementById('regionList');
+        const regionSearch = document.getElementById('regionSearch');
+        let regionMatches = regionNames.map((name, index) => index);
+
+        function renderRegionList() {
+            const rows = document.getElementById('regionListRows');
+            rows.style.height = `${regionMatches.length * REGION_ROW_HEIGHT}px`;
+            if (!regionMatches.length) {
+                rows.innerHTML = '<div class="no-data">No matching regions</div>';
+                return;
+            }
+            const first = Math.floor(regionList.scrollTop / REGION_ROW_HEIGHT);
+            const last = Math.min(regionMatches.length, first + Math.ceil(regionList.clientHeight / REGION_ROW_HEIGHT) + 1);
+            let html = '';
+            for (let i = first; i < last; i++) {
+                const index = regionMatches[i];
+                const region = regionNames[index];
+                html += `<div class="region-option" style="top: ${i * REGION_ROW_HEIGHT}px" data-index="${index}">` +
+                    `<span class="region-option-count">${dashboardData.Regions[region].count}</span>${escapeHtml(region)}</div>`;
+            }
+            rows.innerHTML = html;
+        }
+
+        function openRegionList() {
+            regionList.classList.add('open');
+            renderRegionList();
+        }
+
+        function closeRegionList() {
+            regionList.classList.remove('open');
+        }
+
+        regionSearch.addEventListener('focus', openRegionList);
+        regionSearch.addEventListener('input', function() {
+            const query = this.value.trim().toLowerCase();
+            regionMatches = [];
+            regionSearchNames.forEach((name, index) => {
+                if (name.includes(query)) regionMatches.push(index);
+            });
+            regionList.scrollTop = 0;
+            openRegionList();
+        });
+        regionSearch.addEventListener('keydown', function(event) {
+            if (event.key === 'Enter' && regionMatches.length) {
+                selectRegion(regionMatches[0]);
+                this.blur();
+            } else if (event.key === 'Escape') {
+                closeRegionList();
+                this.blur();
+            }
+        });
+        regionList.addEventListener('scroll', renderRegionList);
+
+        // Cards carry their role and bucket in data attributes; the panel carries the region
+        document.addEventListener('click', function(event) {
+            const option = event.target.closest('.region-option');
+            if (option) {
+                selectRegion(Number(option.dataset.index));
+                return;
+            }
+            if (!event.target.closest('.region-picker')) {
+                closeRegionList();
+            }
+            const roleCard = event.target.closest('.role-card');
+            if (roleCard) {
+                showRoleBuckets(roleCard.closest('.tab-content'), roleCard.dataset.role);
+                return;
+            }
+            const bucketCard = event.target.closest('.bucket-card');
+            if (bucketCard) {
+                showAssociates(bucketCard.closest('.tab-content').dataset.region,
+                               bucketCard.dataset.role, bucketCard.dataset.bucket);
+            }
+        });
+
+        // Role card click to show buckets (region is undefined on the overall tab)
+        function showRoleBuckets(panel, role) {
+            const region = panel.dataset.region;
+            document.querySelectorAll('.role-card').forEach(card => card.classList.remove('active'));
+            panel.querySelectorAll('.role-card').forEach(card => {
+                if (card.dataset.role === role) card.classList.add('active');
+            });
+
+            const roleData = region === undefined ? dashboardData.Roles[role] : dashboardData.Regions[region]?.roles[role];
+            const container = panel.querySelector('.bucket-container');
+
+            if (!roleData || roleData.count === 0) {
+                container.innerHTML = '<div class="no-data">No data available for this selection</div>';
+                return;
+            }
+
+            let bucketsHTML = '<div class="bucket-grid">';
+            const bucketOrder = ['76-100%', '51-75%', '26-50%', '0-25%'];
+
+            for (const bucketName of bucketOrder) {
+                const bucketData = roleData.buckets[bucketName];
+                if (bucketData && bucketData.count > 0) {
+                    bucketsHTML += `
+                        <div class="bucket-card ${bucketClasses[bucketName]}" data-role="${escapeHtml(role)}" data-bucket="${bucketName}">
+                            <div class="bucket-name">${bucketName}</div>
+                            <div class="bucket-count">${bucketData.count}</div>
+                            <div class="bucket-label">Associates</div>
+                            <div class="bucket-avg">${bucketData.avg_availability}%</div>
+                            <div class="bucket-label">Avg Availability</div>
+                        </div>
+                    `;
+                }
+            }
+
+            bucketsHTML += '</div>';
+            container.innerHTML = bucketsHTML;
+        }
+
+        // Show associates in modal
+        function showAssociates(region, role, bucket) {
+            const modal = document.getElementById('associatesModal');
+            const modalTitle = document.getElementById('modalTitle');
+            const modalSubtitle = document.getElementById('modalSubtitle');
+            const modalBody = document.getElementById('modalBody');
+            const overall = region === undefined;
+
+            const bucketData = overall ? dashboardData.Roles[role]?.buckets[bucket]
+                                       : dashboardData.Regions[region]?.roles[role]?.buckets[bucket];
+            const associates = bucketData?.associates || [];
+
+            modalTitle.textContent = `${overall ? 'Overall' : region} - ${role} - ${bucket}`;
+            const count = bucketData?.count || 0;
+            modalSubtitle.textContent = `${count} associates, ${bucketData?.avg_availability || 0}% avg availability`;
+
+            // Summary dashboards only carry the top associates of each cell
+            let summaryNote = '';
+            if (associates.length < count) {
+                summaryNote = `<div class="no-data">Summary view: ${associates.length ? `showing the top ${associates.length} of ${count} associates` : 'associate lists are not included'}. Use the full drill-down file (org tree view) for everyone.</div>`;
+            }
+
+            if (associates.length === 0) {
+                modalBody.innerHTML = summaryNote || '<div class="no-data">No associates found</div>';
+            } else {
+                let tableHTML = `
+                    <table class="associates-table">
+                        <thead>
+                            <tr>
+                                <th>Associate ID</th>
+                                <th>Associate Name</th>
+                                <th>Availability</th>`;
+
+                if (overall) {
+                    tableHTML += '<th>Region</th>';
+                }
+
+                if (role === 'Total') {
+                    tableHTML += '<th>Role</th>';
+                }
+
+                tableHTML += `
+                            </tr>
+                        </thead>
+                        <tbody>`;
+
+                // Associates arrive sorted by availability (descending) then name
+                associates.forEach(associate => {
+                    const availability = associate['Current Availability'];
+                    let availClass = '';
+
+                    if (availability >= 76) availClass = 'avail-76-100';
+                    else if (availability >= 51) availClass = 'avail-51-75';
+                    else if (availability >= 26) availClass = 'avail-26-50';
+                    else availClass = 'avail-0-25';
+
+                    tableHTML += `
+                        <tr>
+                            <td>${escapeHtml(associate['Associate ID'] || 'N/A')}</td>
+                            <td>${escapeHtml(associate['Associate Name'] || 'N/A')}</td>
+                            <td>
+                                <span class="avail-indicator ${availClass}"></span>
+                                ${availability}%
+                            </td>`;
+
+                    if (overall) {
+                        tableHTML += `<td>${escapeHtml(associate['Region'] || 'N/A')}</td>`;
+                    }
+
+                    if (role === 'Total') {
+                        tableHTML += `<td>${escapeHtml(associate['Mapped_Role'] || 'N/A')}</td>`;
+                    }
+
+                    tableHTML += '</tr>';
+                });
+
+                tableHTML += '</tbody></table>';
+                modalBody.innerHTML = tableHTML + summaryNote;
+            }
+
+            modal.style.display = 'block';
+        }
+
+        // Close modal
+        function closeModal() {
+            document.getElementById('associatesModal').style.display = 'none';
+        }
+
+        // Close modal when clicking outside
+        window.onclick = function(event) {
+            const modal = document.getElementById('associatesModal');
+            if (event.target === modal) {
+                modal.style.display = 'none';
+            }
+        };
+
+        // Initialize
+        document.addEventListener('DOMContentLoaded', function() {
+            document.getElementById('overallTab').click();
+            showRoleBuckets(document.getElementById('tab-overall'), 'Total');
+        });
+    </script>
+</body>
+</html>
+"""
+
+TABBED_PAGE = _compile_template(TABBED_PAGE_HTML)
+
+# One role card; region and role names are escaped before formatting
+ROLE_CARD_HTML = '''
+<div class="role-card{no_data}" data-role="{role}">
+    <div class="role-name">{role}</div>
+    <div class="role-stats">
+        <div>
+            <div class="stat-number">{count}</div>
+            <div class="stat-label">Associates</div>
+        </div>
+        <div>
+            <div class="stat-percentage">{avg}%</div>
+            <div class="stat-label">Avg Availability</div>
+        </div>
+    </div>
+    {spread}
+</div>'''
+
+
+def _role_cards_html(roles, entries):
+    """Role cards of one tab; names are escaped, numbers come from the aggregate"""
+    cards = []
+    for role in roles:
+        entry = entries[role]
+        cards.append(ROLE_CARD_HTML.format(
+            no_data=' no-data' if entry['count'] == 0 else '',
+            role=html_escape(role),
+            count=entry['count'],
+            avg=entry['avg_availability'],
+            spread=_spread_html(entry),
+        ))
+    return ''.join(cards)
+
+
+@register_renderer('summary')
+def render_summary(prepared, top_n=0):
+    """
+    Render the tabbed dashboard with counts and averages only (plus at most
+    top_n associates per cell), so the page size does not grow with headcount.
+    The org tree view or the exports provide the full drill-down.
+    """
+    return render_tabbed(prepared, top_n=top_n)
+
+
+@register_renderer('tabbed')
+def render_tabbed(prepared, top_n=None):
+    """
+    Render the tabbed Region -> Role -> Bucket dashboard from a prepared dataset.
+
+    The page shell is compiled once at import; only the header totals and
+    the overall role cards are rendered per call, with every role name
+    HTML-escaped. Regions are picked from a searchable list in the page and
+    a region's role grid is built from dashboardData when it is first opened,
+    so the initial DOM does not grow with the number of regions.
+
+    Args:
+        prepared: PreparedDataset from pms_core.prepare_dataset
+        top_n: Embed only the top_n associates of each cell (see render_summary);
+            None embeds every associate
+
+    Returns:
+        HTML string of the visualization
+    """
+    if prepared.empty:
+        return EMPTY_DASHBOARD_HTML
+
+    dashboard_data = _build_dashboard_data(prepared, top_n=top_n)
+    steps = _dashboard_steps(prepared)
+    checkpoint(steps - 1, steps)
+    return _fill_template(
+        TABBED_PAGE,
+        total=f"{prepared.total_count} Associates, {prepared.total_avg_availability}% Avg Availability",
+        region_count=str(len(prepared.regions)),
+        overall_cards=_role_cards_html(prepared.roles, dashboard_data['Roles']),
+        region_names=_dump_script_json(list(prepared.regions)),
+        role_names=_dump_script_json(list(prepared.roles)),
+        dashboard_data=_dump_script_json(dashboard_data),
+    )
+
+
+@dataclass(frozen=True)
+class DashboardPlan:
+    """
+    How a dashboard page is rendered so that it fits the byte budget.
+
+    Attributes:
+        strategy: 'full' (as requested), 'truncated' (fewer associates per
+            cell), 'summary' (counts only) or 'download' (too large to embed
+            even as a summary; offered as a file instead)
+        top_n: Associates embedded per cell (None for every associate)
+        estimated_bytes: Estimated size of the page that will be rendered
+        requested_bytes: Estimated size of the page as requested
+        budget: Byte budget the plan was made for
+    """
+    strategy: str
+    top_n: object
+    estimated_bytes: int
+    requested_bytes: int
+    budget: int
+
+    @property
+    def embed(self):
+        return self.strategy != 'download'
+
+    @property
+    def view(self):
+        return 'tabbed' if self.top_n is None else 'summary'
+
+
+def _json_lengths(values):
+    """Length of each string as written by _dump_script_json, quotes excluded"""
+    values = values.astype(str)
+    lengths = values.str.len().to_numpy(dtype=np.int64, copy=True)
+    escaped = values.str.contains(ESCAPED_CHARS).to_numpy(dtype=bool)
+    if escaped.any():
+        subset = values[escaped]
+        for pattern, extra in JSON_ESCAPE_COSTS:
+            lengths[escaped] += extra * subset.str.count(pattern).to_numpy(dtype=np.int64)
+    return lengths
+
+
+def _record_bytes(columns, lengths):
+    """JSON size of each row's associate record as embedded in the page, list comma included"""
+    empty = _dump_script_json({column: '' for column in columns})
+    sizes = np.full(len(lengths[columns[0]]), len(empty) + 1 - 2, dtype=np.int64)    # availability is a number
+    for column in columns:
+        sizes += lengths[column]
+    return sizes
+
+
+def dashboard_size_model(prepared):
+    """
+    Estimate the tabbed page size for any number of embedded associates without rendering it.
+
+    Every associate is listed four times: under its role and under Total, on
+    the overall tab and in its region. Per grouping, the record sizes are summed
+    by rank within the cell, so the estimate for any top_n is a lookup.
+
+    Returns:
+        Callable(top_n) -> estimated bytes; top_n None embeds every associate
+    """
+    frame = prepared.frame
+    names = len(_dump_script_json(list(prepared.regions))) * (len(prepared.roles) + 2)
+    fixed = (sum(len(literal) for literal in TABBED_PAGE[0]) + names
+             + len(prepared.roles) * ROLE_CARD_BYTES
+             + (len(prepared.regions) + 1) * len(prepared.roles) * ROLE_ENTRY_BYTES)
+
+    # Escaped value lengths, counted once per column for both record layouts
+    lengths = {column: _json_lengths(frame[column]) for column in OVERALL_ASSOCIATE_COLUMNS}
+    overall = _record_bytes(OVERALL_ASSOCIATE_COLUMNS, lengths)
+    region = _record_bytes(REGION_ASSOCIATE_COLUMNS, lengths)
+    cumulative = []
+    for keys, sizes in ((['Bucket'], overall), (['Mapped_Role', 'Bucket'], overall),
+                        (['Region', 'Bucket'], region), (['Region', 'Mapped_Role', 'Bucket'], region)):
+        rank = frame.groupby(keys, observed=True, sort=False).cumcount().to_numpy()
+        cumulative.append(np.cumsum(np.bincount(rank, weights=sizes, minlength=1)))
+
+    def estimate(top_n=None):
+        total = fixed
+        for by_rank in cumulative:
+            if top_n is None:
+                total += by_rank[-1]
+            elif top_n > 0:
+                total += by_rank[min(top_n, len(by_rank)) - 1]
+        return int(total)
+
+    return estimate
+
+
+def plan_dashboard(prepared, top_n=None, budget=DASHBOARD_BYTE_BUDGET):
+    """
+    Pick the most detailed page that fits the byte budget.
+
+    The requested page is kept when its estimate fits. Otherwise the largest
+    number of associates per cell that fits is used, then a counts-only
+    summary, and when even that is too large the page is only offered as a
+    download.
+
+    Args:
+        prepared: PreparedDataset from pms_core.prepare_dataset
+        top_n: Requested associates per cell (None for every associate)
+        budget: Page size limit in bytes
+
+    Returns:
+        DashboardPlan
+    """
+    estimate = dashboard_size_model(prepared)
+    requested = estimate(top_n)
+    if requested <= budget:
+        return DashboardPlan('full', top_n, requested, requested, budget)
+
+    # Largest top_n below the requested one that still fits (the estimate grows with top_n)
+    low, high = 0, (len(prepared.frame) if top_n is None else top_n) - 1
+    while low < high:
+        middle = (low + high + 1) // 2
+        if estimate(middle) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    if low > 0:
+        return DashboardPlan('truncated', low, estimate(low), requested, budget)
+
+    summary = estimate(0)
+    strategy = 'summary' if summary <= budget else 'download'
+    return DashboardPlan(strategy, 0, summary, requested, budget)
+
+
+def format_bytes(size):
+    """Human-readable size such as '12.3 MB'"""
+    if size < 1024:
+        return f"{size} bytes"
+    if size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def plan_message(plan):
+    """Explain a degraded plan to the user (None when the page is rendered as requested)"""
+    if plan.strategy == 'full':
+        return None
+    over = (f"The requested dashboard is estimated at {format_bytes(plan.requested_bytes)}, "
+            f"over the {format_bytes(plan.budget)} page budget. ")
+    if plan.strategy == 'truncated':
+        return over + (f"Showing the top {plan.top_n} associates per cell instead "
+                       f"(about {format_bytes(plan.estimated_bytes)}).")
+    if plan.strategy == 'summary':
+        return over + f"Showing counts only (about {format_bytes(plan.estimated_bytes)})."
+    return over + (f"Even the counts-only page (about {format_bytes(plan.estimated_bytes)}) is too large "
+                   "to display here; download it instead.")
@@ -1,41 +1,59 @@
 # from allocation_script import data_use
-import pandas as pd
+import argparse
 import os
 import json
 import re
+import sys
+from html import escape as html_escape
 
-def generate_pms_visualization(file_path=None, dataframe=None):
+# pandas (through pms_core/pms_export) is imported inside the functions that
+# need it, so --help and rendering a saved tree snapshot start quickly
+from pms_base import BUCKETS, CONSOLIDATION_POLICIES, _dump_script_json, checkpoint, register_renderer, render
+
+# Nesting of the --json aggregate: the org tree's, which groups by the role as written in the file
+DATA_HIERARCHY = ['Current Role', 'Region', 'Bucket']
+
+# Marker and version written into saved tree snapshots
+TREE_SNAPSHOT_FORMAT = 'pms-tree-snapshot'
+TREE_SNAPSHOT_VERSION = 1
+
+def generate_pms_visualization(file_path=None, dataframe=None, prepared=None):
     # """
     # Generate an interactive HTML visualization from Excel data.
     
     # Args:
     #     file_path: Path to the Excel file (optional if dataframe is provided)
     #     dataframe: Pre-loaded pandas DataFrame (optional if file_path is provided)
+    #     prepared: PreparedDataset from pms_core.prepare_dataset, skips loading and cleaning
     
     # Returns:
     #     HTML string of the visualization
     # """
-    # Load data either from file or use provided dataframe
-    if dataframe is not None:
-        df = dataframe
-    elif file_path is not None:
-        df = pd.read_excel(file_path, engine='openpyxl')
-    else:
-        raise ValueError("Either file_path or dataframe must be provided")
-    
-    # Clean column names to handle any whitespace issues
-    df.columns = df.columns.str.strip()
-    
-    # Filter out associates with 0% availability first
-    if 'Current Availability' in df.columns:
-        df['Current Availability'] = df['Current Availability'].apply(
-            lambda x: int(float(str(x).replace('%', ''))) if pd.notnull(x) else 0
-        )
-        # Remove rows with 0 availability
-        df = df[df['Current Availability'] > 0]
-        
+    # Load and clean the data once through the shared core
+    if prepared is None:
+        from pms_core import prepare_dataset
+        prepared = prepare_dataset(file_path=file_path, dataframe=dataframe)
+    return render(prepared, 'tree')
+
+@register_renderer('tree')
+def render_tree(prepared):
+    """Render the Role -> Region -> Bucket org tree from a prepared dataset"""
+    tree_data = _build_tree_data(prepared)
+    checkpoint(2, 3)
+    return render_tree_page(tree_data)
+
+def render_tree_page(tree_data):
+    """
+    Render the org tree page from its compact tree data.
+
+    Only needs the standard library, so a saved tree snapshot (see
+    save_tree_snapshot) renders without loading pandas or the workbook.
+
+    Args:
+        tree_data: Structure built by _build_tree_data
+    """
     # If no data after filtering, return early with empty visualization
-    if df.empty:
+    if not any(role['regions'] for role in tree_data['roles']):
         return """
         <!DOCTYPE html>
         <html lang="en">
@@ -60,81 +78,6 @@ def generate_pms_visualization(file_path=None, dataframe=None):
         </html>
         """
     
-    # Get all possible values for each category to ensure we include empty buckets
-    all_roles = sorted(df['Current Role'].unique())
-    all_regions = sorted(df['Region'].unique())
-    all_buckets = ['76-100%', '51-75%', '26-50%', '0-25%']  # Fixed order for buckets
-    
-    # Create hierarchical structure
-    data_dict = {
-        'name': 'PMS',
-        'children': {}
-    }
-    
-    # Create a dynamic structure based on actual data rather than all combinations
-    # We'll populate it as we process the data
-    for role in all_roles:
-        if role not in data_dict['children']:
-            data_dict['children'][role] = {'name': role, 'children': {}}
-            
-        for region in all_regions:
-            if region not in data_dict['children'][role]['children']:
-                data_dict['children'][role]['children'][region] = {'name': region, 'children': {}}
-                
-            # We don't pre-create buckets - they'll be added only when needed
-    
-    # Now populate with actual data
-    for _, row in df.iterrows():
-        try:
-            role = str(row['Current Role']).strip()
-            region = str(row['Region']).strip()
-            
-            # Handle availability and bucket
-            availability = 0
-            if 'Current Availability' in row and pd.notnull(row['Current Availability']):
-                availability = int(float(str(row['Current Availability']).replace('%', '')))
-            
-            # Determine which bucket the availability falls into
-            bucket = ''
-            if availability >= 76:
-                bucket = '76-100%'
-            elif availability >= 51:
-                bucket = '51-75%'
-            elif availability >= 26:
-                bucket = '26-50%'
-            else:
-                bucket = '0-25%'
-                
-            # Extract associate details (safely handling potential missing values)
-            associate_id = str(row.get('Associate ID', '')).strip() if pd.notnull(row.get('Associate ID', '')) else ''
-            associate_name = str(row.get('Associate Name', '')).strip() if pd.notnull(row.get('Associate Name', '')) else ''
-            
-            # Skip associates with 0% availability
-            if availability == 0:
-                continue
-                
-            # Add associate details as an object for the table
-            associate_info = {
-                'id': associate_id,
-                'name': associate_name,
-                'availability': availability
-            }
-            
-            # Only add associate if we have valid role, region and bucket
-            if role and region and bucket:
-                # Create the bucket if it doesn't exist
-                if bucket not in data_dict['children'][role]['children'][region]['children']:
-                    data_dict['children'][role]['children'][region]['children'][bucket] = {
-                        'name': bucket,
-                        'children': {},
-                        'associates': []
-                    }
-                
-                data_dict['children'][role]['children'][region]['children'][bucket]['associates'].append(associate_info)
-                
-        except Exception as e:
-            print(f"Error processing row: {row}, Error: {e}")
-    
     # Generate HTML
     html = """
     <!DOCTYPE html>
@@ -454,38 +397,140 @@ def generate_pms_visualization(file_path=None, dataframe=None):
             <div class="org-tree">
     """
     
-    # Build the tree structure recursively
-    html += _build_tree_html(data_dict)
+    # Only the root and role nodes are written as markup; everything below a
+    # role is created in the browser from treeData the first time it is expanded
+    html += _build_tree_html([role['name'] for role in tree_data['roles']])
     
     html += """
             </div>
         </div>
         <script>
+            // Compact tree data: regions are listed once, roles only carry the
+            // regions/buckets that actually have associates
+            var treeData = """ + _dump_script_json(tree_data) + """;
+            
+            var bucketClasses = {
+                "76-100%": "bucket-high",
+                "51-75%": "bucket-medium",
+                "26-50%": "bucket-low",
+                "0-25%": "bucket-very-low"
+            };
+            
+            function availClass(avail) {
+                if (avail >= 76) return "avail-high";
+                if (avail >= 51) return "avail-medium";
+                if (avail >= 26) return "avail-low";
+                return "avail-very-low";
+            }
+            
+            function makeNode(className, label) {
+                var li = document.createElement("li");
+                var node = document.createElement("div");
+                node.className = "node " + className;
+                var icon = document.createElement("span");
+                icon.className = "toggle-icon";
+                icon.textContent = "+";
+                node.appendChild(icon);
+                node.appendChild(document.createTextNode(label));
+                li.appendChild(node);
+                return li;
+            }
+            
+            function makeEmptyState(message) {
+                var div = document.createElement("div");
+                div.className = "empty-state";
+                div.textContent = message;
+                return div;
+            }
+            
+            function buildRoleChildren(role) {
+                var ul = document.createElement("ul");
+                ul.className = "nested";
+                treeData.regions.forEach(function(region) {
+                    var li = makeNode("node-region", region);
+                    li._treeBuild = function() { return buildRegionChildren(role.regions[region] || {}); };
+                    ul.appendChild(li);
+                });
+                return ul;
+            }
+            
+            function buildRegionChildren(buckets) {
+                var ul = document.createElement("ul");
+                ul.className = "nested";
+                var found = false;
+                treeData.buckets.forEach(function(bucket) {
+                    var associates = buckets[bucket];
+                    if (!associates || associates.length === 0) return;
+                    found = true;
+                    var li = makeNode("node-bucket " + bucketClasses[bucket], bucket);
+                    li._treeBuild = function() { return buildAssociateTable(associates); };
+                    ul.appendChild(li);
+                });
+                if (!found) {
+                    var li = document.createElement("li");
+                    li.appendChild(makeEmptyState("No associates found in any availability bucket"));
+                    ul.appendChild(li);
+                }
+                return ul;
+            }
+            
+            function buildAssociateTable(associates) {
+                var div = document.createElement("div");
+                div.className = "nested";
+                var table = document.createElement("table");
+                table.className = "associates-table";
+                var thead = table.createTHead().insertRow();
+                ["Associate ID", "Associate Name", "Current Availability"].forEach(function(title) {
+                    var th = document.createElement("th");
+                    th.textContent = title;
+                    thead.appendChild(th);
+                });
+                var tbody = table.createTBody();
+                associates.forEach(function(associate) {
+                    var row = tbody.insertRow();
+                    row.insertCell().textContent = associate[0];
+                    row.insertCell().textContent = associate[1];
+                    var cell = row.insertCell();
+                    var indicator = document.createElement("span");
+                    indicator.className = "availability-indicator " + availClass(associate[2]);
+                    cell.appendChild(indicator);
+                    cell.appendChild(document.createTextNode(associate[2] + "%"));
+                });
+                div.appendChild(table);
+                return div;
+            }
+            
             document.addEventListener("DOMContentLoaded", function() {
-                // Add event listeners to all nodes
-                var nodes = document.querySelectorAll(".node");
-                nodes.forEach(function(node) {
-                    node.addEventListener("click", function(event) {
-                        // Prevent event from bubbling up
-                        event.stopPropagation();
+                var roleNodes = document.querySelectorAll(".node-role");
+                roleNodes.forEach(function(node) {
+                    var role = treeData.roles[parseInt(node.parentElement.getAttribute("data-role-index"), 10)];
+                    node.parentElement._treeBuild = function() { return buildRoleChildren(role); };
+                });
+                
+                // A single delegated listener handles nodes created later on
+                document.querySelector(".org-tree").addEventListener("click", function(event) {
+                    var node = event.target.closest(".node");
+                    if (!node) return;
+                    event.stopPropagation();
+                    
+                    // Create the children on first expand
+                    var parent = node.parentElement;
+                    if (parent._treeBuild) {
+                        parent.appendChild(parent._treeBuild());
+                        parent._treeBuild = null;
+                    }
+                    
+                    // Toggle visibility of child elements
+                    var nested = parent.querySelector(".nested");
+                    if (nested) {
+                        nested.classList.toggle("active");
                         
-                        // Toggle visibility of child elements
-                        var parent = this.parentElement;
-                        var nested = parent.querySelector(".nested");
-                        if (nested) {
-                            nested.classList.toggle("active");
-                            
-                            // Toggle icon
-                            var icon = this.querySelector(".toggle-icon");
-                            if (icon) {
-                                if (nested.classList.contains("active")) {
-                                    icon.innerHTML = "−";
-                                } else {
-                                    icon.innerHTML = "+";
-                                }
-                            }
+                        // Toggle icon
+                        var icon = node.querySelector(".toggle-icon");
+                        if (icon) {
+                            icon.innerHTML = nested.classList.contains("active") ? "−" : "+";
                         }
-                    });
+                    }
                 });
                 
                 // Expand root node by default
@@ -501,156 +546,262 @@ def generate_pms_visualization(file_path=None, dataframe=None):
     
     return html
 
-def _build_tree_html(node, level=0):
-    """Helper function to recursively build the HTML tree"""
-    if level == 0:
-        # Root node (PMS)
-        html = '<ul><li><div class="node node-root"><span class="toggle-icon">+</span>PMS</div><ul class="nested">'
-        
-        # Sort the roles for consistent display
-        sorted_roles = sorted(node['children'].keys())
-        for role in sorted_roles:
-            html += _build_tree_html(node['children'][role], level+1)
-            
-        html += '</ul></li></ul>'
-    elif level == 1:
-        # Role level
-        html = f'<li><div class="node node-role"><span class="toggle-icon">+</span>{node["name"]}</div><ul class="nested">'
-        
-        # Sort the regions
-        sorted_regions = sorted(node['children'].keys())
-        for region in sorted_regions:
-            html += _build_tree_html(node['children'][region], level+1)
-            
-        html += '</ul></li>'
-    elif level == 2:
-        # Region level
-        html = f'<li><div class="node node-region"><span class="toggle-icon">+</span>{node["name"]}</div><ul class="nested">'
-        
-        # Sort buckets in specified order: '76-100%', '51-75%', '26-50%', '0-25%'
-        def bucket_sort_key(bucket):
-            if '76-100%' in bucket:
-                return 0
-            elif '51-75%' in bucket:
-                return 1
-            elif '26-50%' in bucket:
-                return 2
-            elif '0-25%' in bucket:
-                return 3
-            else:
-                return 4
-        
-        # Only include buckets that have associates
-        non_empty_buckets = []
-        for bucket, bucket_data in node['children'].items():
-            if bucket_data.get('associates', []):
-                non_empty_buckets.append(bucket)
-                
-        sorted_buckets = sorted(non_empty_buckets, key=bucket_sort_key)
-        
-        # Check if there are any non-empty buckets
-        if sorted_buckets:
-            for bucket in sorted_buckets:
-                html += _build_tree_html(node['children'][bucket], level+1)
-        else:
-            # Add an empty state message if no associates in any bucket
-            html += '<li><div class="empty-state">No associates found in any availability bucket</div></li>'
-            
-        html += '</ul></li>'
-    elif level == 3:
-        # Bucket level with table of associates
-        # Add appropriate CSS class based on bucket percentage
-        bucket_class = "node-bucket "
-        if '76-100%' in node['name']:
-            bucket_class += "bucket-high"
-        elif '51-75%' in node['name']:
-            bucket_class += "bucket-medium"
-        elif '26-50%' in node['name']:
-            bucket_class += "bucket-low"
-        elif '0-25%' in node['name']:
-            bucket_class += "bucket-very-low"
-        
-        html = f'<li><div class="node {bucket_class}"><span class="toggle-icon">+</span>{node["name"]}</div>'
-        
-        # Add nested content with improved table
-        html += '<div class="nested">'
-        
-        # Sort associates by availability (descending)
-        sorted_associates = sorted(
-            node.get('associates', []), 
-            key=lambda x: (
-                -float(x.get('availability', 0)),
-                x.get('name', '')
-            )
+def _build_tree_data(prepared):
+    """
+    Build the compact structure embedded in the page from a prepared dataset.
+
+    Only regions and buckets that contain associates are kept under each role;
+    the browser fills in the empty regions from the shared region list.
+    Associates are emitted as [id, name, availability] triples.
+    """
+    frame = prepared.frame
+    triples = frame[['Associate ID', 'Associate Name', 'Current Availability']].values.tolist()
+    groups = frame.groupby(['Current Role', 'Region', 'Bucket'], observed=True, sort=True).indices
+    checkpoint(1, 3)
+
+    # The prepared frame is already sorted by availability then name, so each
+    # group's rows come out in display order
+    regions_by_role = {role: {} for role in prepared.raw_roles}
+    for (role, region, bucket), rows in groups.items():
+        regions_by_role[role].setdefault(region, {})[bucket] = [triples[i] for i in rows]
+
+    return {
+        'regions': list(prepared.regions),
+        'buckets': BUCKETS,
+        'roles': [{'name': role, 'regions': regions_by_role[role]} for role in prepared.raw_roles]
+    }
+
+def save_tree_snapshot(prepared, path):
+    """
+    Save the tree data of a prepared dataset, so the page can be rendered again
+    later (render_tree_snapshot) without re-reading the workbook.
+
+    Args:
+        prepared: PreparedDataset from pms_core.prepare_dataset
+        path: Path of the .json snapshot
+    """
+    snapshot = {'format': TREE_SNAPSHOT_FORMAT, 'version': TREE_SNAPSHOT_VERSION, 'tree': _build_tree_data(prepared)}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, separators=(',', ':'))
+
+def load_tree_snapshot(path):
+    """Read the tree data of a snapshot written by save_tree_snapshot"""
+    with open(path, encoding='utf-8') as f:
+        try:
+            snapshot = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path} is not a tree snapshot: {e}") from None
+    if not isinstance(snapshot, dict) or snapshot.get('format') != TREE_SNAPSHOT_FORMAT:
+        raise ValueError(f"{path} is not a tree snapshot")
+    if snapshot.get('version') != TREE_SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported tree snapshot version: {snapshot.get('version')}")
+    return snapshot['tree']
+
+def render_tree_snapshot(path):
+    """
+    Render the org tree page of a saved snapshot and write it next to it.
+
+    Returns:
+        Path of the generated HTML file
+    """
+    html = render_tree_page(load_tree_snapshot(path))
+    output_file = os.path.splitext(path)[0] + '_ImprovedTree.html'
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(html)
+    print(f"Visualization saved to: {output_file}")
+    return output_file
+
+def _build_tree_html(roles):
+    """Build the initial tree markup: the root node and one collapsed node per role"""
+    html = '<ul><li><div class="node node-root"><span class="toggle-icon">+</span>PMS</div><ul class="nested">'
+    
+    # The index of each role matches treeData.roles
+    for index, role in enumerate(roles):
+        html += (
+            f'<li data-role-index="{index}"><div class="node node-role">'
+            f'<span class="toggle-icon">+</span>{html_escape(role)}</div></li>'
         )
         
-        if sorted_associates:
-            # Create an improved table for associates with proper formatting
-            html += '''
-            <table class="associates-table">
-                <thead>
-                    <tr>
-                        <th>Associate ID</th>
-                        <th>Associate Name</th>
-                        <th>Current Availability</th>
-                    </tr>
-                </thead>
-                <tbody>
-            '''
-            
-            for associate in sorted_associates:
-                # Determine availability class for the indicator
-                avail_class = ""
-                avail = float(associate.get('availability', 0))
-                if avail >= 76:
-                    avail_class = "avail-high"
-                elif avail >= 51:
-                    avail_class = "avail-medium"
-                elif avail >= 26:
-                    avail_class = "avail-low"
-                else:
-                    avail_class = "avail-very-low"
-                
-                # Generate table row with associate details
-                html += f'''
-                <tr>
-                    <td>{associate.get('id', '')}</td>
-                    <td>{associate.get('name', '')}</td>
-                    <td><span class="availability-indicator {avail_class}"></span>{associate.get('availability', 0)}%</td>
-                </tr>
-                '''
-            
-            html += '''
-                </tbody>
-            </table>
-            '''
-        else:
-            # Display empty state message
-            html += '<div class="empty-state">No associates in this bucket</div>'
-        
-        html += '</div></li>'
-    
+    html += '</ul></li></ul>'
     return html
 
-def process_excel_file(file_path):
-    """Process an Excel file and generate visualization"""
-    html = generate_pms_visualization(file_path=file_path)
+def process_excel_file(file_path, export_path=None, region=None, role=None, bucket=None, consolidate=None,
+                       workers=None, prepared=None, snapshot_path=None):
+    """
+    Process an Excel file and generate visualization.
+
+    Args:
+        file_path: Path to the Excel file
+        export_path: Optional .csv/.xlsx path for the associates of one cell,
+            or of the whole Region x Role x Bucket breakdown without filters
+        region, role, bucket: Cell filters for the export (role is the mapped
+            role shown on the dashboard cards)
+        consolidate: Optional split-allocation policy ('sum', 'max' or 'primary')
+        workers: Number of processes for aggregating very large rosters
+        prepared: Optional PreparedDataset of file_path, skips re-reading the file
+        snapshot_path: Optional .json path to also save the tree snapshot to
+
+    Returns:
+        Path of the generated HTML file
+    """
+    if prepared is None:
+        from pms_core import prepare_dataset
+        prepared = prepare_dataset(file_path=file_path, consolidate=consolidate, workers=workers)
+    html = generate_pms_visualization(prepared=prepared)
     
     # Save the HTML to a file
     output_file = os.path.splitext(file_path)[0] + '_ImprovedTree.html'
     with open(output_file, 'w', encoding='utf-8') as f:
         f.write(html)
     
+    # Report skipped rows once instead of printing each one
+    if not prepared.errors.empty:
+        errors_file = os.path.splitext(file_path)[0] + '_ValidationErrors.csv'
+        prepared.errors.to_csv(errors_file, index=False)
+        print(f"Skipped {prepared.errors['Row'].nunique()} invalid rows, see: {errors_file}")
+    
+    if prepared.merged_rows:
+        print(f"Merged {prepared.merged_rows} split-allocation rows ({consolidate})")
+    
     print(f"Visualization saved to: {output_file}")
+    
+    if snapshot_path:
+        save_tree_snapshot(prepared, snapshot_path)
+        print(f"Tree snapshot saved to: {snapshot_path}")
+    
+    if export_path:
+        from pms_export import export_associates
+        count = export_associates(prepared, export_path, region=region, role=role, bucket=bucket)
+        print(f"Exported {count} associates to: {export_path}")
+    
     return output_file
 
+def write_data_outputs(prepared, json_path=None, ndjson_path=None):
+    """
+    Write the aggregate and/or the per-associate assignments for other tools.
+
+    Args:
+        prepared: PreparedDataset from pms_core.prepare_dataset
+        json_path: Path for the Current Role -> Region -> Bucket aggregate
+            (as in the org tree) as compact JSON, or '-' for stdout
+        ndjson_path: Path for one JSON line per associate (id, name,
+            availability, role, mapped_role, region, bucket), or '-' for stdout
+    """
+    if json_path:
+        aggregate = render(prepared, 'drilldown', dimensions=DATA_HIERARCHY)
+        if json_path == '-':
+            sys.stdout.write(aggregate + '\n')
+            sys.stdout.flush()
+        else:
+            with open(json_path, 'w', encoding='utf-8') as f:
+                f.write(aggregate)
+            print(f"Aggregate saved to: {json_path}", file=sys.stderr)
+
+    if ndjson_path:
+        from pms_export import write_assignments
+        count = write_assignments(prepared, sys.stdout if ndjson_path == '-' else ndjson_path)
+        if ndjson_path != '-':
+            print(f"Streamed {count} associate assignments to: {ndjson_path}", file=sys.stderr)
+
+def main(argv=None):
+    """Command line entry point"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'query':
+        from pms_query import main as query_main
+        return query_main(argv[1:])
+    
+    parser = argparse.ArgumentParser(
+        description="Generate the PMS org tree visualization from an Excel file.",
+        epilog="Example: python pms_visualization.py path/to/excel_file.xlsx --export EMEA_PM.xlsx "
+               "--region EMEA --role PM --bucket 76-100%\n"
+               "         python pms_visualization.py path/to/excel_file.xlsx --json aggregate.json --ndjson -\n"
+               "         python pms_visualization.py path/to/excel_file.xlsx --save-snapshot tree.json\n"
+               "         python pms_visualization.py tree.json\n"
+               "         python pms_visualization.py --watch path/to/drop_folder\n"
+               "         python pms_visualization.py query path/to/excel_file.xlsx --demand PM:APAC:60:12",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('file_path', nargs='?',
+                        help="Path to the Excel file, or to a .json tree snapshot to render without re-reading it")
+    parser.add_argument('--export', metavar='PATH',
+                        help="Also write associates to a .csv or .xlsx file (whole breakdown unless filtered)")
+    parser.add_argument('--region', help="Export only this region")
+    parser.add_argument('--role', help="Export only this role (PGM, PM, SCRUM, TPDL, ...)")
+    parser.add_argument('--bucket', choices=BUCKETS, help="Export only this availability bucket")
+    parser.add_argument('--consolidate', choices=CONSOLIDATION_POLICIES,
+                        help="Merge associates that appear on several allocation rows")
+    parser.add_argument('--workers', type=int,
+                        help="Aggregate large rosters across this many processes")
+    parser.add_argument('--json', metavar='PATH',
+                        help="Write the Current Role > Region > Bucket aggregate of the org tree as compact JSON "
+                             "instead of HTML ('-' for stdout)")
+    parser.add_argument('--ndjson', metavar='PATH',
+                        help="Stream one JSON line per associate (id, name, availability, role, mapped_role, "
+                             "region, bucket) instead of HTML ('-' for stdout)")
+    parser.add_argument('--save-snapshot', metavar='PATH',
+                        help="Also save the tree data as a .json snapshot that renders quickly later")
+    parser.add_argument('--watch', metavar='DIR',
+                        help="Keep running and regenerate the dashboard of every workbook added to or changed in DIR")
+    parser.add_argument('--interval', type=float, default=2.0,
+                        help="Seconds between folder scans in --watch mode (default: 2)")
+    parser.add_argument('--jobs', type=int, default=2,
+                        help="Workbooks regenerated at the same time in --watch mode (default: 2)")
+    args = parser.parse_args(argv)
+    
+    if (args.region or args.role or args.bucket) and not args.export:
+        parser.error("--region, --role and --bucket require --export")
+    
+    if args.watch:
+        if args.file_path or args.export or args.json or args.ndjson or args.save_snapshot:
+            parser.error("--watch cannot be combined with a file path, --export, --json, --ndjson or --save-snapshot")
+        from pms_watch import FolderWatcher
+        
+        def regenerate(file_path, prepared):
+            return process_excel_file(file_path, consolidate=args.consolidate, prepared=prepared)
+        
+        FolderWatcher(args.watch, regenerate, interval=args.interval, settle=args.interval,
+                      jobs=args.jobs, consolidate=args.consolidate).run_forever()
+        return
+    
+    if not args.file_path:
+        parser.error("a file path or --watch DIR is required")
+    
+    # Fast path: a saved snapshot is rendered without pandas or the workbook
+    if args.file_path.lower().endswith('.json'):
+        if args.export or args.json or args.ndjson or args.save_snapshot or args.consolidate or args.workers:
+            parser.error("a tree snapshot can only be rendered to HTML")
+        try:
+            render_tree_snapshot(args.file_path)
+        except ValueError as e:
+            parser.error(str(e))
+        return
+    
+    from pms_core import prepare_dataset
+    
+    if args.json or args.ndjson:
+        if args.json == '-' and args.ndjson == '-':
+            parser.error("only one of --json and --ndjson can write to stdout")
+        prepared = prepare_dataset(file_path=args.file_path, consolidate=args.consolidate, workers=args.workers)
+        if not prepared.errors.empty:
+            print(f"Skipped {prepared.errors['Row'].nunique()} invalid rows", file=sys.stderr)
+        write_data_outputs(prepared, json_path=args.json, ndjson_path=args.ndjson)
+        if args.save_snapshot:
+            save_tree_snapshot(prepared, args.save_snapshot)
+            print(f"Tree snapshot saved to: {args.save_snapshot}", file=sys.stderr)
+        if args.export:
+            from pms_export import export_associates
+            count = export_associates(prepared, args.export, region=args.region, role=args.role, bucket=args.bucket)
+            print(f"Exported {count} associates to: {args.export}", file=sys.stderr)
+        return
+    
+    process_excel_file(args.file_path, export_path=args.export,
+                       region=args.region, role=args.role, bucket=args.bucket,
+                       consolidate=args.consolidate, workers=args.workers, snapshot_path=args.save_snapshot)
+
 # If running as a script
 if __name__ == "__main__":
-    import sys
-    
     if len(sys.argv) > 1:
-        file_path = sys.argv[1]
-        process_excel_file(file_path)
+        main()
     else:
         print("Please provide the path to the Excel file as an argument.")
-        print("Example: python pms_visualization.py path/to/excel_file.xlsx")
\ No newline at end of file
+        print("Example: python pms_visualization.py path/to/excel_file.xlsx")
@@ -0,0 +1,169 @@
+"""
+Watch a folder of roster workbooks and regenerate only the dashboards whose
+workbook changed.
+
+The folder is polled: a file is picked up once its size and modification
+time have stayed the same for a settle period (so half-copied files are
+skipped), and its content hash decides whether anything really changed.
+Regeneration runs on a bounded thread pool, and prepared datasets are kept
+in the shared dataset store so unchanged content is never parsed twice.
+Only the latest version of each workbook is kept there: the dataset of a
+replaced or deleted workbook is released and removed from the store.
+"""
+import fnmatch
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from pms_core import prepare_dataset
+from pms_store import dataset_key, release_dataset, shared_dataset
+
+# Workbooks picked up by the watcher
+WATCH_PATTERNS = ('*.xlsx',)
+
+
+class FolderWatcher:
+    """
+    Poll a directory and regenerate the dashboard of every new or modified workbook.
+
+    Args:
+        directory: Folder the HR system drops workbooks into
+        process: Callable(file_path, prepared) writing the outputs for one workbook
+        interval: Seconds between polls
+        settle: Seconds a file must stay unchanged before it is processed
+        jobs: Maximum number of workbooks regenerated at the same time
+        consolidate: Split-allocation policy passed to prepare_dataset
+        store_dir: Dataset store directory (defaults to pms_store.STORE_DIR)
+    """
+
+    def __init__(self, directory, process, interval=2.0, settle=2.0, jobs=2, consolidate=None,
+                 store_dir=None):
+        self.directory = directory
+        self.process = process
+        self.interval = interval
+        self.settle = settle
+        self.consolidate = consolidate
+        self.store_dir = store_dir
+        self.pool = ThreadPoolExecutor(max_workers=jobs)
+        self._stats = {}        # path -> (mtime_ns, size) seen on the previous poll
+        self._processed = {}    # path -> ((mtime_ns, size), content hash) of the last regeneration
+        self._running = {}      # path -> future of the regeneration in flight
+        self._keys = {}         # path -> store key of the dataset last regenerated from it
+        # Guards _processed, _running and _keys, which pool threads update too
+        self._lock = threading.Lock()
+
+    def _candidates(self):
+        for name in sorted(os.listdir(self.directory)):
+            # Skip Office lock files and anything that is not a workbook
+            if name.startswith('~$') or not any(fnmatch.fnmatch(name, p) for p in WATCH_PATTERNS):
+                continue
+            path = os.path.join(self.directory, name)
+            if os.path.isfile(path):
+                yield path
+
+    def poll_once(self):
+        """
+        Scan the folder once and submit every settled, changed workbook.
+
+        Returns:
+            List of paths submitted for regeneration
+        """
+        now = time.time()
+        seen = {}
+        for path in self._candidates():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            seen[path] = (stat.st_mtime_ns, stat.st_size)
+
+        submitted = []
+        released = []
+        with self._lock:
+            for path, stat in seen.items():
+                # Debounce: unchanged since the last poll and old enough
+                if self._stats.get(path) != stat or now - stat[0] / 1e9 < self.settle:
+                    continue
+                if path in self._running and not self._running[path].done():
+                    continue
+                if self._processed.get(path, (None,))[0] == stat:
+                    continue
+
+                self._running[path] = self.pool.submit(self._regenerate, path, stat)
+                submitted.append(path)
+
+            # Forget workbooks that were deleted or renamed away
+            for path in [path for path in self._processed if path not in seen]:
+                if path in self._running and not self._running[path].done():
+                    continue
+                self._processed.pop(path)
+                self._running.pop(path, None)
+                released.append(self._keys.pop(path, None))
+            released = [key for key in released if self._unused(key)]
+
+        for key in released:
+            release_dataset(key, store_dir=self.store_dir, remove=True)
+        self._stats = seen
+        return submitted
+
+    def _unused(self, key):
+        """Whether no watched workbook holds the dataset any more (call with the lock held)"""
+        return key is not None and key not in self._keys.values()
+
+    def _regenerate(self, path, stat):
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if self._processed.get(path, (None, None))[1] == digest:
+                # Touched but not modified
+                self._processed[path] = (stat, digest)
+                return None
+
+            # A failed workbook is retried only once it changes again
+            self._processed[path] = (stat, None)
+
+        key = dataset_key(data, consolidate=self.consolidate)
+        prepared, hit = shared_dataset(
+            key, lambda: prepare_dataset(file_path=BytesIO(data), consolidate=self.consolidate),
+            store_dir=self.store_dir
+        )
+        output_file = self.process(path, prepared)
+        with self._lock:
+            self._processed[path] = (stat, digest)
+            previous, self._keys[path] = self._keys.get(path), key
+            release = previous != key and self._unused(previous)
+        if release:
+            release_dataset(previous, store_dir=self.store_dir, remove=True)
+        print(f"Regenerated {os.path.basename(path)}{' (cached aggregate)' if hit else ''}")
+        return output_file
+
+    def wait(self):
+        """Block until every regeneration in flight has finished; re-raise failures"""
+        with self._lock:
+            running = list(self._running.values())
+        for future in running:
+            future.result()
+
+    def run_forever(self):
+        """Poll until interrupted"""
+        print(f"Watching {self.directory} for workbook changes (Ctrl+C to stop)")
+        try:
+            while True:
+                self.poll_once()
+                with self._lock:
+                    finished = [(path, future) for path, future in self._running.items() if future.done()]
+                    for path, _ in finished:
+                        del self._running[path]
+                for path, future in finished:
+                    if future.exception():
+                        print(f"Error processing {path}: {future.exception()}")
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            print("Stopping watcher")
+        finally:
+            self.pool.shutdown(wait=True)
@@ -0,0 +1,76 @@
+"""
+Shared helpers for the PMS test suite.
+
+Synthetic rosters are generated from a fixed seed so their dashboards can be
+compared against the frozen outputs in tests/golden. Set PMS_UPDATE_GOLDEN=1
+to rewrite the golden files after an intended output change.
+"""
+import hashlib
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+TEST_DATA = os.path.join(REPO_DIR, 'Test_data.xlsx')
+
+ROLES = ['Project Manager (PM)', 'Sr. PM', 'PGM Lead', 'PGM', 'Scrum Master', 'SCRUM Coach',
+         'TPDL', 'Developer', 'Business Analyst', 'Architect']
+
+
+def make_roster(n_rows, seed=0, n_regions=6):
+    """
+    Seeded synthetic roster in the shape of a real export.
+
+    Availability mixes '85%' strings, bare numbers, blanks and zeros, and a
+    few rows are deliberately invalid (bad availability, out of range,
+    missing or repeated IDs) so validation is exercised too.
+    """
+    rng = np.random.default_rng(seed)
+    availability = rng.integers(0, 101, n_rows)
+    formatted = np.where(rng.random(n_rows) < 0.8,
+                         np.char.add(availability.astype(str), '%'),
+                         availability.astype(str)).astype(object)
+    formatted[rng.random(n_rows) < 0.03] = None
+
+    df = pd.DataFrame({
+        'Current Role': rng.choice(ROLES, n_rows),
+        'Region': rng.choice([f'Region {i}' for i in range(n_regions)], n_rows),
+        'Associate ID': [f'A{i:07d}' for i in range(n_rows)],
+        'Associate Name': [f'Associate {i:07d}' for i in rng.permutation(n_rows)],
+        'Current Availability': formatted,
+    })
+
+    if n_rows >= 50:
+        df.loc[5, 'Current Availability'] = 'Available'
+        df.loc[6, 'Current Availability'] = '140%'
+        df.loc[7, 'Associate ID'] = None
+        df.loc[8, 'Associate ID'] = df.loc[9, 'Associate ID']
+    return df
+
+
+def extract_script_json(html, variable):
+    """Pull the JSON assigned to a script variable out of a generated page"""
+    match = re.search(r'(?:const|var) ' + variable + r' = (.*?);\n', html)
+    assert match, f"{variable} not found in page"
+    return json.loads(match.group(1).replace('<\\/', '</'))
+
+
+def digest(data):
+    """Stable hash of JSON-serializable data"""
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def check_golden(name, data):
+    """Compare data with tests/golden/<name>.json, or write it when PMS_UPDATE_GOLDEN is set"""
+    path = os.path.join(GOLDEN_DIR, f'{name}.json')
+    if os.environ.get('PMS_UPDATE_GOLDEN'):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+            f.write('\n')
+    with open(path, encoding='utf-8') as f:
+        expected = json.load(f)
+    assert json.loads(json.dumps(data)) == expected
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""
+Command line outputs: the --json aggregate, the --ndjson assignment stream
+and saved tree snapshots.
+"""
+import json
+
+import pytest
+
+import pms_visualization
+from conftest import make_roster
+from pms_core import drill_down, prepare_dataset
+
+
+def test_json_and_ndjson_outputs(tmp_path, capsys):
+    df = make_roster(2500, seed=17)
+    path = tmp_path / 'roster.xlsx'
+    df.to_excel(path, index=False)
+    prepared = prepare_dataset(file_path=str(path))
+
+    pms_visualization.main([str(path), '--json', str(tmp_path / 'aggregate.json'), '--ndjson', '-'])
+    lines = capsys.readouterr().out.splitlines()
+    records = [json.loads(line) for line in lines]
+    frame = prepared.frame
+    assert len(records) == len(frame)
+    assert records[0].keys() == {'id', 'name', 'availability', 'role', 'mapped_role', 'region', 'bucket'}
+    assert [r['id'] for r in records] == frame['Associate ID'].tolist()
+    assert [r['role'] for r in records] == frame['Current Role'].tolist()
+    assert [r['mapped_role'] for r in records] == frame['Mapped_Role'].tolist()
+    assert [r['bucket'] for r in records] == frame['Bucket'].astype(str).tolist()
+    assert [r['availability'] for r in records] == frame['Current Availability'].tolist()
+
+    aggregate = json.loads((tmp_path / 'aggregate.json').read_text(encoding='utf-8'))
+    assert aggregate['count'] == len(frame)
+    # Same nesting as the org tree page
+    assert aggregate == json.loads(json.dumps(drill_down(frame, ['Current Role', 'Region', 'Bucket']) | {
+        'dimensions': ['Current Role', 'Region', 'Bucket']}))
+    tree = pms_visualization._build_tree_data(prepared)
+    assert list(aggregate['children']) == [role['name'] for role in tree['roles']]
+    # Data exports replace the page; no HTML is written
+    assert not list(tmp_path.glob('*.html'))
+
+
+def test_tree_snapshot_renders_identically(tmp_path):
+    df = make_roster(1500, seed=19)
+    path = tmp_path / 'roster.xlsx'
+    df.to_excel(path, index=False)
+
+    pms_visualization.main([str(path), '--save-snapshot', str(tmp_path / 'tree.json')])
+    pms_visualization.main([str(tmp_path / 'tree.json')])
+    assert ((tmp_path / 'tree_ImprovedTree.html').read_text(encoding='utf-8')
+            == (tmp_path / 'roster_ImprovedTree.html').read_text(encoding='utf-8'))
+
+    (tmp_path / 'other.json').write_text('{"total": 3}', encoding='utf-8')
+    with pytest.raises(ValueError, match='not a tree snapshot'):
+        pms_visualization.load_tree_snapshot(str(tmp_path / 'other.json'))
@@ -0,0 +1,44 @@
+"""
+Snapshot comparison against a row-by-row reference.
+"""
+import numpy as np
+
+from conftest import make_roster
+from pms_compare import compare_snapshots
+from pms_core import prepare_dataset
+
+
+def test_snapshot_comparison_matches_reference():
+    baseline_df = make_roster(4000, seed=21)
+    current_df = baseline_df.copy()
+    rng = np.random.default_rng(22)
+    touched = rng.choice(np.arange(20, 4000), 600, replace=False)
+    current_df.loc[touched, 'Current Availability'] = rng.integers(0, 101, 600).astype(str)
+    current_df.loc[touched[:50], 'Region'] = 'Region 9'
+    current_df = current_df.drop(index=range(100, 150))
+
+    baseline = prepare_dataset(dataframe=baseline_df)
+    current = prepare_dataset(dataframe=current_df)
+    comparison = compare_snapshots(baseline, current)
+
+    columns = ['Region', 'Mapped_Role', 'Bucket']
+    before = {row[0]: tuple(row[1:]) for row in baseline.frame[['Associate ID'] + columns].astype(str).values}
+    after = {row[0]: tuple(row[1:]) for row in current.frame[['Associate ID'] + columns].astype(str).values}
+    expected = {
+        'Moved': {i for i in before.keys() & after.keys() if before[i] != after[i]},
+        'Added': after.keys() - before.keys(),
+        'Removed': before.keys() - after.keys(),
+    }
+    changes = comparison.changes
+    for change, ids in expected.items():
+        assert set(changes.loc[changes['Change'] == change, 'Associate ID']) == ids
+    assert comparison.summary() == {change: len(ids) for change, ids in expected.items()}
+
+    into_top = comparison.moved_into('76-100%')
+    assert set(into_top['Associate ID']) == {i for i in after if after[i][2] == '76-100%' and before.get(i, ('',) * 3)[2] != '76-100%'}
+
+    cells = comparison.cells
+    counts = current.frame.groupby(columns, observed=True).size()
+    for key, count in counts.items():
+        assert cells.loc[key, 'count (current)'] == count
+    assert cells['count delta'].sum() == current.total_count - baseline.total_count
@@ -0,0 +1,92 @@
+"""
+Split-allocation consolidation: each policy against a row-by-row reference,
+and the --consolidate path through prepare_dataset and the command line.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import pms_visualization
+from conftest import make_roster
+from pms_core import consolidate_allocations, prepare_dataset, validate_dataframe
+
+# One associate per case: single row, split rows summing over 100, a tie for
+# the highest availability, and a split row with blank availability
+SPLIT_ROSTER = pd.DataFrame({
+    'Current Role': ['PM', 'PM', 'Developer', 'PGM', 'SCRUM Master', 'PGM', 'TPDL', 'TPDL', 'PM'],
+    'Region': ['EMEA', 'EMEA', 'APAC', 'EMEA', 'APAC', 'APAC', 'NA', 'NA', 'NA'],
+    'Associate ID': ['E1', 'E2', 'E2', 'E3', 'E3', 'E3', 'E4', 'E4', 'E2'],
+    'Associate Name': ['One', 'Two', 'Two', 'Three', 'Three', 'Three', 'Four', 'Four', 'Two'],
+    'Current Availability': ['40%', '70%', '50%', '30%', '60%', '60%', None, '25', '10%'],
+})
+
+
+def reference(df, policy):
+    """(id, role, region, availability) per associate, computed row by row"""
+    rows = {}
+    for row in df.to_dict('records'):
+        value = row['Current Availability']
+        availability = 0.0 if pd.isna(value) else float(str(value).rstrip('%'))
+        rows.setdefault(row['Associate ID'], []).append((row['Current Role'], row['Region'], availability))
+
+    result = []
+    for associate_id, entries in rows.items():
+        if policy == 'primary':
+            role, region, availability = entries[0]
+        elif policy == 'max':
+            role, region, availability = max(entries, key=lambda entry: entry[2])
+        else:
+            role, region = entries[0][:2]
+            availability = min(sum(entry[2] for entry in entries), 100)
+        result.append((associate_id, role, region, availability))
+    return result
+
+
+@pytest.mark.parametrize('policy', ['sum', 'max', 'primary'])
+def test_policy_matches_reference(policy):
+    merged = consolidate_allocations(SPLIT_ROSTER, policy)
+    availability = pd.to_numeric(merged['Current Availability'].astype(str).str.rstrip('%'), errors='coerce')
+    got = list(zip(merged['Associate ID'], merged['Current Role'], merged['Region'], availability.fillna(0)))
+    assert got == reference(SPLIT_ROSTER, policy)
+
+
+def test_policies_on_a_large_roster():
+    df = make_roster(6000, seed=61)
+    # Split a third of the associates across two or three rows
+    rng = np.random.default_rng(62)
+    repeats = df.iloc[rng.choice(len(df), 2000)].assign(**{'Current Availability': lambda d: '35%'})
+    valid, _ = validate_dataframe(pd.concat([df, repeats], ignore_index=True), check_duplicates=False)
+
+    for policy in ('sum', 'max', 'primary'):
+        merged = consolidate_allocations(valid, policy)
+        expected = reference(valid, policy)
+        # 'max' keeps the winning row where it is in the file, so compare per associate
+        got = pd.to_numeric(merged['Current Availability'].astype(str).str.rstrip('%'), errors='coerce').fillna(0)
+        assert len(merged) == len(expected)
+        assert dict(zip(merged['Associate ID'], got.astype(float))) == {row[0]: row[3] for row in expected}
+
+
+def test_no_repeats_returns_the_roster_unchanged():
+    df = SPLIT_ROSTER.drop_duplicates('Associate ID')
+    assert consolidate_allocations(df, 'sum') is df
+    with pytest.raises(ValueError, match='Unknown consolidation policy'):
+        consolidate_allocations(df, 'average')
+
+
+def test_prepare_dataset_merges_or_reports_repeats(tmp_path, capsys):
+    reported = prepare_dataset(dataframe=SPLIT_ROSTER)
+    assert reported.merged_rows == 0
+    assert set(reported.errors['Associate ID']) == {'E2', 'E3', 'E4'}
+    # Only the first row of each associate is kept (E4's first row has no availability)
+    assert reported.total_count == 3
+
+    merged = prepare_dataset(dataframe=SPLIT_ROSTER, consolidate='sum')
+    assert merged.merged_rows == len(SPLIT_ROSTER) - 4
+    assert merged.errors.empty
+    availability = dict(zip(merged.frame['Associate ID'], merged.frame['Current Availability']))
+    assert availability == {'E1': 40, 'E2': 100, 'E3': 100, 'E4': 25}
+
+    path = tmp_path / 'roster.xlsx'
+    SPLIT_ROSTER.to_excel(path, index=False)
+    pms_visualization.main([str(path), '--consolidate', 'max'])
+    assert f"Merged {len(SPLIT_ROSTER) - 4} split-allocation rows (max)" in capsys.readouterr().out
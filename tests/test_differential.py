@@ -0,0 +1,152 @@
+"""
+Differential checks of both generators: against a plain per-row reference
+implementation, and against frozen golden outputs.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import pms_tabbed
+import pms_visualization
+from conftest import TEST_DATA, check_golden, digest, extract_script_json, make_roster
+from pms_core import BUCKETS, map_role_name, prepare_dataset, render
+
+SIZES = [200, 2000, 20000]
+
+
+def reference_rows(df):
+    """Valid associates with availability > 0, computed row by row"""
+    rows = []
+    seen_ids = set()
+    for row in df.itertuples(index=False):
+        associate_id = '' if pd.isnull(row[2]) else str(row[2]).strip()
+        raw = row[4]
+        try:
+            availability = 0.0 if pd.isnull(raw) else float(str(raw).replace('%', '').strip())
+        except ValueError:
+            continue
+        if not associate_id or not 0 <= availability <= 100 or associate_id in seen_ids:
+            continue
+        seen_ids.add(associate_id)
+        availability = int(availability)
+        if availability <= 0:
+            continue
+        if availability >= 76:
+            bucket = '76-100%'
+        elif availability >= 51:
+            bucket = '51-75%'
+        elif availability >= 26:
+            bucket = '26-50%'
+        else:
+            bucket = '0-25%'
+        rows.append({
+            'id': associate_id,
+            'name': str(row[3]).strip(),
+            'availability': availability,
+            'role': str(row[0]).strip(),
+            'mapped_role': map_role_name(row[0]),
+            'region': str(row[1]).strip(),
+            'bucket': bucket,
+        })
+    return rows
+
+
+def reference_cell(rows, region=None, role=None, bucket=None):
+    selected = [r for r in rows
+                if (region is None or r['region'] == region)
+                and (role in (None, 'Total') or r['mapped_role'] == role)
+                and (bucket is None or r['bucket'] == bucket)]
+    selected.sort(key=lambda r: (-r['availability'], r['name']))
+    # The dashboards have always rounded numpy floats (round half to even on the scaled value)
+    avg = round(np.float64(sum(r['availability'] for r in selected) / len(selected)), 1) if selected else 0
+    return len(selected), avg, [r['id'] for r in selected]
+
+
+def generate_both(df):
+    prepared = prepare_dataset(dataframe=df)
+    views = render(prepared, 'tabbed', 'tree')
+    return (prepared,
+            extract_script_json(views['tabbed'], 'dashboardData'),
+            extract_script_json(views['tree'], 'treeData'))
+
+
+@pytest.mark.parametrize('n_rows', SIZES[:2])
+def test_tabbed_dashboard_matches_reference(n_rows):
+    df = make_roster(n_rows, seed=n_rows)
+    rows = reference_rows(df)
+    _, dashboard, _ = generate_both(df)
+
+    assert dashboard['Total']['count'] == len(rows)
+    for role, role_data in dashboard['Roles'].items():
+        assert (role_data['count'], role_data['avg_availability']) == reference_cell(rows, role=role)[:2]
+        for bucket in BUCKETS:
+            count, avg, ids = reference_cell(rows, role=role, bucket=bucket)
+            cell = role_data['buckets'][bucket]
+            assert (cell['count'], cell['avg_availability']) == (count, avg)
+            assert [a['Associate ID'] for a in cell['associates']] == ids
+
+    for region, region_data in dashboard['Regions'].items():
+        for role, role_data in region_data['roles'].items():
+            for bucket in BUCKETS:
+                count, avg, ids = reference_cell(rows, region=region, role=role, bucket=bucket)
+                cell = role_data['buckets'][bucket]
+                assert (cell['count'], cell['avg_availability']) == (count, avg)
+                assert [a['Associate ID'] for a in cell['associates']] == ids
+
+
+@pytest.mark.parametrize('n_rows', SIZES[:2])
+def test_tree_matches_reference(n_rows):
+    df = make_roster(n_rows, seed=n_rows)
+    rows = reference_rows(df)
+    _, _, tree = generate_both(df)
+
+    assert [role['name'] for role in tree['roles']] == sorted({r['role'] for r in rows})
+    assert tree['regions'] == sorted({r['region'] for r in rows})
+    for role in tree['roles']:
+        for region in tree['regions']:
+            for bucket in BUCKETS:
+                expected = sorted((r for r in rows if (r['role'], r['region'], r['bucket']) == (role['name'], region, bucket)),
+                                  key=lambda r: (-r['availability'], r['name']))
+                actual = role['regions'].get(region, {}).get(bucket, [])
+                assert [a[0] for a in actual] == [r['id'] for r in expected]
+
+
+def test_generators_agree_with_each_other():
+    df = make_roster(2000, seed=7)
+    prepared, dashboard, tree = generate_both(df)
+    tree_total = sum(len(associates) for role in tree['roles']
+                     for buckets in role['regions'].values() for associates in buckets.values())
+    assert tree_total == dashboard['Total']['count'] == prepared.total_count
+
+
+def test_wrappers_match_renderers():
+    df = make_roster(500, seed=3)
+    prepared = prepare_dataset(dataframe=df)
+    assert pms_tabbed.generate_pms_visualization(dataframe=df) == pms_tabbed.render_tabbed(prepared)
+    assert pms_visualization.generate_pms_visualization(dataframe=df) == pms_visualization.render_tree(prepared)
+
+
+@pytest.mark.parametrize('n_rows', SIZES)
+def test_synthetic_golden(n_rows):
+    df = make_roster(n_rows, seed=n_rows)
+    prepared, dashboard, tree = generate_both(df)
+    check_golden(f'synthetic_{n_rows}', {
+        'total': dashboard['Total'],
+        'regions': {region: [data['count'], data['avg_availability']] for region, data in dashboard['Regions'].items()},
+        'roles': {role: [data['count'], data['avg_availability']] for role, data in dashboard['Roles'].items()},
+        'errors': prepared.errors['Reason'].value_counts().sort_index().to_dict(),
+        'dashboard_sha256': digest(dashboard),
+        'tree_sha256': digest(tree),
+        'json_sha256': digest(render(prepared, 'json')),
+    })
+
+
+def test_test_data_golden():
+    prepared = prepare_dataset(file_path=TEST_DATA)
+    empty_message = 'No resources with availability greater than 0% found in the data.'
+    assert empty_message in pms_tabbed.generate_pms_visualization(file_path=TEST_DATA)
+    assert empty_message in pms_visualization.generate_pms_visualization(file_path=TEST_DATA)
+    check_golden('test_data', {
+        'source_rows': prepared.source_rows,
+        'errors': prepared.errors.astype(str).to_dict('records'),
+    })
@@ -0,0 +1,34 @@
+"""
+Drill-down over a chosen dimension hierarchy, checked against the aggregate and the frame.
+"""
+import numpy as np
+import pytest
+
+from conftest import make_roster
+from pms_core import DEFAULT_HIERARCHY, drill_down, prepare_dataset, rollup
+
+
+def test_drill_down_matches_reference():
+    df = make_roster(3000, seed=12)
+    df['Practice'] = np.where(np.arange(len(df)) % 7 == 0, None, np.where(np.arange(len(df)) % 2, 'Cloud', 'Data'))
+    prepared = prepare_dataset(dataframe=df)
+
+    tree = drill_down(prepared.frame, DEFAULT_HIERARCHY)
+    cells = rollup(prepared.cells, DEFAULT_HIERARCHY)
+    assert tree['count'] == prepared.total_count
+    assert sum(len(role['children']) for region in tree['children'].values()
+               for role in region['children'].values()) == len(cells)
+    for (region, role, bucket), row in cells.iterrows():
+        leaf = tree['children'][region]['children'][role]['children'][bucket]
+        assert (leaf['count'], leaf['avg_availability']) == (row['count'], row['avg_availability'])
+
+    # Extra source columns are dimensions too; missing values group under ''
+    tree = drill_down(prepared.frame, ['Practice', 'Bucket'], associates=True)
+    frame = prepared.frame
+    for practice, bucket in [('', '76-100%'), ('Cloud', '0-25%')]:
+        rows = frame[(frame['Practice'].fillna('') == practice) & (frame['Bucket'] == bucket)]
+        leaf = tree['children'][practice]['children'][bucket]
+        assert leaf['associates'] == rows[['Associate ID', 'Associate Name', 'Current Availability']].values.tolist()
+
+    with pytest.raises(ValueError):
+        drill_down(prepared.frame, ['Associate Name'])
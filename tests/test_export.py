@@ -0,0 +1,163 @@
+"""
+Associate exports: cell selection, CSV/XLSX round trips and the --export flags.
+"""
+import time
+import tracemalloc
+import zipfile
+from io import BytesIO
+
+import pandas as pd
+import pytest
+
+import pms_visualization
+from conftest import make_roster
+from pms_core import prepare_dataset
+from pms_export import (EXPORT_COLUMNS, EXPORT_HEADERS, SHEET_PART, export_associates, select_cell, write_csv,
+                        write_xlsx)
+
+# Rows, seconds and peak traced MB for the large XLSX export
+LARGE_EXPORT = (500000, 15.0, 150)
+
+# Names that need XML escaping, or hold characters XML cannot store at all
+ODD_NAMES = ['A & B <Ltd>', 'Ünïcødé "quoted" \'single\'', 'tab\tand\nnewline', '=SUM(A1)',
+             '123', 'ctl\x01\x0b\x1fchars']
+
+
+@pytest.fixture(scope='module')
+def prepared():
+    df = make_roster(3000, seed=51)
+    for i, name in enumerate(ODD_NAMES):
+        df.loc[100 + i, 'Associate Name'] = name
+    df.loc[120, 'Current Role'] = 'R&D <Lead>'
+    return prepare_dataset(dataframe=df)
+
+
+def read_back(data, fmt):
+    source = BytesIO(data)
+    if fmt == 'csv':
+        return pd.read_csv(source, dtype=str, keep_default_na=False)
+    return pd.read_excel(source, dtype=str, keep_default_na=False)
+
+
+def expected_rows(rows):
+    """The exported rows as a reader gets them back: headers renamed, every value as text"""
+    return rows.set_axis(EXPORT_HEADERS, axis=1).astype(str).reset_index(drop=True)
+
+
+def test_select_cell_matches_row_filter(prepared):
+    frame = prepared.frame
+    region = prepared.regions[2]
+    for role, bucket in (('PM', '76-100%'), ('Total', None), (None, '0-25%')):
+        rows = select_cell(prepared, region=region, role=role, bucket=bucket)
+        mask = frame['Region'] == region
+        if role not in (None, 'Total'):
+            mask &= frame['Mapped_Role'] == role
+        if bucket is not None:
+            mask &= frame['Bucket'] == bucket
+        # Cells come out one after another, each in the frame's availability order
+        expected = frame.loc[mask]
+        assert sorted(rows['Associate ID']) == sorted(expected['Associate ID'])
+        for key, cell in rows.groupby(['Mapped_Role', 'Bucket'], observed=True):
+            in_frame = expected[(expected['Mapped_Role'] == key[0]) & (expected['Bucket'] == key[1])]
+            assert cell['Associate ID'].tolist() == in_frame['Associate ID'].tolist()
+        assert rows.columns.tolist() == EXPORT_COLUMNS
+
+    # The whole breakdown is grouped by cell, availability order kept inside each
+    everything = select_cell(prepared)
+    assert len(everything) == len(frame)
+    keys = list(zip(everything['Region'], everything['Mapped_Role'], everything['Bucket']))
+    runs = 1 + sum(previous != key for previous, key in zip(keys, keys[1:]))
+    assert runs == len(set(keys))
+    with pytest.raises(ValueError, match='Unknown bucket'):
+        select_cell(prepared, bucket='100%')
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'xlsx'])
+def test_round_trip(prepared, fmt):
+    rows = select_cell(prepared)
+    buffer = BytesIO()
+    assert export_associates(prepared, buffer, fmt=fmt) == len(rows)
+
+    back = read_back(buffer.getvalue(), fmt)
+    expected = expected_rows(rows)
+    if fmt == 'xlsx':
+        # XML 1.0 cannot hold these control characters, so the writer drops them
+        expected['Associate Name'] = expected['Associate Name'].str.replace(r'[\x00-\x08\x0b\x0c\x0e-\x1f]', '',
+                                                                            regex=True)
+        expected['Current Availability'] = rows['Current Availability'].map('{:g}'.format).tolist()
+    pd.testing.assert_frame_equal(back, expected, check_dtype=False)
+    names = set(back['Associate Name'])
+    assert {'A & B <Ltd>', 'Ünïcødé "quoted" \'single\'', 'tab\tand\nnewline', '=SUM(A1)'} <= names
+    assert 'R&D <Lead>' in set(back['Current Role'])
+
+
+@pytest.mark.parametrize('writer', [write_csv, write_xlsx])
+def test_empty_export_has_header_only(writer):
+    buffer = BytesIO()
+    assert writer(pd.DataFrame(columns=EXPORT_COLUMNS), buffer) == 0
+    back = read_back(buffer.getvalue(), 'csv' if writer is write_csv else 'xlsx')
+    assert back.columns.tolist() == EXPORT_HEADERS and back.empty
+
+
+def test_xlsx_keeps_surrounding_whitespace():
+    rows = pd.DataFrame([['EMEA', 'PM', '76-100%', ' A1', '  padded name  ', 80, 'PM ']], columns=EXPORT_COLUMNS)
+    buffer = BytesIO()
+    write_xlsx(rows, buffer)
+    with zipfile.ZipFile(buffer) as package:
+        sheet = package.read(SHEET_PART).decode('utf-8')
+    # Excel trims text runs without xml:space="preserve"
+    assert '<t xml:space="preserve">  padded name  </t>' in sheet
+    assert read_back(buffer.getvalue(), 'xlsx')['Associate Name'].tolist() == ['  padded name  ']
+
+
+def test_export_flags(tmp_path, capsys):
+    df = make_roster(1500, seed=52)
+    path = tmp_path / 'roster.xlsx'
+    df.to_excel(path, index=False)
+    prepared = prepare_dataset(dataframe=df)
+    region = prepared.regions[0]
+
+    pms_visualization.main([str(path), '--export', str(tmp_path / 'cell.xlsx'),
+                            '--region', region, '--role', 'PM', '--bucket', '51-75%'])
+    expected = select_cell(prepared, region=region, role='PM', bucket='51-75%')
+    back = pd.read_excel(tmp_path / 'cell.xlsx', dtype=str)
+    assert back['Associate ID'].tolist() == expected['Associate ID'].tolist()
+    assert f"Exported {len(expected)} associates" in capsys.readouterr().out
+
+    pms_visualization.main([str(path), '--export', str(tmp_path / 'all.csv')])
+    assert len(pd.read_csv(tmp_path / 'all.csv')) == len(prepared.frame)
+
+    with pytest.raises(SystemExit):
+        pms_visualization.main([str(path), '--region', region])
+    with pytest.raises(ValueError, match='Unsupported export format'):
+        pms_visualization.main([str(path), '--export', str(tmp_path / 'cell.txt')])
+
+
+@pytest.mark.perf
+def test_large_xlsx_export_is_fast_and_flat():
+    n_rows, seconds_budget, mb_budget = LARGE_EXPORT
+    prepared = prepare_dataset(dataframe=make_roster(n_rows, seed=53))
+
+    start = time.perf_counter()
+    buffer = BytesIO()
+    count = export_associates(prepared, buffer, fmt='xlsx')
+    elapsed = time.perf_counter() - start
+    assert elapsed < seconds_budget, f"exporting {count} rows took {elapsed:.1f}s (budget {seconds_budget}s)"
+
+    # Chunked writing keeps the peak well below the size of the data written
+    tracemalloc.start()
+    try:
+        export_associates(prepared, BytesIO(), fmt='xlsx')
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert peak / 1e6 < mb_budget, f"export peaked at {peak / 1e6:.0f}MB (budget {mb_budget}MB)"
+
+    # Every row made it into the sheet (header included), read back without parsing cells
+    rows, carry = 0, b''
+    with zipfile.ZipFile(buffer) as package, package.open(SHEET_PART) as sheet:
+        for block in iter(lambda: sheet.read(1 << 20), b''):
+            block = carry + block
+            rows += block.count(b'<row ')
+            carry = block[-4:]
+    assert rows == count + 1
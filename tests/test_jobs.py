@@ -0,0 +1,117 @@
+"""
+Background render jobs: results, cancellation and progress within and across stages.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import pms_core
+from conftest import make_roster
+from pms_core import RenderCancelled, cancel_on, checkpoint, prepare_dataset, register_renderer, render
+from pms_jobs import RenderJob
+
+
+def test_job_renders_every_view():
+    prepared = prepare_dataset(dataframe=make_roster(500, seed=31))
+    job = RenderJob(prepared, ('tabbed', 'tree')).start()
+    job.wait(timeout=60)
+    assert job.status == 'done' and job.progress == 1.0
+    assert job.results == render(prepared, 'tabbed', 'tree')
+
+
+def test_job_cancellation():
+    prepared = prepare_dataset(dataframe=make_roster(200, seed=32))
+    release = threading.Event()
+    started = threading.Event()
+
+    @register_renderer('test_blocking')
+    def render_blocking(prepared):
+        started.set()
+        release.wait(10)
+        return 'blocked'
+
+    try:
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            running = RenderJob(prepared, ('test_blocking', 'json')).start(pool)
+            queued = RenderJob(prepared, ('json',)).start(pool)
+            started.wait(10)
+            assert running.status == 'running' and running.stage_label == 'Rendering test_blocking'
+
+            # Queued jobs never start; running ones stop at the next stage
+            queued.cancel()
+            running.cancel()
+            release.set()
+            running.wait(10)
+    finally:
+        pms_core._RENDERERS.pop('test_blocking', None)
+
+    assert queued.status == 'cancelled' and queued.completed == 0
+    assert running.status == 'cancelled'
+    assert running.results == {'test_blocking': 'blocked'} and running.progress == 0.5
+
+
+def test_cancellation_inside_a_render():
+    prepared = prepare_dataset(dataframe=make_roster(300, seed=33))
+    cancelled = threading.Event()
+    checkpoint()
+
+    # The built-in renderers stop at their checkpoints once the event is set
+    cancelled.set()
+    with cancel_on(cancelled):
+        for view in ('tabbed', 'summary', 'tree'):
+            with pytest.raises(RenderCancelled):
+                render(prepared, view)
+    checkpoint()
+
+    release = threading.Event()
+    started = threading.Event()
+
+    @register_renderer('test_checkpoints')
+    def render_checkpoints(prepared):
+        started.set()
+        release.wait(10)
+        checkpoint()
+        return 'finished anyway'
+
+    try:
+        job = RenderJob(prepared, ('test_checkpoints', 'json')).start()
+        started.wait(10)
+        job.cancel()
+        release.set()
+        job.wait(10)
+    finally:
+        pms_core._RENDERERS.pop('test_checkpoints', None)
+
+    # The superseded job stopped inside its first stage
+    assert job.status == 'cancelled' and job.results == {} and job.completed == 0
+
+
+def test_progress_within_a_stage():
+    prepared = prepare_dataset(dataframe=make_roster(300, seed=34, n_regions=6))
+    reports = []
+    with cancel_on(threading.Event(), progress=reports.append):
+        render(prepared, 'tabbed')
+    # Four bulk steps, one per region, then filling the page
+    assert reports == sorted(reports) and len(reports) >= len(prepared.regions) + 4
+    assert 0 < reports[0] < 0.5 < reports[-1] < 1
+
+    release = threading.Event()
+    reported = threading.Event()
+
+    @register_renderer('test_halfway')
+    def render_halfway(prepared):
+        checkpoint(1, 2)
+        reported.set()
+        release.wait(10)
+        return 'done'
+
+    try:
+        job = RenderJob(prepared, ('json', 'test_halfway')).start()
+        reported.wait(10)
+        assert job.progress == 0.75
+        release.set()
+        job.wait(10)
+    finally:
+        pms_core._RENDERERS.pop('test_halfway', None)
+    assert job.progress == 1.0
@@ -0,0 +1,124 @@
+"""
+Service metrics: recorded values and the Prometheus text exposition.
+"""
+import os
+import re
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pms_metrics
+import pms_tabbed
+import pms_visualization
+from conftest import make_roster
+from pms_core import prepare_dataset
+from pms_metrics import Counter, Histogram
+
+
+def parse_exposition(text):
+    """What a scraper sees: sample name with labels -> value, plus the declared types"""
+    samples, types = {}, {}
+    for line in text.splitlines():
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            types[name] = kind
+        elif line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples, types
+
+
+def test_histogram_and_counter_exposition():
+    histogram = Histogram('test_seconds', "Test histogram", [0.1, 1], ['view'])
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, view='a"b')
+    counter = Counter('test_total', "Test counter", ['result'])
+    counter.inc(result='hit')
+    counter.inc(2, result='hit')
+
+    samples, types = parse_exposition(histogram.exposition() + '\n' + counter.exposition())
+    assert types == {'test_seconds': 'histogram', 'test_total': 'counter'}
+    assert samples['test_seconds_bucket{view="a\\"b",le="0.1"}'] == 2
+    assert samples['test_seconds_bucket{view="a\\"b",le="1"}'] == 3
+    assert samples['test_seconds_bucket{view="a\\"b",le="+Inf"}'] == 4
+    assert samples['test_seconds_count{view="a\\"b"}'] == 4
+    assert samples['test_seconds_sum{view="a\\"b"}'] == 3.65
+    assert samples['test_total{result="hit"}'] == 3
+
+
+def test_generation_is_recorded_and_scraped(tmp_path):
+    renders = pms_metrics.RENDER_SECONDS.count(view='tabbed')
+    trees = pms_metrics.OUTPUT_BYTES.count(view='tree')
+    parses = pms_metrics.STAGE_SECONDS.count(stage='parse')
+    aggregations = pms_metrics.STAGE_SECONDS.count(stage='aggregate')
+
+    path = tmp_path / 'roster.xlsx'
+    make_roster(500, seed=41).to_excel(path, index=False)
+    prepared = prepare_dataset(file_path=str(path))
+    page = pms_tabbed.generate_pms_visualization(prepared=prepared)
+    pms_visualization.generate_pms_visualization(prepared=prepared)
+
+    assert pms_metrics.RENDER_SECONDS.count(view='tabbed') == renders + 1
+    assert pms_metrics.OUTPUT_BYTES.count(view='tree') == trees + 1
+    assert pms_metrics.STAGE_SECONDS.count(stage='parse') == parses + 1
+    assert pms_metrics.STAGE_SECONDS.count(stage='aggregate') == aggregations + 1
+
+    # A local scraper reads the same samples from the endpoint and from the text file
+    server = pms_metrics.serve(0)
+    try:
+        url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            scraped, types = parse_exposition(response.read().decode('utf-8'))
+    finally:
+        server.shutdown()
+        server.server_close()
+    pms_metrics.write_textfile(tmp_path / 'pms.prom')
+    from_file, _ = parse_exposition((tmp_path / 'pms.prom').read_text(encoding='utf-8'))
+
+    assert types['pms_render_duration_seconds'] == 'histogram'
+    assert scraped['pms_render_duration_seconds_count{view="tabbed"}'] == renders + 1
+    assert from_file['pms_render_duration_seconds_count{view="tabbed"}'] == renders + 1
+    assert scraped['pms_output_bytes_sum{view="tabbed"}'] >= len(page.encode('utf-8'))
+
+
+def test_recording_overhead_is_negligible():
+    histogram = Histogram('test_overhead_seconds', "Overhead test", pms_metrics.SECONDS_BUCKETS, ['stage'])
+    start = time.perf_counter()
+    for _ in range(10000):
+        histogram.observe(0.3, stage='parse')
+    per_call = (time.perf_counter() - start) / 10000
+    assert per_call < 50e-6, f"observe took {per_call * 1e6:.1f}us"
+
+
+def test_exporters_are_per_process(tmp_path):
+    # Another process already owns the port
+    taken = pms_metrics.serve(0)
+    port = taken.server_address[1]
+    script = ("import logging, time, pms_metrics\n"
+              "logging.basicConfig()\n"
+              "path = pms_metrics.start_exporter()\n"
+              "time.sleep(0.5)\n"
+              "print(path)\n"
+              "print(open(path, encoding='utf-8').read())\n")
+    env = dict(os.environ, PMS_METRICS_PORT=str(port), PMS_METRICS_FILE=str(tmp_path / 'pms.prom'),
+               PMS_METRICS_INTERVAL='0.1')
+    try:
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, env=env,
+                                cwd=Path(pms_metrics.__file__).parent, timeout=30)
+    finally:
+        taken.shutdown()
+        taken.server_close()
+
+    # The bind error is logged and the process carries on with its own file
+    assert result.returncode == 0, result.stderr
+    assert f'Metrics endpoint not started on port {port}' in result.stderr
+    path, text = result.stdout.split('\n', 1)
+    assert re.fullmatch(re.escape(str(tmp_path / 'pms.')) + r'\d+\.prom', path)
+    samples, _ = parse_exposition(text)
+    assert all(name.split('{')[1].startswith('pid="') for name in samples if '{' in name)
+    # Removed at exit, so no stale samples are scraped
+    assert not os.path.exists(path)
+    assert pms_metrics.process_path('/m/pms-{pid}.prom', 42) == '/m/pms-42.prom'
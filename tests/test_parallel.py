@@ -0,0 +1,15 @@
+"""
+Sharded parallel aggregation against the serial aggregate.
+"""
+import pandas as pd
+
+from conftest import make_roster
+from pms_core import prepare_dataset
+from pms_parallel import parallel_aggregate
+
+
+def test_parallel_aggregation_matches_serial():
+    prepared = prepare_dataset(dataframe=make_roster(20000, seed=5))
+    pd.testing.assert_frame_equal(parallel_aggregate(prepared.frame, workers=3, shard_size=4096), prepared.cells)
+    # A single shard takes the in-process path
+    pd.testing.assert_frame_equal(parallel_aggregate(prepared.frame, workers=1), prepared.cells)
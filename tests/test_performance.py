@@ -0,0 +1,133 @@
+"""
+Per-stage time and memory budgets for preparing and rendering a roster, and
+startup budgets for the command line paths that must not import pandas.
+
+Budgets are generous multiples of the measured cost so that only real
+regressions (an accidental per-row Python loop, a quadratic slice) trip them.
+"""
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+import pms_tabbed
+import pms_visualization
+from conftest import make_roster
+from pms_core import (PARALLEL_MIN_ROWS, aggregate_cells, clean_dataframe, distribution_levels, load_dataframe,
+                      prepare_dataset, validate_dataframe)
+
+N_ROWS = 50000
+
+# stage -> (seconds, peak traced MB) for N_ROWS rows
+BUDGETS = {
+    'load': (0.5, 5),
+    'validate': (1.0, 40),
+    'clean': (1.5, 40),
+    'aggregate': (0.5, 20),
+    'distribution': (0.5, 20),
+    'render_tabbed': (8.0, 400),
+    'render_tree': (2.0, 80),
+}
+
+# command line -> wall seconds for a fresh interpreter; neither may import pandas
+STARTUP_BUDGETS = {
+    'help': 1.0,
+    'render_snapshot': 1.5,
+}
+
+# Rows for the parallel aggregation benchmark, well above the parallel threshold
+PARALLEL_ROWS = 4 * PARALLEL_MIN_ROWS
+
+# Runs the command line in a fresh interpreter and reports whether pandas got imported
+STARTUP_SCRIPT = """
+import sys
+import pms_visualization
+try:
+    pms_visualization.main(sys.argv[1:])
+except SystemExit:
+    pass
+print('pandas' in sys.modules)
+"""
+
+
+@pytest.fixture(scope='module')
+def stages():
+    """Each stage as a callable, with its input already computed"""
+    df = make_roster(N_ROWS, seed=11)
+    raw = load_dataframe(dataframe=df)
+    valid = validate_dataframe(raw)[0]
+    frame = clean_dataframe(valid)
+    prepared = prepare_dataset(dataframe=df)
+    return {
+        'load': lambda: load_dataframe(dataframe=df),
+        'validate': lambda: validate_dataframe(raw),
+        'clean': lambda: clean_dataframe(valid),
+        'aggregate': lambda: aggregate_cells(frame),
+        'distribution': lambda: distribution_levels(
+            frame, [[], ['Mapped_Role'], ['Region'], ['Region', 'Mapped_Role']]),
+        'render_tabbed': lambda: pms_tabbed.render_tabbed(prepared),
+        'render_tree': lambda: pms_visualization.render_tree(prepared),
+    }
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize('stage', list(BUDGETS))
+def test_stage_budget(stages, stage):
+    seconds_budget, mb_budget = BUDGETS[stage]
+
+    start = time.perf_counter()
+    stages[stage]()
+    elapsed = time.perf_counter() - start
+    assert elapsed < seconds_budget, f"{stage} took {elapsed:.2f}s (budget {seconds_budget}s)"
+
+    tracemalloc.start()
+    try:
+        stages[stage]()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    peak_mb = peak / 1e6
+    assert peak_mb < mb_budget, f"{stage} peaked at {peak_mb:.0f}MB (budget {mb_budget}MB)"
+
+
+@pytest.mark.perf
+@pytest.mark.parametrize('command', list(STARTUP_BUDGETS))
+def test_startup_budget(tmp_path, command):
+    if command == 'help':
+        argv = ['--help']
+    else:
+        prepared = prepare_dataset(dataframe=make_roster(N_ROWS, seed=11))
+        pms_visualization.save_tree_snapshot(prepared, tmp_path / 'tree.json')
+        argv = [str(tmp_path / 'tree.json')]
+
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT, *argv], capture_output=True, text=True,
+                            cwd=Path(pms_visualization.__file__).parent, check=True)
+    elapsed = time.perf_counter() - start
+    assert result.stdout.splitlines()[-1] == 'False', f"{command} imported pandas"
+    assert elapsed < STARTUP_BUDGETS[command], f"{command} took {elapsed:.2f}s (budget {STARTUP_BUDGETS[command]}s)"
+
+
+@pytest.mark.perf
+def test_parallel_aggregation_beats_serial():
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    if cpus < 2:
+        pytest.skip("needs at least two CPUs")
+    frame = prepare_dataset(dataframe=make_roster(PARALLEL_ROWS, seed=13)).frame
+    workers = min(cpus, 4)
+
+    def best_of_three(function):
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    serial = best_of_three(lambda: aggregate_cells(frame))
+    parallel = best_of_three(lambda: aggregate_cells(frame, workers=workers))
+    assert parallel < serial, f"{workers} workers took {parallel:.3f}s, serial {serial:.3f}s"
@@ -0,0 +1,96 @@
+"""
+Staffing queries against a row-by-row reference.
+"""
+import pytest
+
+import pms_visualization
+from conftest import make_roster
+from pms_core import prepare_dataset
+from pms_query import StaffingDemand, fill_demands, find_candidates, parse_demand
+
+
+@pytest.fixture(scope='module')
+def prepared():
+    return prepare_dataset(dataframe=make_roster(5000, seed=31))
+
+
+def reference_candidates(frame, demand, booked=()):
+    rows = frame[['Associate ID', 'Current Availability', 'Mapped_Role', 'Region']].values.tolist()
+    return [
+        associate_id for associate_id, availability, role, region in rows
+        if (demand.role is None or role == demand.role)
+        and (demand.region is None or region == demand.region)
+        and availability >= demand.min_availability
+        and associate_id not in booked
+    ][:demand.count]
+
+
+def test_single_query_matches_reference(prepared):
+    region = prepared.regions[1]
+    for role in ('PM', None):
+        for min_availability in (0, 60, 60.5, 100):
+            for count in (1, 12, 10000):
+                demand = StaffingDemand(role, region, min_availability, count)
+                result = find_candidates(prepared, role, region, min_availability, count)
+                assert result.candidates['Associate ID'].tolist() == reference_candidates(prepared.frame, demand)
+                assert result.shortfall == count - len(result.candidates)
+                assert (result.candidates['Current Availability'] >= min_availability).all()
+
+
+def test_batch_never_double_books(prepared):
+    demands = [
+        StaffingDemand('PM', prepared.regions[0], 60, 15),
+        StaffingDemand('PM', None, 60, 40),
+        StaffingDemand(None, None, 90, 100),
+        StaffingDemand('PM', prepared.regions[0], 60, 15),
+    ]
+    results = fill_demands(prepared, demands)
+
+    booked = set()
+    for demand, result in zip(demands, results):
+        ids = result.candidates['Associate ID'].tolist()
+        assert ids == reference_candidates(prepared.frame, demand, booked)
+        booked.update(ids)
+    assert sum(len(result.candidates) for result in results) == len(booked)
+
+
+def test_unknown_role_and_demand_syntax(prepared):
+    with pytest.raises(ValueError, match='Unknown role'):
+        find_candidates(prepared, role='Astronaut')
+    assert parse_demand('PM:APAC:60:12') == StaffingDemand('PM', 'APAC', 60, 12)
+    assert parse_demand('*::75%') == StaffingDemand(None, None, 75, 1)
+    with pytest.raises(ValueError, match='Invalid demand'):
+        parse_demand('PM:APAC:sixty:12')
+    for text, problem in (('PM:APAC:60:-3', 'count'), ('PM:APAC:60:0', 'count'),
+                          ('PM:APAC:120:5', 'min_availability'), ('PM:APAC:-5:5', 'min_availability')):
+        with pytest.raises(ValueError, match=f"Invalid demand '{text}': {problem}"):
+            parse_demand(text)
+
+
+def test_query_subcommand(tmp_path, capsys):
+    path = tmp_path / 'roster.xlsx'
+    make_roster(800, seed=32).to_excel(path, index=False)
+    demands = tmp_path / 'demands.csv'
+    demands.write_text('role,region,min_availability,count\nPM,,50,5\nPM,*,50,3\n', encoding='utf-8')
+
+    pms_visualization.main(['query', str(path), '--demand', 'SCRUM:*:70:2', '--demands', str(demands)])
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0].startswith('Demand,Associate ID')
+    assert len(lines) == 1 + 2 + 5 + 3
+    assert len({line.split(',')[1] for line in lines[1:]}) == 10
+
+
+def test_query_subcommand_rejects_bad_demands(tmp_path, capsys):
+    path = tmp_path / 'roster.xlsx'
+    make_roster(200, seed=33).to_excel(path, index=False)
+    demands = tmp_path / 'demands.csv'
+    demands.write_text('role,region,min_availability,count\nPM,,50,5\nPM,,50,-2\n', encoding='utf-8')
+
+    # Bad values and unknown names are usage errors, not tracebacks
+    for argv, message in ((['--demands', str(demands)], 'Invalid demand on row 3: count'),
+                          (['--demand', 'Astronaut:*:50:2'], 'Unknown role: Astronaut'),
+                          (['--demand', 'PM:Atlantis:50:2'], 'Unknown region: Atlantis')):
+        with pytest.raises(SystemExit) as exit_info:
+            pms_visualization.main(['query', str(path), *argv])
+        assert exit_info.value.code == 2
+        assert message in capsys.readouterr().err
@@ -0,0 +1,75 @@
+"""
+Shared dataset store: mapped datasets render like the originals, the bound on
+mapped datasets and eviction from the store directory.
+"""
+import os
+
+import pms_store
+from conftest import make_roster
+from pms_core import prepare_dataset, render
+
+
+def _age(store, key, seconds):
+    used = os.stat(store / key).st_mtime - seconds
+    os.utime(store / key, (used, used))
+
+
+def test_open_datasets_are_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(pms_store, 'MAX_OPEN_DATASETS', 2)
+    monkeypatch.setattr(pms_store, '_OPEN_DATASETS', type(pms_store._OPEN_DATASETS)())
+    prepared = prepare_dataset(dataframe=make_roster(200, seed=71))
+    for key in ('a', 'b', 'c'):
+        pms_store.publish_dataset(key, prepared, store_dir=str(tmp_path))
+
+    pms_store.open_dataset('a', store_dir=str(tmp_path))
+    pms_store.open_dataset('b', store_dir=str(tmp_path))
+    # A hit makes 'a' the most recently used, so opening 'c' drops 'b'
+    assert pms_store.open_dataset('a', store_dir=str(tmp_path)) is pms_store._OPEN_DATASETS['a']
+    pms_store.open_dataset('c', store_dir=str(tmp_path))
+    assert list(pms_store._OPEN_DATASETS) == ['a', 'c']
+
+
+def test_eviction_by_age_and_size(tmp_path):
+    prepared = prepare_dataset(dataframe=make_roster(200, seed=72))
+    for key in ('old', 'stale', 'fresh'):
+        pms_store.publish_dataset(key, prepared, store_dir=str(tmp_path))
+    (tmp_path / '.abandoned-staging').mkdir()
+    _age(tmp_path, 'old', 10 * 86400)
+    _age(tmp_path, '.abandoned-staging', 10 * 86400)
+    _age(tmp_path, 'stale', 3600)
+
+    assert pms_store.evict_datasets(store_dir=str(tmp_path), max_age=86400, max_bytes=1 << 40) == ['old']
+    assert sorted(os.listdir(tmp_path)) == ['fresh', 'stale']
+
+    # Over the size limit the least recently used go first, but never the kept key
+    size = pms_store._directory_size(tmp_path / 'fresh')
+    assert pms_store.evict_datasets(store_dir=str(tmp_path), max_age=86400, max_bytes=size) == ['stale']
+    assert pms_store.evict_datasets(store_dir=str(tmp_path), max_bytes=0, keep='fresh') == []
+    assert pms_store.open_dataset('stale', store_dir=str(tmp_path)) is None
+
+
+def test_mapped_strings_stay_in_arrow_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(pms_store, '_OPEN_DATASETS', type(pms_store._OPEN_DATASETS)())
+    prepared = prepare_dataset(dataframe=make_roster(200, seed=73))
+    pms_store.publish_dataset('k', prepared, store_dir=str(tmp_path))
+    mapped = pms_store.open_dataset('k', store_dir=str(tmp_path))
+    assert mapped.frame['Associate Name'].dtype == pms_store.STRING_DTYPE
+    assert mapped.frame['Region'].dtype == pms_store.STRING_DTYPE
+
+    # A concurrent eviction right after publishing still yields the dataset
+    monkeypatch.setattr(pms_store, 'open_dataset', lambda key, store_dir=None: None)
+    shared, reused = pms_store.shared_dataset('gone', lambda: prepared, store_dir=str(tmp_path))
+    assert shared is prepared and not reused
+
+
+def test_shared_store_renders_identically(tmp_path):
+    df = make_roster(2000, seed=9)
+    prepared = prepare_dataset(dataframe=df)
+    pms_store.publish_dataset('roster', prepared, store_dir=str(tmp_path))
+    pms_store._OPEN_DATASETS.pop('roster', None)
+    mapped = pms_store.open_dataset('roster', store_dir=str(tmp_path))
+    try:
+        assert render(mapped, 'tabbed') == render(prepared, 'tabbed')
+        assert render(mapped, 'tree') == render(prepared, 'tree')
+    finally:
+        pms_store._OPEN_DATASETS.pop('roster', None)
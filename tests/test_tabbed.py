@@ -0,0 +1,130 @@
+"""
+Tabbed dashboard page: summary mode, escaping of names from the file, the
+on-demand region grids, role card distributions and the page byte budget.
+"""
+import numpy as np
+import pytest
+
+import pms_tabbed
+from conftest import extract_script_json, make_roster
+from pms_core import prepare_dataset, render
+
+
+def test_summary_dashboard_is_bounded():
+    small = prepare_dataset(dataframe=make_roster(2000, seed=14))
+    large = prepare_dataset(dataframe=make_roster(40000, seed=14))
+    full = extract_script_json(render(large, 'tabbed'), 'dashboardData')
+
+    summary = extract_script_json(render(large, 'summary', top_n=3), 'dashboardData')
+    assert summary['Summary'] == {'top_n': 3}
+    for role, role_data in full['Roles'].items():
+        for bucket, cell in role_data['buckets'].items():
+            summary_cell = summary['Roles'][role]['buckets'][bucket]
+            assert summary_cell['count'] == cell['count']
+            assert summary_cell['associates'] == cell['associates'][:3]
+
+    # Page size depends on the number of cells, not on headcount
+    assert len(render(large, 'summary')) == pytest.approx(len(render(small, 'summary')), rel=0.05)
+    assert len(render(large, 'summary', top_n=3)) < 300_000
+
+
+def test_tabbed_page_escapes_odd_names():
+    df = make_roster(300, seed=19)
+    odd_region = 'R&D <b>"West"</b> </script><script>alert(1)</script>'
+    odd_role = "O'Brien's \"Team\""
+    df.loc[df.index % 3 == 0, 'Region'] = odd_region
+    df.loc[df.index % 5 == 0, 'Current Role'] = odd_role
+    html = pms_tabbed.render_tabbed(prepare_dataset(dataframe=df))
+
+    assert html.count('</script>') == 1
+    assert html.count('<b>') == 0 and html.count('alert(1)</script>') == 0
+    assert 'O&#x27;Brien&#x27;s &quot;Team&quot;' in html
+    dashboard = extract_script_json(html, 'dashboardData')
+    assert odd_region in dashboard['Regions']
+    assert odd_role in dashboard['Roles']
+    assert odd_region in extract_script_json(html, 'regionNames')
+
+    # The org tree page embeds the same names
+    tree = render(prepare_dataset(dataframe=df), 'tree')
+    assert tree.count('</script>') == 1 and tree.count('<b>') == 0
+    tree_data = extract_script_json(tree, 'treeData')
+    assert odd_role in [role['name'] for role in tree_data['roles']]
+    assert odd_region in tree_data['regions']
+
+
+def test_tabbed_page_renders_only_the_overall_view():
+    df = make_roster(3000, seed=20, n_regions=250)
+    prepared = prepare_dataset(dataframe=df)
+    html = pms_tabbed.render_tabbed(prepared)
+
+    # Region grids are built in the browser when a region is first selected
+    markup = html[:html.index('<script>')]
+    assert markup.count('class="role-card') == len(prepared.roles)
+    assert markup.count('class="tab-content') == 1
+    assert 'Search 250 regions' in html
+    assert extract_script_json(html, 'regionNames') == list(prepared.regions)
+    assert extract_script_json(html, 'roleNames') == list(prepared.roles)
+    assert set(extract_script_json(html, 'dashboardData')['Regions']) == set(prepared.regions)
+
+
+def test_dashboard_budget_degrades_page():
+    prepared = prepare_dataset(dataframe=make_roster(6000, seed=23, n_regions=20))
+    estimate = pms_tabbed.dashboard_size_model(prepared)
+    for top_n in (None, 0, 1, 7):
+        assert estimate(top_n) == pytest.approx(len(pms_tabbed.render_tabbed(prepared, top_n=top_n)), rel=0.1)
+
+    full = estimate(None)
+    assert pms_tabbed.plan_dashboard(prepared, budget=full).strategy == 'full'
+
+    plan = pms_tabbed.plan_dashboard(prepared, budget=full // 3)
+    assert plan.strategy == 'truncated' and plan.view == 'summary'
+    assert estimate(plan.top_n) <= full // 3 < estimate(plan.top_n + 1)
+    page = pms_tabbed.generate_pms_visualization(prepared=prepared, budget=full // 3)
+    assert page == pms_tabbed.render_tabbed(prepared, top_n=plan.top_n)
+    assert len(page) <= full // 3 * 1.1
+
+    assert pms_tabbed.plan_dashboard(prepared, top_n=5, budget=estimate(0)).strategy == 'summary'
+    plan = pms_tabbed.plan_dashboard(prepared, budget=1000)
+    assert (plan.strategy, plan.top_n, plan.embed) == ('download', 0, False)
+    assert 'download it instead' in pms_tabbed.plan_message(plan)
+
+
+def test_budget_holds_for_escaped_names():
+    df = make_roster(6000, seed=24, n_regions=20)
+    # Cyrillic and astral names become \uXXXX escapes, '<' becomes \u003c
+    df['Associate Name'] = [f'Иванова Мария {i} <x> 🙂' for i in range(len(df))]
+    df.loc[df.index % 4 == 0, 'Region'] = 'Région <Süd>'
+    prepared = prepare_dataset(dataframe=df)
+    estimate = pms_tabbed.dashboard_size_model(prepared)
+    for top_n in (None, 0, 7):
+        actual = len(pms_tabbed.render_tabbed(prepared, top_n=top_n).encode('utf-8'))
+        assert estimate(top_n) == pytest.approx(actual, rel=0.05)
+
+    budget = estimate(None) // 2
+    plan = pms_tabbed.plan_dashboard(prepared, budget=budget)
+    assert plan.strategy == 'truncated'
+    page = pms_tabbed.generate_pms_visualization(prepared=prepared, budget=budget)
+    assert len(page.encode('utf-8')) <= budget
+
+
+def test_role_card_distributions_match_numpy():
+    prepared = prepare_dataset(dataframe=make_roster(2000, seed=18))
+    dashboard = extract_script_json(pms_tabbed.render_tabbed(prepared), 'dashboardData')
+    frame = prepared.frame
+
+    cards = [(None, role, data) for role, data in dashboard['Roles'].items()]
+    cards += [(region, role, data) for region, region_data in dashboard['Regions'].items()
+              for role, data in region_data['roles'].items()]
+    for region, role, card in cards:
+        selected = np.ones(len(frame), dtype=bool)
+        if region is not None:
+            selected &= (frame['Region'] == region).to_numpy()
+        if role != 'Total':
+            selected &= (frame['Mapped_Role'] == role).to_numpy()
+        values = frame['Current Availability'][selected].tolist()
+        if not values:
+            assert 'median' not in card
+            continue
+        assert [card['p10'], card['median'], card['p90']] == np.percentile(values, [10, 50, 90]).round(1).tolist()
+        assert card['histogram'] == [sum(1 for v in values if 10 * i < v <= 10 * (i + 1)) for i in range(10)]
+        assert sum(card['histogram']) == card['count']
@@ -0,0 +1,77 @@
+"""
+Reading uploads: the streaming workbook reader against pandas, the
+approximate preview shown while a large upload is read, and combining
+several workbooks into one roster.
+"""
+import numpy as np
+import pandas as pd
+
+from conftest import TEST_DATA, make_roster
+from pms_core import (BUCKETS, approximate_summary, combine_rosters, prepare_dataset, read_excel_chunked,
+                      read_excel_header, read_workbooks, validate_dataframe)
+
+
+def test_streaming_reader_matches_read_excel(tmp_path):
+    df = make_roster(3000, seed=11).astype(object)
+    df.loc[10, 'Associate ID'] = 12345
+    df.loc[11, 'Current Availability'] = 55.5
+    path = tmp_path / 'roster.xlsx'
+    df.to_excel(path, index=False)
+
+    reports = []
+    streamed = read_excel_chunked(path, progress=lambda rows, total: reports.append((rows, total)), chunk_rows=1000)
+    pd.testing.assert_frame_equal(streamed, pd.read_excel(path, engine='openpyxl'))
+    assert reports == [(1000, 3001), (2000, 3001), (3000, 3001), (3001, 3001)]
+    assert read_excel_header(path) == list(df.columns)
+    assert read_excel_header(TEST_DATA)[:2] == ['Current Role', 'Region']
+
+
+def test_approximate_preview_from_first_rows(tmp_path):
+    df = make_roster(3000, seed=13)
+    path = tmp_path / 'roster.xlsx'
+    df.to_excel(path, index=False)
+
+    previews = []
+    full = read_excel_chunked(path, preview=lambda sample, total: previews.append((sample, total)), preview_rows=1000)
+    (sample, total_rows), = previews
+    pd.testing.assert_frame_equal(sample, full.head(1000))
+    assert total_rows == 3000
+
+    summary = approximate_summary(sample, total_rows)
+    prepared = prepare_dataset(dataframe=df)
+    assert summary['sample_rows'] == 1000
+    assert abs(summary['total_count'] - prepared.total_count) < 0.05 * prepared.total_count
+    assert abs(summary['avg_availability'] - prepared.total_avg_availability) < 5
+    assert list(summary['bucket_shares'].columns) == BUCKETS
+    assert np.allclose(summary['bucket_shares'].sum(axis=1), 100, atol=0.5)
+
+
+def test_combined_upload_matches_concatenated_roster(tmp_path):
+    first = make_roster(1500, seed=15)
+    second = make_roster(1000, seed=16, n_regions=8)
+    second['Associate ID'] = second['Associate ID'].str.replace('A', 'B')
+    second.loc[50:59, 'Associate ID'] = first.loc[50:59, 'Associate ID'].to_numpy()
+    second.loc[100, 'Current Availability'] = 'unknown'
+
+    contents = []
+    for i, df in enumerate((first, second)):
+        path = tmp_path / f'region_{i}.xlsx'
+        df.to_excel(path, index=False)
+        contents.append(path.read_bytes())
+    frames = read_workbooks(contents, workers=2)
+    for i, frame in enumerate(frames):
+        pd.testing.assert_frame_equal(frame, pd.read_excel(tmp_path / f'region_{i}.xlsx'))
+
+    combined, dropped = combine_rosters(frames, ['north.xlsx', 'south.xlsx'])
+    assert dropped == 10
+    assert isinstance(combined['Region'].dtype, pd.CategoricalDtype)
+    assert isinstance(validate_dataframe(combined)[0]['Current Role'].dtype, pd.CategoricalDtype)
+    prepared = prepare_dataset(dataframe=combined)
+    expected = prepare_dataset(dataframe=pd.concat([first, second.drop(index=range(50, 60))], ignore_index=True))
+    pd.testing.assert_frame_equal(prepared.frame.drop(columns='Source File'), expected.frame)
+
+    # Errors point at the row within the file they came from
+    errors = prepared.errors
+    assert errors.columns[0] == 'Source File'
+    assert errors[errors['Reason'] == 'Unparsable availability'][['Source File', 'Row']].values.tolist() == [
+        ['north.xlsx', 7], ['south.xlsx', 7], ['south.xlsx', 102]]
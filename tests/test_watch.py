@@ -0,0 +1,67 @@
+"""
+Watch-folder mode: only settled, really changed workbooks are regenerated.
+"""
+import os
+
+import pms_store
+from conftest import make_roster
+from pms_watch import FolderWatcher
+
+
+def _write(path, df, mtime):
+    df.to_excel(path, index=False)
+    os.utime(path, (mtime, mtime))
+
+
+def test_watcher_regenerates_only_changed_workbooks(tmp_path):
+    drop = tmp_path / 'drop'
+    drop.mkdir()
+    calls = []
+
+    def process(file_path, prepared):
+        calls.append((os.path.basename(file_path), prepared.total_count))
+
+    watcher = FolderWatcher(str(drop), process, settle=0, jobs=2, store_dir=str(tmp_path / 'store'))
+    try:
+        _write(drop / 'a.xlsx', make_roster(60, seed=1), 1_000_000)
+        _write(drop / 'b.xlsx', make_roster(80, seed=2), 1_000_000)
+        (drop / '~$a.xlsx').write_bytes(b'lock')
+        (drop / 'notes.txt').write_text('ignored')
+
+        # First sighting only records the stat; the second poll sees it settled
+        assert watcher.poll_once() == []
+        assert sorted(os.path.basename(p) for p in watcher.poll_once()) == ['a.xlsx', 'b.xlsx']
+        watcher.wait()
+        assert sorted(name for name, _ in calls) == ['a.xlsx', 'b.xlsx']
+
+        # Nothing changed
+        assert watcher.poll_once() == []
+
+        # Touched without changing content: picked up, but not regenerated
+        os.utime(drop / 'a.xlsx', (1_000_100, 1_000_100))
+        watcher.poll_once()
+        watcher.poll_once()
+        watcher.wait()
+        assert len(calls) == 2
+
+        # Modified: regenerated once it has settled
+        _write(drop / 'b.xlsx', make_roster(120, seed=3), 1_000_200)
+        watcher.poll_once()
+        watcher.poll_once()
+        watcher.wait()
+        assert calls[2:] == [('b.xlsx', 110)]
+
+        # Only the latest version of each workbook stays in the store and mapped
+        store = tmp_path / 'store'
+        keys = dict(watcher._keys)
+        assert sorted(os.listdir(store)) == sorted(keys.values())
+        assert not set(pms_store._OPEN_DATASETS) - set(keys.values())
+
+        # Deleted: forgotten, and its dataset removed
+        os.remove(drop / 'a.xlsx')
+        watcher.poll_once()
+        assert list(watcher._processed) == [str(drop / 'b.xlsx')]
+        assert os.listdir(store) == [keys[str(drop / 'b.xlsx')]]
+        assert keys[str(drop / 'a.xlsx')] not in pms_store._OPEN_DATASETS
+    finally:
+        watcher.pool.shutdown(wait=True)